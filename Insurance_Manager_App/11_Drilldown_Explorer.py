@@ -0,0 +1,95 @@
+import streamlit as st
+from claims_store import claims_available
+from star_schema import load_star
+from precompute import cached_result, get_result
+from drilldown import LEVELS, OTHER, TOP_K
+from lazy_imports import lazy_module
+from instrumentation import finish_run, span, start_run
+
+px = lazy_module("plotly.express")
+start_run("11_Drilldown_Explorer")
+try:
+    st.title("🧭 Drill-Down Explorer — State → City → Organization → Patient")
+    st.markdown("Pick a node at each level to open its children. Every level lists its top entries; pick **Other** to search and page through the rest.")
+
+    data_path = "data/cleaned_claims_full.csv"
+    if not claims_available(data_path):
+        st.error("❌ Data file missing.")
+        st.stop()
+
+    # The rollup comes from the background precompute; the claims are only
+    # loaded if it has not run yet for this dataset version
+    rollup = get_result("hierarchy", data_path)
+    if rollup is None:
+        claims = load_star(data_path).claims(LEVELS + ["IsDiabetes", "IsDialysis"])
+        rollup = cached_result("hierarchy", claims, data_path)
+
+    SORT_OPTIONS = {
+        "Claim cost": "TOTAL_CLAIM_COST",
+        "Claims": "CLAIMS",
+        "Patients": "PATIENTS",
+        "Diabetes claims": "DIABETES_CLAIMS",
+        "Dialysis claims": "DIALYSIS_CLAIMS",
+    }
+    st.sidebar.header("🔍 Drill-Down Options")
+    sort_label = st.sidebar.selectbox("Rank children by:", list(SORT_OPTIONS))
+    sort = SORT_OPTIONS[sort_label]
+    top_k = st.sidebar.slider("Children shown per level:", 5, 50, TOP_K)
+
+    # ----------------------------
+    # PATH SELECTION (one level at a time)
+    # ----------------------------
+    path = []
+    cols = st.columns(len(LEVELS) - 1)
+    for depth, level in enumerate(LEVELS[:-1]):
+        names = rollup.child_names(tuple(path), top_k, sort)
+        remaining = rollup.child_count(tuple(path)) - len(names)
+        other = f"{OTHER} ({remaining:,} more)…"
+        choice = cols[depth].selectbox(
+            f"{level.title()}:", ["(all)"] + names + ([other] if remaining > 0 else []), key=f"drill_{level}"
+        )
+        if choice == other:
+            # Everything folded into Other: search by name, then page through the matches
+            query = cols[depth].text_input(f"Search {level.lower()}:", key=f"drill_{level}_query").strip()
+            offset = 0 if query else len(names)
+            matches = rollup.child_count(tuple(path), query or None) - offset
+            pages = max(1, -(-matches // top_k))
+            page = cols[depth].number_input(f"Page (of {pages:,}):", 1, pages, 1, key=f"drill_{level}_page")
+            page_names = rollup.child_names(tuple(path), top_k, sort, offset + (page - 1) * top_k, query or None)
+            choice = cols[depth].selectbox(f"{level.title()} ({matches:,} found):", ["(all)"] + page_names,
+                                           key=f"drill_{level}_other")
+        if choice == "(all)":
+            break
+        path.append(choice)
+
+    path = tuple(path)
+    st.caption("📍 " + " → ".join(["All"] + list(path)))
+
+    # ----------------------------
+    # KPIs OF THE SELECTED NODE
+    # ----------------------------
+    node = rollup.node(path)
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("📋 Claims", f"{node['CLAIMS']:,}")
+    col2.metric("💰 Claim Cost", f"${node['TOTAL_CLAIM_COST']:,.0f}")
+    col3.metric("👥 Patients", f"{node['PATIENTS']:,}")
+    col4.metric("💵 Avg Claim Cost", f"${node['TOTAL_CLAIM_COST'] / node['CLAIMS']:,.0f}" if node["CLAIMS"] else "N/A")
+
+    # ----------------------------
+    # CHILDREN OF THE SELECTED NODE
+    # ----------------------------
+    child_level = LEVELS[len(path)]
+    with span("drill-down children", rows=top_k):
+        children = rollup.children(path, top_k, sort)
+
+    st.header(f"{child_level.title()} Breakdown")
+    fig = px.bar(children, x="NAME", y=sort, color="TOTAL_CLAIM_COST",
+                 title=f"Top {top_k} {child_level.title()} by {sort_label}")
+    fig.update_xaxes(title=child_level.title())
+    st.plotly_chart(fig, use_container_width=True)
+
+    if child_level == "ORGANIZATION":
+        st.caption("Patients of **Other** are not shown: a patient can visit several organizations.")
+    st.dataframe(children.rename(columns={"NAME": child_level}), hide_index=True)
+finally:
+    finish_run()
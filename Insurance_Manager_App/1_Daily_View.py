@@ -1,98 +1,148 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-
-# ----------------------------
-# PAGE TITLE
-# ----------------------------
-st.title("📅 Daily Operational Overview")
-
-# ----------------------------
-# LOAD DATA
-# ----------------------------
-df = pd.read_csv("data/cleaned_claims_full.csv")
-
-# Handle encounter/start date safely
-if "ENCOUNTER_DATE" in df.columns:
-    df["DATE"] = pd.to_datetime(df["ENCOUNTER_DATE"], errors="coerce")
-elif "START" in df.columns:
-    df["DATE"] = pd.to_datetime(df["START"], errors="coerce")
-else:
-    st.warning("⚠️ No encounter or start date column found in dataset.")
-    df["DATE"] = pd.NaT
-
-# Extract date components
-df["DAY"] = df["DATE"].dt.date
-df["MONTH"] = df["DATE"].dt.to_period("M").astype(str)
-
-# ----------------------------
-# FILTERS
-# ----------------------------
-st.sidebar.header("🔍 Filters")
-selected_month = st.sidebar.selectbox("Select Month:", sorted(df["MONTH"].unique()))
-filtered_df = df[df["MONTH"] == selected_month]
-
-# ----------------------------
-# KPIs
-# ----------------------------
-col1, col2, col3 = st.columns(3)
-col1.metric("📋 Total Claims", f"{len(filtered_df):,}")
-col2.metric("💰 Total Cost", f"${filtered_df['TOTAL_CLAIM_COST'].sum():,.0f}")
-col3.metric("🏥 Unique Patients", f"{filtered_df['PATIENT'].nunique():,}")
-
-st.markdown("---")
-
-# ----------------------------
-# CHART 1: DAILY CLAIMS TREND
-# ----------------------------
-st.subheader(f"📈 Daily Claims Trend — {selected_month}")
-daily_trend = filtered_df.groupby("DAY")["TOTAL_CLAIM_COST"].sum().reset_index()
-fig1 = px.line(
-    daily_trend,
-    x="DAY",
-    y="TOTAL_CLAIM_COST",
-    title="Daily Total Claim Cost",
-    markers=True,
-    color_discrete_sequence=["#1565C0"]
-)
-st.plotly_chart(fig1, use_container_width=True)
-
-# ----------------------------
-# CHART 2: TOP CONDITIONS
-# ----------------------------
-st.subheader("🩺 Top Chronic Conditions (Diabetes & Dialysis)")
-cond_sum = {
-    "Diabetes Cases": filtered_df["IsDiabetes"].sum(),
-    "Dialysis Cases": filtered_df["IsDialysis"].sum()
-}
-cond_df = pd.DataFrame(list(cond_sum.items()), columns=["Condition", "Count"])
-fig2 = px.bar(
-    cond_df,
-    x="Condition",
-    y="Count",
-    title="Daily Condition Counts",
-    color="Condition",
-    color_discrete_sequence=["#42A5F5", "#66BB6A"]
-)
-st.plotly_chart(fig2, use_container_width=True)
-
-# ----------------------------
-# CHART 3: PAYER COVERAGE
-# ----------------------------
-if "PAYER_NAME" in df.columns:
-    st.subheader("🏦 Payer Coverage Breakdown")
-    payer_cost = filtered_df.groupby("PAYER_NAME")["TOTAL_CLAIM_COST"].sum().reset_index()
-    fig3 = px.pie(
-        payer_cost,
-        names="PAYER_NAME",
-        values="TOTAL_CLAIM_COST",
-        title="Total Claim Cost by Payer"
+from claims_store import date_range, time_bounds
+from star_schema import load_star
+from lazy_imports import lazy_module
+from instrumentation import finish_run, span, start_run
+from result_cache import cached_page_result
+
+px = lazy_module("plotly.express")
+start_run("1_Daily_View")
+try:
+    # ----------------------------
+    # PAGE TITLE
+    # ----------------------------
+    st.title("📅 Daily Operational Overview")
+
+    # ----------------------------
+    # LOAD DATA
+    # ----------------------------
+    # Encounter facts only: patient and payer attributes are joined for the
+    # selected range (see star_schema)
+    star = load_star()
+    df = star.fact
+
+    # The claims are sorted by ENCOUNTER_DATE (see claims_store), so a date range
+    # is a binary search and a slice, not a scan of every claim
+    first_date, last_date = (d.date() for d in time_bounds(df))
+
+    # ----------------------------
+    # FILTERS
+    # ----------------------------
+    st.sidebar.header("🔍 Filters")
+    selected_range = st.sidebar.date_input(
+        "Date range:",
+        value=(max(first_date, last_date.replace(day=1)), last_date),
+        min_value=first_date,
+        max_value=last_date,
     )
-    st.plotly_chart(fig3, use_container_width=True)
+    if len(selected_range) != 2:
+        st.info("Pick the last day of the range.")
+        st.stop()
+    start_date, end_date = selected_range
+
+
+    # ----------------------------
+    # AGGREGATES & FIGURES
+    # ----------------------------
+    # Built once per date range and shared across sessions (see result_cache)
+    def build_range_view(start, end):
+        with span("slice date range") as s:
+            filtered_df = date_range(df, start, end)
+            s["rows"] = len(filtered_df)
+        with span("join dimensions", rows=len(filtered_df)):
+            columns = ["PATIENT", "PAYER_NAME", "CITY", "STATE", "IsDiabetes", "IsDialysis"]
+            filtered_df = star.join(filtered_df, [c for c in columns if c in star.column_dimension])
+        with span("date columns", rows=len(filtered_df)):
+            filtered_df = filtered_df.assign(DAY=filtered_df["ENCOUNTER_DATE"].dt.normalize())
+
+        with span("groupby daily cost", rows=len(filtered_df)):
+            daily_trend = filtered_df.groupby("DAY")["TOTAL_CLAIM_COST"].sum().reset_index()
+        with span("figure: daily trend"):
+            fig1 = px.line(
+                daily_trend,
+                x="DAY",
+                y="TOTAL_CLAIM_COST",
+                title="Daily Total Claim Cost",
+                markers=True,
+                color_discrete_sequence=["#1565C0"]
+            )
+
+        cond_sum = {
+            "Diabetes Cases": filtered_df["IsDiabetes"].sum(),
+            "Dialysis Cases": filtered_df["IsDialysis"].sum()
+        }
+        cond_df = pd.DataFrame(list(cond_sum.items()), columns=["Condition", "Count"])
+        with span("figure: condition counts"):
+            fig2 = px.bar(
+                cond_df,
+                x="Condition",
+                y="Count",
+                title="Daily Condition Counts",
+                color="Condition",
+                color_discrete_sequence=["#42A5F5", "#66BB6A"]
+            )
+
+        fig3 = None
+        if "PAYER_NAME" in filtered_df.columns:
+            with span("groupby payer cost", rows=len(filtered_df)):
+                payer_cost = filtered_df.groupby("PAYER_NAME", observed=True)["TOTAL_CLAIM_COST"].sum().reset_index()
+            with span("figure: payer breakdown"):
+                fig3 = px.pie(
+                    payer_cost,
+                    names="PAYER_NAME",
+                    values="TOTAL_CLAIM_COST",
+                    title="Total Claim Cost by Payer"
+                )
+
+        return {
+            "claims": len(filtered_df),
+            "cost": filtered_df["TOTAL_CLAIM_COST"].sum(),
+            "patients": filtered_df["PATIENT"].nunique(),
+            "fig1": fig1,
+            "fig2": fig2,
+            "fig3": fig3,
+            "table": filtered_df[["DAY", "PATIENT", "TOTAL_CLAIM_COST", "PAYER_NAME", "CITY", "STATE"]].head(20),
+        }
+
+
+    view = cached_page_result(
+        "1_Daily_View", (start_date.isoformat(), end_date.isoformat()), build_range_view, start_date, end_date
+    )
+
+    # ----------------------------
+    # KPIs
+    # ----------------------------
+    col1, col2, col3 = st.columns(3)
+    col1.metric("📋 Total Claims", f"{view['claims']:,}")
+    col2.metric("💰 Total Cost", f"${view['cost']:,.0f}")
+    col3.metric("🏥 Unique Patients", f"{view['patients']:,}")
+
+    st.markdown("---")
+
+    # ----------------------------
+    # CHART 1: DAILY CLAIMS TREND
+    # ----------------------------
+    st.subheader(f"📈 Daily Claims Trend — {start_date:%b %d, %Y} to {end_date:%b %d, %Y}")
+    st.plotly_chart(view["fig1"], use_container_width=True)
+
+    # ----------------------------
+    # CHART 2: TOP CONDITIONS
+    # ----------------------------
+    st.subheader("🩺 Top Chronic Conditions (Diabetes & Dialysis)")
+    st.plotly_chart(view["fig2"], use_container_width=True)
 
-# ----------------------------
-# TABLE
-# ----------------------------
-st.markdown("### 📋 Daily Claims Table")
-st.dataframe(filtered_df[["DAY", "PATIENT", "TOTAL_CLAIM_COST", "PAYER_NAME", "CITY", "STATE"]].head(20))
+    # ----------------------------
+    # CHART 3: PAYER COVERAGE
+    # ----------------------------
+    if view["fig3"] is not None:
+        st.subheader("🏦 Payer Coverage Breakdown")
+        st.plotly_chart(view["fig3"], use_container_width=True)
 
+    # ----------------------------
+    # TABLE
+    # ----------------------------
+    st.markdown("### 📋 Daily Claims Table")
+    st.dataframe(view["table"])
+finally:
+    finish_run()
@@ -1,127 +1,212 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-
-# ----------------------------
-# PAGE TITLE
-# ----------------------------
-st.title("📊 Weekly Performance Overview")
-
-# ----------------------------
-# LOAD DATA
-# ----------------------------
-df = pd.read_csv("data/cleaned_claims_full.csv")
-
-# Handle encounter/start date safely
-if "ENCOUNTER_DATE" in df.columns:
-    df["DATE"] = pd.to_datetime(df["ENCOUNTER_DATE"], errors="coerce")
-elif "START" in df.columns:
-    df["DATE"] = pd.to_datetime(df["START"], errors="coerce")
-else:
-    st.warning("⚠️ No encounter or start date column found in dataset.")
-    df["DATE"] = pd.NaT
-
-# Extract week and month
-df["WEEK"] = df["DATE"].dt.isocalendar().week
-df["YEAR"] = df["DATE"].dt.year
-df["MONTH"] = df["DATE"].dt.to_period("M").astype(str)
-
-# ----------------------------
-# FILTERS
-# ----------------------------
-st.sidebar.header("🔍 Filters")
-selected_year = st.sidebar.selectbox("Select Year:", sorted(df["YEAR"].dropna().unique()))
-filtered_df = df[df["YEAR"] == selected_year]
-
-# ----------------------------
-# KPIs
-# ----------------------------
-weekly_summary = filtered_df.groupby("WEEK").agg({
-    "TOTAL_CLAIM_COST": "sum",
-    "IsDiabetes": "sum",
-    "IsDialysis": "sum"
-}).reset_index()
-
-col1, col2, col3 = st.columns(3)
-col1.metric("💰 Total Cost", f"${filtered_df['TOTAL_CLAIM_COST'].sum():,.0f}")
-col2.metric("📆 Weeks Covered", f"{weekly_summary['WEEK'].nunique()}")
-col3.metric("🏥 Unique Patients", f"{filtered_df['PATIENT'].nunique():,}")
-
-st.markdown("---")
-
-# ----------------------------
-# CHART 1: WEEKLY CLAIM COST
-# ----------------------------
-st.subheader(f"📈 Weekly Total Claim Cost — {selected_year}")
-fig1 = px.line(
-    weekly_summary,
-    x="WEEK",
-    y="TOTAL_CLAIM_COST",
-    title="Weekly Total Claim Cost",
-    markers=True,
-    color_discrete_sequence=["#1565C0"]
-)
-st.plotly_chart(fig1, use_container_width=True)
-
-# ----------------------------
-# CHART 2: WEEKLY CONDITION TREND
-# ----------------------------
-st.subheader("🏥 Weekly Diabetes vs Dialysis Cases")
-fig2 = px.bar(
-    weekly_summary,
-    x="WEEK",
-    y=["IsDiabetes", "IsDialysis"],
-    barmode="group",
-    title="Weekly Chronic Condition Counts"
-)
-st.plotly_chart(fig2, use_container_width=True)
-
-# ----------------------------
-# CHART 3: COST BY ORGANIZATION
-# ----------------------------
-if "ORGANIZATION" in df.columns:
-    st.subheader("🏢 Top Organizations by Claim Cost")
-    org_weekly = (
-        filtered_df.groupby(["ORGANIZATION"])["TOTAL_CLAIM_COST"]
-        .sum()
-        .reset_index()
-        .sort_values(by="TOTAL_CLAIM_COST", ascending=False)
-        .head(10)
-    )
-    fig3 = px.bar(
-        org_weekly,
-        x="ORGANIZATION",
-        y="TOTAL_CLAIM_COST",
-        title="Top 10 Organizations by Claim Cost",
-        color_discrete_sequence=["#42A5F5"]
-    )
-    st.plotly_chart(fig3, use_container_width=True)
-
-# ----------------------------
-# CHART 4: PAYER COST BY WEEK
-# ----------------------------
-if "PAYER_NAME" in df.columns:
-    st.subheader("🏦 Weekly Claim Cost by Payer")
-    payer_weekly = (
-        filtered_df.groupby(["WEEK", "PAYER_NAME"])["TOTAL_CLAIM_COST"]
-        .sum()
-        .reset_index()
-    )
-    fig4 = px.line(
-        payer_weekly,
-        x="WEEK",
-        y="TOTAL_CLAIM_COST",
-        color="PAYER_NAME",
-        title="Weekly Claim Cost by Payer",
-        markers=True
+from star_schema import load_star
+from lazy_imports import lazy_module
+from instrumentation import finish_run, span, start_run
+from precompute import cached_result
+from result_cache import cached_page_result
+from rolling import WINDOWS
+
+px = lazy_module("plotly.express")
+start_run("2_Weekly_Performance")
+try:
+    # ----------------------------
+    # PAGE TITLE
+    # ----------------------------
+    st.title("📊 Weekly Performance Overview")
+
+    # ----------------------------
+    # LOAD DATA
+    # ----------------------------
+    # Encounter facts with the patient, payer and condition columns this page uses
+    df = load_star().claims(["PATIENT", "PAYER_NAME", "ORGANIZATION", "IsDiabetes", "IsDialysis"])
+
+    # ENCOUNTER_DATE is validated and typed by the ETL (see validation)
+    with span("date columns", rows=len(df)):
+        df["DATE"] = df["ENCOUNTER_DATE"]
+
+        # Extract week and month
+        df["WEEK"] = df["DATE"].dt.isocalendar().week
+        df["YEAR"] = df["DATE"].dt.year
+        df["MONTH"] = df["DATE"].dt.to_period("M").astype(str)
+
+    # ----------------------------
+    # FILTERS
+    # ----------------------------
+    st.sidebar.header("🔍 Filters")
+    selected_year = st.sidebar.selectbox("Select Year:", sorted(df["YEAR"].dropna().unique()))
+
+
+    # ----------------------------
+    # AGGREGATES & FIGURES
+    # ----------------------------
+    # Built once per year and shared across sessions (see result_cache)
+    def build_year_view(year):
+        with span("filter year") as s:
+            filtered_df = df[df["YEAR"] == year]
+            s["rows"] = len(filtered_df)
+
+        with span("groupby weekly summary", rows=len(filtered_df)):
+            weekly_summary = filtered_df.groupby("WEEK").agg({
+                "TOTAL_CLAIM_COST": "sum",
+                "IsDiabetes": "sum",
+                "IsDialysis": "sum"
+            }).reset_index()
+
+        fig1 = px.line(
+            weekly_summary,
+            x="WEEK",
+            y="TOTAL_CLAIM_COST",
+            title="Weekly Total Claim Cost",
+            markers=True,
+            color_discrete_sequence=["#1565C0"]
+        )
+        fig2 = px.bar(
+            weekly_summary,
+            x="WEEK",
+            y=["IsDiabetes", "IsDialysis"],
+            barmode="group",
+            title="Weekly Chronic Condition Counts"
+        )
+
+        fig3 = None
+        if "ORGANIZATION" in df.columns:
+            with span("groupby top organizations", rows=len(filtered_df)):
+                org_weekly = (
+                    filtered_df.groupby(["ORGANIZATION"], observed=True)["TOTAL_CLAIM_COST"]
+                    .sum()
+                    .reset_index()
+                    .sort_values(by="TOTAL_CLAIM_COST", ascending=False)
+                    .head(10)
+                )
+            fig3 = px.bar(
+                org_weekly,
+                x="ORGANIZATION",
+                y="TOTAL_CLAIM_COST",
+                title="Top 10 Organizations by Claim Cost",
+                color_discrete_sequence=["#42A5F5"]
+            )
+
+        fig4 = None
+        if "PAYER_NAME" in df.columns:
+            with span("groupby weekly payer cost", rows=len(filtered_df)):
+                payer_weekly = (
+                    filtered_df.groupby(["WEEK", "PAYER_NAME"], observed=True)["TOTAL_CLAIM_COST"]
+                    .sum()
+                    .reset_index()
+                )
+            fig4 = px.line(
+                payer_weekly,
+                x="WEEK",
+                y="TOTAL_CLAIM_COST",
+                color="PAYER_NAME",
+                title="Weekly Claim Cost by Payer",
+                markers=True
+            )
+
+        return {
+            "cost": filtered_df["TOTAL_CLAIM_COST"].sum(),
+            "weeks": weekly_summary["WEEK"].nunique(),
+            "patients": filtered_df["PATIENT"].nunique(),
+            "fig1": fig1,
+            "fig2": fig2,
+            "fig3": fig3,
+            "fig4": fig4,
+            "table": weekly_summary.tail(10),
+        }
+
+
+    view = cached_page_result("2_Weekly_Performance", (selected_year,), build_year_view, selected_year)
+
+    # ----------------------------
+    # KPIs
+    # ----------------------------
+    col1, col2, col3 = st.columns(3)
+    col1.metric("💰 Total Cost", f"${view['cost']:,.0f}")
+    col2.metric("📆 Weeks Covered", f"{view['weeks']}")
+    col3.metric("🏥 Unique Patients", f"{view['patients']:,}")
+
+    st.markdown("---")
+
+    # ----------------------------
+    # CHART 1: WEEKLY CLAIM COST
+    # ----------------------------
+    st.subheader(f"📈 Weekly Total Claim Cost — {selected_year}")
+    st.plotly_chart(view["fig1"], use_container_width=True)
+
+    # ----------------------------
+    # CHART 2: WEEKLY CONDITION TREND
+    # ----------------------------
+    st.subheader("🏥 Weekly Diabetes vs Dialysis Cases")
+    st.plotly_chart(view["fig2"], use_container_width=True)
+
+    # ----------------------------
+    # CHART 3: COST BY ORGANIZATION
+    # ----------------------------
+    if view["fig3"] is not None:
+        st.subheader("🏢 Top Organizations by Claim Cost")
+        st.plotly_chart(view["fig3"], use_container_width=True)
+        st.caption("🧭 Use the Drilldown Explorer page to browse every organization by state and city.")
+
+    # ----------------------------
+    # CHART 4: PAYER COST BY WEEK
+    # ----------------------------
+    if view["fig4"] is not None:
+        st.subheader("🏦 Weekly Claim Cost by Payer")
+        st.plotly_chart(view["fig4"], use_container_width=True)
+
+    # ----------------------------
+    # TABLE
+    # ----------------------------
+    st.markdown("### 📋 Weekly Performance Table")
+    st.dataframe(
+        view["table"]
     )
-    st.plotly_chart(fig4, use_container_width=True)
 
-# ----------------------------
-# TABLE
-# ----------------------------
-st.markdown("### 📋 Weekly Performance Table")
-st.dataframe(
-    weekly_summary.tail(10)
-)
+    # ----------------------------
+    # ROLLING WINDOWS BY ORGANIZATION / PAYER
+    # ----------------------------
+    st.markdown("---")
+    st.subheader(f"📉 Rolling Performance — {selected_year}")
 
+    ENTITIES = {"Organization": "ORGANIZATION", "Payer": "PAYER_NAME"}
+    ROLLING_METRICS = {"Claim cost": "TOTAL_CLAIM_COST", "Claims": "CLAIMS"}
+    rc1, rc2, rc3 = st.columns(3)
+    rolling_entity = rc1.radio("Entity:", list(ENTITIES), horizontal=True)
+    window_label = rc2.selectbox("Trailing window:", list(WINDOWS), index=1)
+    rolling_metric = rc3.selectbox("Rolling metric:", list(ROLLING_METRICS))
+
+
+    # Trailing sums of every entity come from one pass over the date-sorted
+    # cumulative sums (see rolling); built once per selection and shared
+    def build_rolling_view(year, entity, window, metric, top_n=5):
+        index = cached_result("rolling_indexes", df)[entity]
+        days = WINDOWS[window]
+        year_dates = df.loc[df["YEAR"] == year, "DATE"]
+        ends = pd.date_range(year_dates.min().normalize(), year_dates.max().normalize(), freq="D")
+
+        with span("rolling windows", rows=len(index.names) * len(ends)):
+            board = index.latest(days, ends[-1]).sort_values(metric, ascending=False, ignore_index=True)
+            top = board[entity].head(top_n).tolist()
+            trend = index.window(days, ends, top)
+
+        fig = px.line(
+            trend, x="DATE", y=metric, color=entity,
+            title=f"Trailing {window} {metric.replace('_', ' ').title()} — Top {len(top)} by Latest Window",
+        )
+        return {"fig": fig, "board": board.head(20), "end": ends[-1], "entities": len(board)}
+
+
+    rolling_view = cached_page_result(
+        "2_Weekly_Performance",
+        ("rolling", selected_year, ENTITIES[rolling_entity], window_label, ROLLING_METRICS[rolling_metric]),
+        build_rolling_view, selected_year, ENTITIES[rolling_entity], window_label, ROLLING_METRICS[rolling_metric],
+    )
+    st.plotly_chart(rolling_view["fig"], use_container_width=True)
+    st.markdown(
+        f"**{rolling_entity} ranking for the {window_label} ending {rolling_view['end']:%Y-%m-%d}** "
+        f"(top 20 of {rolling_view['entities']:,}; change = against the {window_label} before)"
+    )
+    st.dataframe(rolling_view["board"], hide_index=True)
+finally:
+    finish_run()
@@ -1,147 +1,195 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-from prophet import Prophet
-
-# ----------------------------
-# PAGE TITLE
-# ----------------------------
-st.title("💰 Monthly Financial Overview")
-
-# ----------------------------
-# LOAD DATA
-# ----------------------------
-df = pd.read_csv("data/cleaned_claims_full.csv")
-
-# Handle encounter/start date safely
-if "ENCOUNTER_DATE" in df.columns:
-    df["DATE"] = pd.to_datetime(df["ENCOUNTER_DATE"], errors="coerce")
-elif "START" in df.columns:
-    df["DATE"] = pd.to_datetime(df["START"], errors="coerce")
-else:
-    st.warning("⚠️ No encounter or start date column found in dataset.")
-    df["DATE"] = pd.NaT
-
-# Extract month
-df["MONTH"] = df["DATE"].dt.to_period("M").astype(str)
-
-# ----------------------------
-# MONTHLY SUMMARY
-# ----------------------------
-monthly = df.groupby("MONTH").agg({
-    "TOTAL_CLAIM_COST": "sum",
-    "IsDiabetes": "sum",
-    "IsDialysis": "sum"
-}).reset_index()
-
-# Calculate PMPM (Per Member Per Month)
-if "PATIENT" in df.columns:
-    member_months = df.groupby("MONTH")["PATIENT"].nunique().reset_index(name="UNIQUE_PATIENTS")
-    monthly = monthly.merge(member_months, on="MONTH", how="left")
-    monthly["PMPM"] = monthly["TOTAL_CLAIM_COST"] / monthly["UNIQUE_PATIENTS"]
-
-# ----------------------------
-# KPIs
-# ----------------------------
-col1, col2, col3 = st.columns(3)
-col1.metric("💵 Total Cost", f"${df['TOTAL_CLAIM_COST'].sum():,.0f}")
-col2.metric("📆 Months in Data", f"{monthly.shape[0]}")
-col3.metric("👥 Avg PMPM", f"${monthly['PMPM'].mean():,.0f}" if "PMPM" in monthly.columns else "N/A")
-
-st.markdown("---")
-
-# ----------------------------
-# CHART 1: MONTHLY CLAIM COST
-# ----------------------------
-st.subheader("📈 Monthly Total Claim Cost Trend")
-fig1 = px.line(
-    monthly,
-    x="MONTH",
-    y="TOTAL_CLAIM_COST",
-    title="Total Claim Cost by Month",
-    markers=True,
-    color_discrete_sequence=["#1565C0"]
-)
-st.plotly_chart(fig1, use_container_width=True)
-
-# ----------------------------
-# CHART 2: DISEASE SHARE
-# ----------------------------
-st.subheader("🏥 Diabetes vs Dialysis — Monthly Trends")
-fig2 = px.bar(
-    monthly,
-    x="MONTH",
-    y=["IsDiabetes", "IsDialysis"],
-    barmode="group",
-    title="Chronic Condition Counts per Month"
-)
-st.plotly_chart(fig2, use_container_width=True)
-
-# ----------------------------
-# CHART 3: PMPM TREND
-# ----------------------------
-if "PMPM" in monthly.columns:
-    st.subheader("📊 PMPM Trend (Per Member Per Month)")
-    fig3 = px.line(
+from star_schema import load_star
+import precompute
+import fast_forecast
+from lazy_imports import lazy_module
+from instrumentation import finish_run, span, start_run
+from result_cache import cached_page_result
+
+px = lazy_module("plotly.express")
+start_run("3_Monthly_Overview")
+try:
+    # ----------------------------
+    # PAGE TITLE
+    # ----------------------------
+    st.title("💰 Monthly Financial Overview")
+
+    # ----------------------------
+    # LOAD DATA
+    # ----------------------------
+    # Encounter facts with the patient, payer and condition columns this page uses
+    df = load_star().claims(["PATIENT", "PAYER", "ORGANIZATION", "IsDiabetes", "IsDialysis"])
+
+    # ENCOUNTER_DATE is validated and typed by the ETL (see validation)
+    with span("date columns", rows=len(df)):
+        df["DATE"] = df["ENCOUNTER_DATE"]
+
+        # Extract month
+        df["MONTH"] = df["DATE"].dt.to_period("M").astype(str)
+
+    # ----------------------------
+    # MONTHLY SUMMARY
+    # ----------------------------
+    # Includes PMPM (Per Member Per Month); warmed in the background after the ETL
+    monthly = precompute.cached_result("monthly_summary", df)
+
+    # ----------------------------
+    # KPIs
+    # ----------------------------
+    col1, col2, col3 = st.columns(3)
+    col1.metric("💵 Total Cost", f"${df['TOTAL_CLAIM_COST'].sum():,.0f}")
+    col2.metric("📆 Months in Data", f"{monthly.shape[0]}")
+    col3.metric("👥 Avg PMPM", f"${monthly['PMPM'].mean():,.0f}" if "PMPM" in monthly.columns else "N/A")
+
+    st.markdown("---")
+
+    # ----------------------------
+    # CHART 1: MONTHLY CLAIM COST
+    # ----------------------------
+    st.subheader("📈 Monthly Total Claim Cost Trend")
+    fig1 = px.line(
         monthly,
         x="MONTH",
-        y="PMPM",
-        title="PMPM Trend by Month",
+        y="TOTAL_CLAIM_COST",
+        title="Total Claim Cost by Month",
         markers=True,
-        color_discrete_sequence=["#2E8B57"]
+        color_discrete_sequence=["#1565C0"]
     )
-    st.plotly_chart(fig3, use_container_width=True)
-
-# ----------------------------
-# TABLE
-# ----------------------------
-st.markdown("### 📋 Monthly Summary Table")
-st.dataframe(monthly.tail(10))
-
-# ----------------------------
-# 🔮 PAYER-LEVEL FORECASTS (2025–2030)
-# ----------------------------
-st.markdown("---")
-st.subheader("🏦 Forecast by Payer (2025–2030)")
-
-if "PAYER" in df.columns:
-    payers = df["PAYER"].dropna().unique().tolist()
-    selected_payer = st.selectbox("Select a Payer to Forecast:", payers)
-
-    # Filter data for that payer
-    payer_df = df[df["PAYER"] == selected_payer].copy()
-    payer_df["MONTH"] = pd.to_datetime(payer_df["DATE"], errors="coerce").dt.to_period("M").astype(str)
-    payer_monthly = payer_df.groupby("MONTH")["TOTAL_CLAIM_COST"].sum().reset_index()
-
-    if payer_monthly.shape[0] >= 6:
-        # Prepare data for Prophet
-        payer_forecast_data = payer_monthly.rename(columns={"MONTH": "ds", "TOTAL_CLAIM_COST": "y"})
-        payer_forecast_data["ds"] = pd.to_datetime(payer_forecast_data["ds"])
-
-        # Train the model
-        payer_model = Prophet(yearly_seasonality=True, daily_seasonality=False)
-        payer_model.fit(payer_forecast_data)
-
-        # Create future dates
-        future_payer = payer_model.make_future_dataframe(periods=60, freq="M")
-
-        # Predict
-        payer_forecast = payer_model.predict(future_payer)
-
-        # Plot forecast
-        fig_payer = px.line(
-            payer_forecast,
-            x="ds",
-            y="yhat",
-            title=f"Projected Claim Cost for {selected_payer} (2025–2030)",
-            color_discrete_sequence=["#1565C0"]
+    st.plotly_chart(fig1, use_container_width=True)
+
+    # ----------------------------
+    # CHART 2: DISEASE SHARE
+    # ----------------------------
+    st.subheader("🏥 Diabetes vs Dialysis — Monthly Trends")
+    fig2 = px.bar(
+        monthly,
+        x="MONTH",
+        y=["IsDiabetes", "IsDialysis"],
+        barmode="group",
+        title="Chronic Condition Counts per Month"
+    )
+    st.plotly_chart(fig2, use_container_width=True)
+
+    # ----------------------------
+    # CHART 3: PMPM TREND
+    # ----------------------------
+    if "PMPM" in monthly.columns:
+        st.subheader("📊 PMPM Trend (Per Member Per Month)")
+        fig3 = px.line(
+            monthly,
+            x="MONTH",
+            y="PMPM",
+            title="PMPM Trend by Month",
+            markers=True,
+            color_discrete_sequence=["#2E8B57"]
+        )
+        st.plotly_chart(fig3, use_container_width=True)
+
+    # ----------------------------
+    # TABLE
+    # ----------------------------
+    st.markdown("### 📋 Monthly Summary Table")
+    st.dataframe(monthly.tail(10))
+
+    # ----------------------------
+    # 🔮 PAYER-LEVEL FORECASTS (2025–2030)
+    # ----------------------------
+    st.markdown("---")
+    st.subheader("🏦 Forecast by Payer (2025–2030)")
+
+    if "PAYER" in df.columns:
+        payers = df["PAYER"].dropna().unique().tolist()
+        selected_payer = st.selectbox("Select a Payer to Forecast:", payers)
+        forecast_model = st.radio(
+            "Forecast model:", ["Prophet", "Fast (Fourier regression)"], horizontal=True
         )
-        st.plotly_chart(fig_payer, use_container_width=True)
 
-        # Show last few predictions
-        st.markdown(f"### 📋 Forecast Summary for {selected_payer}")
-        st.dataframe(payer_forecast[["ds", "yhat", "yhat_lower", "yhat_upper"]].tail(12))
+        # Forecast, figure and table are built once per (payer, model) and shared
+        # across sessions (see result_cache)
+        def build_payer_view(payer, model):
+            caption, holdout_ready = None, False
+            if model == "Prophet":
+                # Reuse the background forecast when it is ready, otherwise fit Prophet now
+                payer_forecast = (precompute.get_result("payer_forecasts") or {}).get(payer)
+                if payer_forecast is None:
+                    payer_monthly = precompute.payer_monthly_costs(df, payer, df["MONTH"])
+                    payer_forecast = precompute.payer_forecast(payer_monthly)
+            else:
+                # Every payer is fitted in one batched least-squares solve
+                with span("model fit: fast payer forecasts"):
+                    payer_table = fast_forecast.monthly_matrix(df, "PAYER", df["DATE"].dt.to_period("M"))
+                    all_forecasts, fit_seconds = fast_forecast.forecast_all(payer_table, periods=60)
+                caption = f"⚡ Forecast {payer_table.shape[1]} payers at once in {fit_seconds * 1000:,.1f} ms"
+
+                payer_forecast = None
+                if payer in payer_table.columns and (payer_table[payer] != 0).sum() >= 6:
+                    payer_forecast = all_forecasts[all_forecasts["SERIES"] == payer]
+                    holdout_ready = len(payer_table) >= 12
+
+            fig_payer = None
+            if payer_forecast is not None:
+                fig_payer = px.line(
+                    payer_forecast,
+                    x="ds",
+                    y="yhat",
+                    title=f"Projected Claim Cost for {payer} (2025–2030)",
+                    color_discrete_sequence=["#1565C0"]
+                )
+            return {
+                "forecast": payer_forecast,
+                "caption": caption,
+                "holdout_ready": holdout_ready,
+                "fig": fig_payer,
+            }
+
+        def build_holdout_accuracy(payer):
+            with span("model fit: holdout comparison"):
+                payer_table = fast_forecast.monthly_matrix(df, "PAYER", df["DATE"].dt.to_period("M"))
+                return fast_forecast.holdout_accuracy(payer_table[payer])
+
+        def build_organization_forecasts():
+            with span("model fit: fast organization forecasts"):
+                org_table = fast_forecast.monthly_matrix(df, "ORGANIZATION", df["DATE"].dt.to_period("M"))
+                org_forecast = fast_forecast.forecast_matrix(org_table, periods=12)
+            org_next_year = (
+                org_forecast.sum()
+                .rename("FORECAST_12M_COST")
+                .rename_axis("ORGANIZATION")
+                .reset_index()
+                .sort_values("FORECAST_12M_COST", ascending=False)
+            )
+            return org_table.shape[1], org_next_year.head(20)
+
+        view = cached_page_result(
+            "3_Monthly_Overview", (selected_payer, forecast_model), build_payer_view, selected_payer, forecast_model
+        )
+        payer_forecast = view["forecast"]
+        if view["caption"]:
+            st.caption(view["caption"])
+
+        if view["holdout_ready"] and st.checkbox("📏 Compare accuracy with Prophet (last 6 months held out)"):
+            st.dataframe(cached_page_result(
+                "3_Monthly_Overview", (selected_payer, "holdout"), build_holdout_accuracy, selected_payer
+            ))
+
+        if payer_forecast is not None:
+            # Plot forecast
+            st.plotly_chart(view["fig"], use_container_width=True)
+
+            # Show last few predictions
+            st.markdown(f"### 📋 Forecast Summary for {selected_payer}")
+            st.dataframe(payer_forecast[["ds", "yhat", "yhat_lower", "yhat_upper"]].tail(12))
+        else:
+            st.warning(f"⚠️ Not enough data to forecast for {selected_payer} (needs ≥ 6 months of data).")
+
+        if forecast_model != "Prophet" and "ORGANIZATION" in df.columns:
+            with st.expander("🏢 Fast forecast for every organization (next 12 months)"):
+                n_organizations, org_next_year = cached_page_result(
+                    "3_Monthly_Overview", ("organizations",), build_organization_forecasts
+                )
+                st.caption(f"⚡ {n_organizations:,} organization series fitted in one batch")
+                st.dataframe(org_next_year)
     else:
-        st.warning(f"⚠️ Not enough data to forecast for {selected_payer} (needs ≥ 6 months of data).")
-else:
-    st.warning("⚠️ No 'PAYER' column found in your dataset. Please include payer information in cleaned_claims_full.csv.")
+        st.warning("⚠️ No 'PAYER' column found in your dataset. Please include payer information in cleaned_claims_full.csv.")
+finally:
+    finish_run()
@@ -1,213 +1,247 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import plotly.express as px
-import joblib
 import os
-from sklearn.ensemble import RandomForestRegressor
-
-# ----------------------------------------------------
-# PAGE TITLE
-# ----------------------------------------------------
-st.title("🔮 Predictive Insights — ML Forecasting & Risk Analytics")
-
-st.markdown("""
-This page provides:
-- Random Forest–based cost prediction  
-- Payer analytics  
-- Diabetes & dialysis comparisons  
-- Fraud & anomaly detection  
-- High-risk patient identification  
-- PMPM dashboard  
-- Future forecasting  
-""")
-
-# ----------------------------------------------------
-# LOAD FINAL MERGED DATA
-# ----------------------------------------------------
-data_path = "data/final_merged.csv"
-
-if not os.path.exists(data_path):
-    st.error("❌ final_merged.csv not found! Please place it in /data/")
-    st.stop()
-
-df = pd.read_csv(data_path)
-
-# Convert date
-df["ENCOUNTER_DATE"] = pd.to_datetime(df["ENCOUNTER_DATE"], errors="coerce")
-df["YEAR"] = df["ENCOUNTER_DATE"].dt.year
-df["MONTH"] = df["ENCOUNTER_DATE"].dt.to_period("M").astype(str)
-
-# ----------------------------------------------------
-# LOAD MODEL
-# ----------------------------------------------------
-model_path = "models/cost_rf_model.pkl"
-
-st.subheader("📌 Predict Using Trained Random Forest Model")
-
-if not os.path.exists(model_path):
-    st.error("❌ Trained model not found.")
-else:
-    model = joblib.load(model_path)
-    st.success("✅ Random Forest model loaded successfully.")
-
-# Upload for prediction
-uploaded = st.file_uploader(
-    "Upload CSV matching model features (AGE, IsDiabetes, IsDialysis)",
-    type=["csv"]
-)
-
-if uploaded:
-    new = pd.read_csv(uploaded)
-    st.write("### Preview of Uploaded File:")
-    st.dataframe(new.head())
-
-    required = list(model.feature_names_in_)
-    missing = [c for c in required if c not in new.columns]
-
-    if missing:
-        st.error(f"❌ Missing columns: {missing}")
+from claims_store import dataset_version, load_claims
+from star_schema import load_star
+from lazy_imports import lazy_module
+from model_registry import load_model, model_info
+from precompute import get_result
+from anomaly_model import ANOMALY_SHARE, attach_scores, flag_threshold
+from instrumentation import finish_run, span, start_run
+
+px = lazy_module("plotly.express")
+start_run("4_Predictive_Insights")
+try:
+    # ----------------------------------------------------
+    # PAGE TITLE
+    # ----------------------------------------------------
+    st.title("🔮 Predictive Insights — ML Forecasting & Risk Analytics")
+
+    st.markdown("""
+    This page provides:
+    - Random Forest–based cost prediction  
+    - Payer analytics  
+    - Diabetes & dialysis comparisons  
+    - Fraud & anomaly detection  
+    - High-risk patient identification  
+    - PMPM dashboard  
+    - Future forecasting  
+    """)
+
+    # ----------------------------------------------------
+    # LOAD FINAL MERGED DATA
+    # ----------------------------------------------------
+    data_path = "data/final_merged.csv"
+
+    if not os.path.exists(data_path):
+        st.error("❌ final_merged.csv not found! Please place it in /data/")
         st.stop()
 
-    preds = model.predict(new[required])
-    new["Predicted_Cost"] = preds
-
-    st.success("🎉 Prediction Completed!")
-    st.dataframe(new)
-
-    fig_pred = px.histogram(new, x="Predicted_Cost", nbins=50,
-                            title="Predicted Claim Cost Distribution")
-    st.plotly_chart(fig_pred, use_container_width=True)
-
-# ----------------------------------------------------
-# ADVANCED ANALYTICS TABS
-# ----------------------------------------------------
-st.markdown("---")
-tabs = st.tabs([
-    "🏦 Payer Analytics",
-    "🩺 Diabetes & Dialysis",
-    "🚨 Fraud Detection",
-    "⚠️ High Risk Patients",
-    "💵 PMPM Dashboard",
-    "📈 Forecasting"
-])
-
-# ----------------------------------------------------
-# TAB 1 — PAYER ANALYTICS
-# ----------------------------------------------------
-with tabs[0]:
-    st.header("🏦 Payer Analytics")
-
-    if "PAYER" not in df.columns:
-        st.warning("Missing PAYER column in final_merged.csv")
+    df = load_claims(data_path)
+
+    # Convert date
+    df["ENCOUNTER_DATE"] = pd.to_datetime(df["ENCOUNTER_DATE"], errors="coerce")
+    df["YEAR"] = df["ENCOUNTER_DATE"].dt.year
+    df["MONTH"] = df["ENCOUNTER_DATE"].dt.to_period("M").astype(str)
+
+    # ----------------------------------------------------
+    # LOAD MODEL
+    # ----------------------------------------------------
+    st.subheader("📌 Predict Using Trained Random Forest Model")
+
+    model_entry = model_info("cost_rf")
+    if model_entry is None:
+        st.error("❌ Trained model not found.")
     else:
-        payer_cost = df.groupby("PAYER")["TOTAL_CLAIM_COST"].sum().reset_index()
+        # Loaded once per process and shared by every session (see model_registry)
+        with span("model load: cost RF"):
+            model = load_model("cost_rf")
+        st.success(f"✅ Random Forest model v{model_entry['version']} loaded successfully.")
+
+    # Upload for prediction
+    uploaded = st.file_uploader(
+        "Upload CSV matching model features (AGE, IsDiabetes, IsDialysis)",
+        type=["csv"]
+    )
 
-        fig = px.bar(payer_cost, x="PAYER", y="TOTAL_CLAIM_COST",
-                     title="Total Claim Cost by Payer")
+    if uploaded:
+        new = pd.read_csv(uploaded)
+        st.write("### Preview of Uploaded File:")
+        st.dataframe(new.head())
+
+        required = list(model.feature_names_in_)
+        missing = [c for c in required if c not in new.columns]
+
+        if missing:
+            st.error(f"❌ Missing columns: {missing}")
+            st.stop()
+
+        preds = model.predict(new[required])
+        new["Predicted_Cost"] = preds
+
+        st.success("🎉 Prediction Completed!")
+        st.dataframe(new)
+
+        fig_pred = px.histogram(new, x="Predicted_Cost", nbins=50,
+                                title="Predicted Claim Cost Distribution")
+        st.plotly_chart(fig_pred, use_container_width=True)
+
+    # ----------------------------------------------------
+    # ADVANCED ANALYTICS TABS
+    # ----------------------------------------------------
+    st.markdown("---")
+    tabs = st.tabs([
+        "🏦 Payer Analytics",
+        "🩺 Diabetes & Dialysis",
+        "🚨 Fraud Detection",
+        "⚠️ High Risk Patients",
+        "💵 PMPM Dashboard",
+        "📈 Forecasting"
+    ])
+
+    # ----------------------------------------------------
+    # TAB 1 — PAYER ANALYTICS
+    # ----------------------------------------------------
+    with tabs[0]:
+        st.header("🏦 Payer Analytics")
+
+        if "PAYER" not in df.columns:
+            st.warning("Missing PAYER column in final_merged.csv")
+        else:
+            payer_cost = df.groupby("PAYER", observed=True)["TOTAL_CLAIM_COST"].sum().reset_index()
+
+            fig = px.bar(payer_cost, x="PAYER", y="TOTAL_CLAIM_COST",
+                         title="Total Claim Cost by Payer")
+            st.plotly_chart(fig, use_container_width=True)
+
+    # ----------------------------------------------------
+    # TAB 2 — DIABETES & DIALYSIS
+    # ----------------------------------------------------
+    with tabs[1]:
+        st.header("🩺 Diabetes & Dialysis Analysis")
+
+        col1, col2 = st.columns(2)
+        col1.metric("Diabetes Patients", df[df["IsDiabetes"] == 1]["PATIENT_ID"].nunique())
+        col2.metric("Dialysis Patients", df[df["IsDialysis"] == 1]["PATIENT_ID"].nunique())
+
+        cost = pd.DataFrame({
+            "Condition": ["Diabetes", "Dialysis"],
+            "Cost": [
+                df[df["IsDiabetes"] == 1]["TOTAL_CLAIM_COST"].sum(),
+                df[df["IsDialysis"] == 1]["TOTAL_CLAIM_COST"].sum(),
+            ]
+        })
+
+        fig = px.bar(cost, x="Condition", y="Cost", title="Cost Comparison")
         st.plotly_chart(fig, use_container_width=True)
 
-# ----------------------------------------------------
-# TAB 2 — DIABETES & DIALYSIS
-# ----------------------------------------------------
-with tabs[1]:
-    st.header("🩺 Diabetes & Dialysis Analysis")
-
-    col1, col2 = st.columns(2)
-    col1.metric("Diabetes Patients", df[df["IsDiabetes"] == 1]["PATIENT_ID"].nunique())
-    col2.metric("Dialysis Patients", df[df["IsDialysis"] == 1]["PATIENT_ID"].nunique())
-
-    cost = pd.DataFrame({
-        "Condition": ["Diabetes", "Dialysis"],
-        "Cost": [
-            df[df["IsDiabetes"] == 1]["TOTAL_CLAIM_COST"].sum(),
-            df[df["IsDialysis"] == 1]["TOTAL_CLAIM_COST"].sum(),
-        ]
-    })
-
-    fig = px.bar(cost, x="Condition", y="Cost", title="Cost Comparison")
-    st.plotly_chart(fig, use_container_width=True)
-
-# ----------------------------------------------------
-# TAB 3 — FRAUD DETECTION
-# ----------------------------------------------------
-with tabs[2]:
-    st.header("🚨 Fraud & Anomaly Detection")
-
-    df["Z"] = (df["TOTAL_CLAIM_COST"] - df["TOTAL_CLAIM_COST"].mean()) / df["TOTAL_CLAIM_COST"].std()
-    outliers = df[df["Z"].abs() > 3]
-
-    fig = px.scatter(df, x="PATIENT_ID", y="TOTAL_CLAIM_COST",
-                     color=df["Z"].abs() > 3,
-                     title="Outlier Detection (Z > 3)")
-    st.plotly_chart(fig, use_container_width=True)
-
-    st.subheader("Outlier Claims")
-    st.dataframe(outliers)
-
-# ----------------------------------------------------
-# TAB 4 — HIGH RISK PATIENTS
-# ----------------------------------------------------
-with tabs[3]:
-    st.header("⚠️ High Risk Patients")
-
-    df["RiskScore"] = (
-        df["TOTAL_CLAIM_COST"].rank(pct=True)
-        + df["IsDiabetes"] * 0.6
-        + df["IsDialysis"] * 0.8
-        + (df["AGE"] / df["AGE"].max())
-    )
+    # ----------------------------------------------------
+    # TAB 3 — FRAUD DETECTION
+    # ----------------------------------------------------
+    with tabs[2]:
+        st.header("🚨 Fraud & Anomaly Detection")
+
+        df["Z"] = (df["TOTAL_CLAIM_COST"] - df["TOTAL_CLAIM_COST"].mean()) / df["TOTAL_CLAIM_COST"].std()
+        outliers = df[df["Z"].abs() > 3]
 
-    top = df.sort_values("RiskScore", ascending=False).head(25)
-    st.dataframe(top)
+        fig = px.scatter(df, x="PATIENT_ID", y="TOTAL_CLAIM_COST",
+                         color=df["Z"].abs() > 3,
+                         title="Outlier Detection (Z > 3)")
+        st.plotly_chart(fig, use_container_width=True)
+
+        st.subheader("Outlier Claims")
+        st.dataframe(outliers)
+
+        # Multivariate Isolation Forest scores (see anomaly_model)
+        st.subheader("Multivariate Anomalies (Isolation Forest)")
+        # Scores are stored by the background precompute for the cleaned claims;
+        # they are matched to these rows by patient and encounter time
+        scores = get_result("anomaly_scores")
+        if scores is None or not {"ENCOUNTER_DATE"} <= set(df.columns) or not {"PATIENT", "PATIENT_ID"} & set(df.columns):
+            st.info("ℹ️ Anomaly scores are not available yet — they are computed by the background precompute.")
+        else:
+            with span("join anomaly scores", rows=len(df)):
+                scored = attach_scores(df, load_star().claims(["PATIENT"]), scores)
+            anomalies = scored[scored["ANOMALY_SCORE"] > flag_threshold(scores)]
+            st.caption(f"Top {ANOMALY_SHARE:.0%} of claims by anomaly score over cost, coverage, encounter type, "
+                       f"organization, payer and patient history — {len(anomalies):,} claims.")
+            st.dataframe(anomalies.sort_values("ANOMALY_SCORE", ascending=False))
+
+    # ----------------------------------------------------
+    # TAB 4 — HIGH RISK PATIENTS
+    # ----------------------------------------------------
+    with tabs[3]:
+        st.header("⚠️ High Risk Patients")
+
+        df["RiskScore"] = (
+            df["TOTAL_CLAIM_COST"].rank(pct=True)
+            + df["IsDiabetes"] * 0.6
+            + df["IsDialysis"] * 0.8
+            + (df["AGE"] / df["AGE"].max())
+        )
+
+        top = df.sort_values("RiskScore", ascending=False).head(25)
+        st.dataframe(top)
+
+        fig = px.bar(top, x="PATIENT_ID", y="RiskScore",
+                     title="Top 25 High-Risk Patients")
+        st.plotly_chart(fig, use_container_width=True)
 
-    fig = px.bar(top, x="PATIENT_ID", y="RiskScore",
-                 title="Top 25 High-Risk Patients")
-    st.plotly_chart(fig, use_container_width=True)
+    # ----------------------------------------------------
+    # TAB 5 — PMPM DASHBOARD
+    # ----------------------------------------------------
+    with tabs[4]:
+        st.header("💵 PMPM Dashboard")
 
-# ----------------------------------------------------
-# TAB 5 — PMPM DASHBOARD
-# ----------------------------------------------------
-with tabs[4]:
-    st.header("💵 PMPM Dashboard")
+        members = df.groupby("MONTH")["PATIENT_ID"].nunique().reset_index()
+        members.columns = ["MONTH", "Members"]
 
-    members = df.groupby("MONTH")["PATIENT_ID"].nunique().reset_index()
-    members.columns = ["MONTH", "Members"]
+        monthly_cost = df.groupby("MONTH")["TOTAL_CLAIM_COST"].sum().reset_index()
 
-    monthly_cost = df.groupby("MONTH")["TOTAL_CLAIM_COST"].sum().reset_index()
+        pmpm = monthly_cost.merge(members, on="MONTH")
+        pmpm["PMPM"] = pmpm["TOTAL_CLAIM_COST"] / pmpm["Members"]
 
-    pmpm = monthly_cost.merge(members, on="MONTH")
-    pmpm["PMPM"] = pmpm["TOTAL_CLAIM_COST"] / pmpm["Members"]
+        fig = px.line(pmpm, x="MONTH", y="PMPM", title="Per Member Per Month (PMPM)")
+        st.plotly_chart(fig, use_container_width=True)
+        st.dataframe(pmpm)
+
+    # ----------------------------------------------------
+    # TAB 6 — FORECASTING
+    # ----------------------------------------------------
+    with tabs[5]:
+        st.header("📈 12-Month Forecasting")
 
-    fig = px.line(pmpm, x="MONTH", y="PMPM", title="Per Member Per Month (PMPM)")
-    st.plotly_chart(fig, use_container_width=True)
-    st.dataframe(pmpm)
+        monthly = df.groupby("MONTH")["TOTAL_CLAIM_COST"].sum().reset_index()
+        monthly["i"] = np.arange(len(monthly))
 
-# ----------------------------------------------------
-# TAB 6 — FORECASTING
-# ----------------------------------------------------
-with tabs[5]:
-    st.header("📈 12-Month Forecasting")
+        X = monthly[["i"]]
+        y = monthly["TOTAL_CLAIM_COST"]
 
-    monthly = df.groupby("MONTH")["TOTAL_CLAIM_COST"].sum().reset_index()
-    monthly["i"] = np.arange(len(monthly))
+        @st.cache_resource(show_spinner="Fitting forecast model...", max_entries=1)
+        def monthly_rf(version, _X, _y):
+            # version is the cache key: one fit per dataset version, shared by every
+            # session and rerun; sessions arriving during the fit wait for it
+            from sklearn.ensemble import RandomForestRegressor
 
-    X = monthly[["i"]]
-    y = monthly["TOTAL_CLAIM_COST"]
+            return RandomForestRegressor(n_estimators=200).fit(_X, _y)
 
-    rf = RandomForestRegressor(n_estimators=200)
-    rf.fit(X, y)
+        with span("model fit: monthly RF", rows=len(X)):
+            rf = monthly_rf(dataset_version(data_path), X, y)
 
-    future_i = np.arange(len(monthly), len(monthly) + 12)
-    future_pred = rf.predict(future_i.reshape(-1, 1))
+        future_i = np.arange(len(monthly), len(monthly) + 12)
+        with span("model predict: monthly RF", rows=len(future_i)):
+            future_pred = rf.predict(future_i.reshape(-1, 1))
 
-    forecast = pd.DataFrame({
-        "MONTH_IDX": future_i,
-        "Forecasted_Cost": future_pred
-    })
+        forecast = pd.DataFrame({
+            "MONTH_IDX": future_i,
+            "Forecasted_Cost": future_pred
+        })
 
-    st.dataframe(forecast)
+        st.dataframe(forecast)
 
-    fig = px.line(forecast, x="MONTH_IDX", y="Forecasted_Cost",
-                  title="12-Month Forecast")
-    st.plotly_chart(fig, use_container_width=True)
+        fig = px.line(forecast, x="MONTH_IDX", y="Forecasted_Cost",
+                      title="12-Month Forecast")
+        st.plotly_chart(fig, use_container_width=True)
+finally:
+    finish_run()
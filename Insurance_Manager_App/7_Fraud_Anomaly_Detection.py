@@ -1,42 +1,118 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
 import numpy as np
-import os
+from claims_store import claims_available
+from star_schema import load_star
+from precompute import cached_result, get_result
+from anomaly_model import ANOMALY_SHARE, flag_threshold
+from lazy_imports import lazy_module
+from instrumentation import finish_run, start_run
 
-st.title("🚨 Fraud & Anomaly Detection")
+px = lazy_module("plotly.express")
+start_run("7_Fraud_Anomaly_Detection")
+try:
+    st.title("🚨 Fraud & Anomaly Detection")
 
-data_path = "data/cleaned_claims_full.csv"
-if not os.path.exists(data_path):
-    st.error("❌ Data file missing.")
-    st.stop()
+    data_path = "data/cleaned_claims_full.csv"
+    if not claims_available(data_path):
+        st.error("❌ Data file missing.")
+        st.stop()
 
-df = pd.read_csv(data_path)
+    # Encounter facts with the patient, organization and payer columns; the
+    # remaining claim columns are only joined onto the rows shown in tables
+    star = load_star(data_path)
+    df = star.claims(["PATIENT", "ORGANIZATION", "PAYER", "PAYER_NAME"])
 
-# Z-score anomaly detection
-st.header("1️⃣ High Claim Cost Outliers (Z-Score)")
+    # Z-score anomaly detection
+    st.header("1️⃣ High Claim Cost Outliers (Z-Score)")
 
-df["Z_SCORE"] = (df["TOTAL_CLAIM_COST"] - df["TOTAL_CLAIM_COST"].mean()) / df["TOTAL_CLAIM_COST"].std()
-outliers = df[df["Z_SCORE"].abs() > 3]
+    df["Z_SCORE"] = cached_result("cost_zscores", df, data_path)
+    outliers = df[df["Z_SCORE"].abs() > 3]
 
-fig = px.scatter(df, x="PATIENT", y="TOTAL_CLAIM_COST",
-                 color=df["Z_SCORE"].abs() > 3,
-                 title="Cost Outliers (Z-Score > 3)")
-st.plotly_chart(fig, use_container_width=True)
+    fig = px.scatter(df, x="PATIENT", y="TOTAL_CLAIM_COST",
+                     color=df["Z_SCORE"].abs() > 3,
+                     title="Cost Outliers (Z-Score > 3)")
+    st.plotly_chart(fig, use_container_width=True)
 
-st.subheader("Outlier Claims")
-st.dataframe(outliers)
+    st.subheader("Outlier Claims")
+    st.dataframe(star.rows(outliers))
 
-# Duplicate claims
-st.header("2️⃣ Duplicate Claims Detection")
+    # Duplicate claims
+    st.header("2️⃣ Duplicate Claims Detection")
 
-duplicates = df[df.duplicated(subset=["PATIENT","ENCOUNTER_DATE","TOTAL_CLAIM_COST"], keep=False)]
-st.dataframe(duplicates)
+    duplicates = df[df.duplicated(subset=["PATIENT","ENCOUNTER_DATE","TOTAL_CLAIM_COST"], keep=False)]
+    st.dataframe(star.rows(duplicates))
 
-# Suspicious payer behaviour
-st.header("3️⃣ Suspicious Payer Behaviour")
+    # Suspicious payer behaviour
+    st.header("3️⃣ Suspicious Payer Behaviour")
 
-payer_avg = df.groupby("PAYER")["TOTAL_CLAIM_COST"].mean().reset_index()
-fig2 = px.bar(payer_avg, x="PAYER", y="TOTAL_CLAIM_COST",
-              title="Average Claim Cost Per Payer (Unusual Spikes Detected)")
-st.plotly_chart(fig2, use_container_width=True)
+    payer_avg = df.groupby("PAYER", observed=True)["TOTAL_CLAIM_COST"].mean().reset_index()
+    fig2 = px.bar(payer_avg, x="PAYER", y="TOTAL_CLAIM_COST",
+                  title="Average Claim Cost Per Payer (Unusual Spikes Detected)")
+    st.plotly_chart(fig2, use_container_width=True)
+
+    # Patient–organization–payer graph patterns (see fraud_graph)
+    st.header("4️⃣ Provider Network Patterns")
+    st.markdown("""
+    Organizations sharing far more patients than chance would explain, clusters of such
+    organizations (possible referral rings) and patients hopping between many organizations.
+    """)
+
+    graph = cached_result("fraud_graph", df, data_path)
+    summary = graph["summary"]
+
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("🔗 Graph Edges", f"{summary['edges']:,}")
+    col2.metric("🤝 Unusual Org Pairs", f"{summary['unusual_pairs']:,}")
+    col3.metric("🕸️ Provider Clusters", f"{summary['clusters']:,}")
+    col4.metric("🦘 Hopping Patients", f"{summary['hoppers']:,}")
+
+    st.subheader("Organizations Sharing Unusually Many Patients")
+    st.caption("LIFT = shared patients ÷ the overlap expected for two organizations of their size.")
+    if graph["pairs"].empty:
+        st.info("No organization pair shares unusually many patients.")
+    else:
+        st.dataframe(graph["pairs"], hide_index=True)
+
+    st.subheader("Provider Clusters")
+    if graph["clusters"].empty:
+        st.info("No clusters of strongly overlapping organizations found.")
+    else:
+        st.caption("A high TOP_PAYER_SHARE means the cluster bills mostly one payer.")
+        st.dataframe(graph["clusters"], hide_index=True)
+
+    st.subheader("Patient Hopping")
+    hops = graph["orgs_per_patient"].rename_axis("Organizations").reset_index(name="Patients")
+    fig3 = px.bar(hops, x="Organizations", y="Patients", title="Distinct Organizations Visited per Patient")
+    fig3.add_vline(x=summary["hopper_threshold"], line_dash="dash", line_color="red")
+    st.plotly_chart(fig3, use_container_width=True)
+    st.dataframe(graph["hoppers"], hide_index=True)
+
+    # Multivariate anomaly scores, computed by the background precompute
+    st.header("5️⃣ Multivariate Anomalies (Isolation Forest)")
+    st.markdown("""
+    Scores every claim on cost, coverage ratio, encounter type, organization, payer and the
+    patient's claim history together — a claim can be unusual without an extreme cost.
+    """)
+
+    # Training and scoring never run inside a page request
+    scores = get_result("anomaly_scores", data_path)
+    if scores is None:
+        st.info("ℹ️ Anomaly scores are not available yet — they are computed by the background precompute.")
+    else:
+        df["ANOMALY_SCORE"] = scores
+        threshold = flag_threshold(df["ANOMALY_SCORE"])
+        df["IS_ANOMALY"] = df["ANOMALY_SCORE"] > threshold
+
+        col1, col2 = st.columns(2)
+        col1.metric("🚩 Flagged Claims", f"{int(df['IS_ANOMALY'].sum()):,}", help=f"Top {ANOMALY_SHARE:.0%} of anomaly scores")
+        col2.metric("📊 Also Z-Score Outliers", f"{int((df['IS_ANOMALY'] & (df['Z_SCORE'].abs() > 3)).sum()):,}")
+
+        fig4 = px.scatter(df, x="TOTAL_CLAIM_COST", y="ANOMALY_SCORE", color="IS_ANOMALY",
+                          hover_data=["PATIENT", "ORGANIZATION", "DESCRIPTION"],
+                          title="Anomaly Score vs Claim Cost")
+        st.plotly_chart(fig4, use_container_width=True)
+
+        st.subheader("Most Anomalous Claims")
+        st.dataframe(star.rows(df.nlargest(50, "ANOMALY_SCORE")))
+finally:
+    finish_run()
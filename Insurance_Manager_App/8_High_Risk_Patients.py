@@ -1,35 +1,90 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import os
-
-st.title("⚠️ High-Risk Patient Identification")
-
-data_path = "data/cleaned_claims_full.csv"
-if not os.path.exists(data_path):
-    st.error("❌ Data file missing.")
-    st.stop()
-
-df = pd.read_csv(data_path)
-
-# Risk Score = Cost + Dialysis + Diabetes + Age
-df["RiskScore"] = (
-    df["TOTAL_CLAIM_COST"].rank(pct=True) +
-    df["IsDiabetes"] * 0.5 +
-    df["IsDialysis"] * 0.8 +
-    (df["AGE"] / df["AGE"].max())
-)
-
-st.header("1️⃣ Top 20 High-Risk Patients")
-top_risk = df.sort_values("RiskScore", ascending=False).head(20)
-st.dataframe(top_risk)
-
-fig = px.bar(top_risk, x="PATIENT", y="RiskScore", color="RiskScore",
-             title="Top High-Risk Patients")
-st.plotly_chart(fig, use_container_width=True)
-
-# Age vs Risk
-st.header("2️⃣ Age vs Risk Scatter")
-fig2 = px.scatter(df, x="AGE", y="RiskScore", color="IsDiabetes",
-                  title="Risk Score by Age")
-st.plotly_chart(fig2, use_container_width=True)
+from claims_store import claims_available
+from star_schema import load_star
+from precompute import cached_result
+from explain import explain
+from model_registry import model_info
+from result_cache import cached_page_result
+from lazy_imports import lazy_module
+from instrumentation import finish_run, span, start_run
+
+px = lazy_module("plotly.express")
+start_run("8_High_Risk_Patients")
+try:
+    st.title("⚠️ High-Risk Patient Identification")
+
+    data_path = "data/cleaned_claims_full.csv"
+    if not claims_available(data_path):
+        st.error("❌ Data file missing.")
+        st.stop()
+
+    # Encounter facts with the risk and model feature columns
+    star = load_star(data_path)
+    df = star.claims(["PATIENT", "AGE", "IsDiabetes", "IsDialysis"])
+
+    # Risk Score = Cost + Dialysis + Diabetes + Age
+    df["RiskScore"] = cached_result("risk_scores", df, data_path)
+
+    st.header("1️⃣ Top 20 High-Risk Patients")
+    top_risk = df.sort_values("RiskScore", ascending=False).head(20)
+    st.dataframe(star.rows(top_risk))
+
+    fig = px.bar(top_risk, x="PATIENT", y="RiskScore", color="RiskScore",
+                 title="Top High-Risk Patients")
+    st.plotly_chart(fig, use_container_width=True)
+
+    # Age vs Risk
+    st.header("2️⃣ Age vs Risk Scatter")
+    fig2 = px.scatter(df, x="AGE", y="RiskScore", color="IsDiabetes",
+                      title="Risk Score by Age")
+    st.plotly_chart(fig2, use_container_width=True)
+
+    # Why are they high risk? — tree-path contributions of the forest models
+    st.header("3️⃣ Why Are They High Risk?")
+    explain_with = st.radio(
+        "Explain with:", ["Risk model (high-risk probability)", "Cost model (predicted claim cost)"], horizontal=True
+    )
+    model_name = "risk_rf" if explain_with.startswith("Risk") else "cost_rf"
+    n_explain = st.slider("Highest-risk claims to explain:", 20, 5000, 1000, step=20)
+    model_entry = model_info(model_name)
+
+
+    def build_explanations(name, n):
+        rows = df.sort_values("RiskScore", ascending=False).head(n)
+        with span("explain: " + name, rows=len(rows)):
+            contrib = explain(name, rows)
+        contrib.insert(0, "RANK", range(1, len(contrib) + 1))
+        contrib.insert(1, "PATIENT", rows["PATIENT"])
+        contrib.insert(2, "RiskScore", rows["RiskScore"])
+        return contrib
+
+
+    if model_entry is None:
+        st.warning(f"Model {model_name} not found in the model registry.")
+    else:
+        contrib = cached_page_result(
+            "8_High_Risk_Patients", (model_name, model_entry["version"], n_explain),
+            build_explanations, model_name, n_explain,
+        )
+        features = model_entry["features"]
+        st.caption(
+            f"{model_name} v{model_entry['version']}: prediction = baseline "
+            f"{contrib['BIAS'].iloc[0]:,.3f} + the contribution of every feature along the trees' decision paths."
+        )
+
+        top = contrib.head(20).assign(LABEL=lambda d: "#" + d["RANK"].astype(str) + " " + d["PATIENT"].astype(str).str[:8])
+        bars = top.melt(id_vars=["LABEL"], value_vars=features, var_name="Feature", value_name="Contribution")
+        fig3 = px.bar(bars, x="Contribution", y="LABEL", color="Feature", orientation="h", barmode="relative",
+                      title="Feature Contributions — Top 20 High-Risk Claims")
+        fig3.update_yaxes(autorange="reversed", title=None)
+        st.plotly_chart(fig3, use_container_width=True)
+
+        drivers = contrib[features].abs().mean().sort_values(ascending=False).reset_index()
+        drivers.columns = ["Feature", "Mean |Contribution|"]
+        fig4 = px.bar(drivers, x="Feature", y="Mean |Contribution|",
+                      title=f"What Drives the Top {len(contrib):,} Claims")
+        st.plotly_chart(fig4, use_container_width=True)
+
+        st.dataframe(contrib)
+finally:
+    finish_run()
@@ -1,38 +1,77 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import os
+from claims_store import claims_available
+from star_schema import load_star
+from precompute import cached_result
+from lazy_imports import lazy_module
+from member_sketch import CONDITIONS, RELATIVE_ERROR
+from enrollment import load_member_months, period_member_months
+from instrumentation import finish_run, start_run
 
-st.title("📅 PMPM (Per Member Per Month) Dashboard")
+px = lazy_module("plotly.express")
+start_run("9_PMPM_Dashboard")
+try:
+    st.title("📅 PMPM (Per Member Per Month) Dashboard")
 
-data_path = "data/cleaned_claims_full.csv"
-if not os.path.exists(data_path):
-    st.error("❌ Data file missing.")
-    st.stop()
+    data_path = "data/cleaned_claims_full.csv"
+    if not claims_available(data_path):
+        st.error("❌ Data file missing.")
+        st.stop()
 
-df = pd.read_csv(data_path)
-df["ENCOUNTER_DATE"] = pd.to_datetime(df["ENCOUNTER_DATE"], errors="coerce")
-df["MONTH"] = df["ENCOUNTER_DATE"].dt.to_period("M").astype(str)
+    df = load_star(data_path).claims(["PATIENT", "PAYER", "IsDiabetes", "IsDialysis"])
 
-# Unique patients per month
-members = df.groupby("MONTH")["PATIENT"].nunique().reset_index()
-members.columns = ["MONTH", "MemberCount"]
+    # Enrolled members (or claimants), claim cost and PMPM per month
+    pmpm = cached_result("pmpm", df, data_path)
+    enrollment = load_member_months()
 
-# Monthly cost
-monthly_cost = df.groupby("MONTH")["TOTAL_CLAIM_COST"].sum().reset_index()
+    st.header("1️⃣ PMPM Trend")
+    fig = px.line(pmpm, x="MONTH", y="PMPM", title="PMPM Over Time")
+    st.plotly_chart(fig, use_container_width=True)
 
-# PMPM
-pmpm = monthly_cost.merge(members, on="MONTH")
-pmpm["PMPM"] = pmpm["TOTAL_CLAIM_COST"] / pmpm["MemberCount"]
+    st.header("2️⃣ Monthly Member Count")
+    fig2 = px.bar(pmpm, x="MONTH", y=["MemberCount", "Claimants"], barmode="group", title="Members Per Month")
+    st.plotly_chart(fig2, use_container_width=True)
+    if enrollment is None:
+        st.caption("⚠️ No enrollment data — PMPM uses patients with a claim in the month. Re-run the ETL to compute member-months.")
+    else:
+        st.caption("MemberCount = members enrolled on the 1st of the month (payer_transitions); Claimants = patients with a claim.")
 
-st.header("1️⃣ PMPM Trend")
-fig = px.line(pmpm, x="MONTH", y="PMPM", title="PMPM Over Time")
-st.plotly_chart(fig, use_container_width=True)
+    st.header("3️⃣ Total Monthly Claim Cost")
+    fig3 = px.bar(pmpm, x="MONTH", y="TOTAL_CLAIM_COST", title="Total Claim Cost Per Month")
+    st.plotly_chart(fig3, use_container_width=True)
 
-st.header("2️⃣ Monthly Member Count")
-fig2 = px.bar(pmpm, x="MONTH", y="MemberCount", title="Members Per Month")
-st.plotly_chart(fig2, use_container_width=True)
+    # ----------------------------
+    # PMPM OVER ANY RANGE (MERGED SKETCHES)
+    # ----------------------------
+    st.header("4️⃣ PMPM by Quarter, Year or Rolling Window")
 
-st.header("3️⃣ Total Monthly Claim Cost")
-fig3 = px.bar(pmpm, x="MONTH", y="TOTAL_CLAIM_COST", title="Total Claim Cost Per Month")
-st.plotly_chart(fig3, use_container_width=True)
+    sketches = cached_result("member_sketches", df, data_path)
+
+    grains = {"Quarterly": ("Q", None), "Yearly": ("Y", None), "Rolling 3 months": ("M", 3), "Rolling 12 months": ("M", 12)}
+    col1, col2, col3 = st.columns(3)
+    grain = col1.selectbox("Period:", list(grains))
+    condition = col2.selectbox("Members:", list(CONDITIONS))
+    selected_payers = col3.multiselect("Payers (all if empty):", sketches.payers())
+
+    freq, rolling = grains[grain]
+    period_pmpm = sketches.by_period(freq, payers=selected_payers, condition=condition, rolling=rolling)
+    pmpm_columns = ["PMPM"]
+
+    # Enrollment has no condition flags, so enrolled PMPM is only shown for all members
+    if enrollment is not None and condition == "All members" and len(period_pmpm):
+        claim_months = sketches.months()
+        enrolled = period_member_months(enrollment, freq, selected_payers, rolling, claim_months[0], claim_months[-1])
+        period_pmpm["MEMBER_MONTHS"] = period_pmpm["PERIOD"].map(enrolled)
+        period_pmpm["PMPM_ENROLLED"] = period_pmpm["TOTAL_CLAIM_COST"] / period_pmpm["MEMBER_MONTHS"]
+        pmpm_columns.append("PMPM_ENROLLED")
+
+    fig4 = px.line(period_pmpm, x="PERIOD", y=pmpm_columns, markers=True, title=f"{grain} PMPM — {condition}")
+    st.plotly_chart(fig4, use_container_width=True)
+    st.dataframe(period_pmpm)
+    st.caption(
+        f"Distinct members are HyperLogLog estimates merged from monthly sketches "
+        f"(±{RELATIVE_ERROR:.1%} standard error, ±{2 * RELATIVE_ERROR:.1%} for 95% of estimates). "
+        f"PMPM = cost ÷ distinct members in the period ÷ months in the period; "
+        f"PMPM_ENROLLED = cost ÷ enrolled member-months."
+    )
+finally:
+    finish_run()
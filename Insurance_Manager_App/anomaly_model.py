@@ -0,0 +1,182 @@
+"""Multivariate claim anomaly model (Isolation Forest).
+
+Each claim is described by its cost, coverage ratio, how common its
+encounter type, organization and payer are, its cost relative to the typical
+cost of each of those, and the patient's history (prior claims, days since
+the previous claim, cost against the patient's earlier average). The
+category statistics are learned at training time and stored with the
+forest, so scoring only needs the claims.
+
+The model is trained offline by the background precompute and published to
+``model_registry`` as ``claim_anomaly``; it is only retrained when the
+dataset version changes. Scoring splits the claims into chunks scored in a
+process pool, and the scores are stored as a precompute result for the pages.
+
+    python anomaly_model.py     # train (if needed) and score the claims
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import model_registry
+from claims_store import CLAIMS_PATH, dataset_version, read_claims
+
+MODEL_NAME = "claim_anomaly"
+FEATURES = [
+    "LOG_COST", "COVERAGE_RATIO",
+    "DESCRIPTION_SHARE", "ORGANIZATION_SHARE", "PAYER_SHARE",
+    "COST_VS_DESCRIPTION", "COST_VS_ORGANIZATION", "COST_VS_PAYER",
+    "PRIOR_CLAIMS", "DAYS_SINCE_PREVIOUS", "COST_VS_PATIENT_HISTORY", "AGE",
+]
+CATEGORIES = ["DESCRIPTION", "ORGANIZATION", "PAYER"]
+
+N_ESTIMATORS = 200
+CHUNK_ROWS = 100_000
+WORKERS = os.cpu_count() or 1
+# Share of claims flagged as anomalies on the pages.
+ANOMALY_SHARE = 0.01
+# Stand-in for "no previous claim" in DAYS_SINCE_PREVIOUS.
+NO_PREVIOUS_DAYS = 3650
+
+
+class ClaimAnomalyModel:
+    """Isolation Forest plus the category statistics its features need."""
+
+    def __init__(self, n_estimators=N_ESTIMATORS, random_state=0):
+        self.n_estimators = n_estimators
+        self.random_state = random_state
+        self.forest = None
+        self.shares = {}
+        self.median_costs = {}
+        self.global_median = None
+
+    def fit(self, df):
+        from sklearn.ensemble import IsolationForest
+
+        cost = df["TOTAL_CLAIM_COST"].astype("float64")
+        self.global_median = float(cost.median())
+        for column in CATEGORIES:
+            self.shares[column] = df[column].astype(object).value_counts(normalize=True)
+            self.median_costs[column] = cost.groupby(df[column].astype(object)).median()
+
+        self.forest = IsolationForest(
+            n_estimators=self.n_estimators, random_state=self.random_state, n_jobs=-1
+        ).fit(self.features(df))
+        return self
+
+    def features(self, df):
+        """Feature matrix (float32, columns in ``FEATURES`` order) of the claims in ``df``."""
+        cost = df["TOTAL_CLAIM_COST"].to_numpy(dtype="float64")
+        coverage = df["PAYER_COVERAGE"].to_numpy(dtype="float64")
+        out = {
+            "LOG_COST": np.log1p(np.clip(cost, 0, None)),
+            "COVERAGE_RATIO": np.clip(np.divide(coverage, cost, out=np.zeros_like(cost), where=cost > 0), 0, 1.5),
+            "AGE": df["AGE"].to_numpy(dtype="float64"),
+        }
+        for column in CATEGORIES:
+            values = df[column].astype(object)
+            out[f"{column}_SHARE"] = values.map(self.shares[column]).fillna(0).to_numpy(dtype="float64")
+            typical = values.map(self.median_costs[column]).fillna(self.global_median).to_numpy(dtype="float64")
+            out[f"COST_VS_{column}"] = np.log1p(np.clip(cost, 0, None)) - np.log1p(np.clip(typical, 0, None))
+
+        # Patient history, in date order within each patient
+        order = np.lexsort((df["ENCOUNTER_DATE"].to_numpy(), pd.factorize(df["PATIENT"])[0]))
+        patient = pd.factorize(df["PATIENT"])[0][order]
+        days = df["ENCOUNTER_DATE"].to_numpy("datetime64[D]").astype("int64")[order]
+        sorted_cost = cost[order]
+        first = np.r_[True, patient[1:] != patient[:-1]]
+        starts = np.maximum.accumulate(np.where(first, np.arange(len(patient)), 0))
+        prior = np.arange(len(patient)) - starts
+        gap = np.where(first, NO_PREVIOUS_DAYS, np.r_[0, np.diff(days)])
+        prior_cost = np.cumsum(sorted_cost) - sorted_cost
+        prior_cost -= np.r_[0.0, np.cumsum(sorted_cost)][starts]
+        prior_mean = np.divide(prior_cost, prior, out=sorted_cost.copy(), where=prior > 0)
+
+        for name, values in [
+            ("PRIOR_CLAIMS", prior),
+            ("DAYS_SINCE_PREVIOUS", gap),
+            ("COST_VS_PATIENT_HISTORY", np.log1p(np.clip(sorted_cost, 0, None)) - np.log1p(np.clip(prior_mean, 0, None))),
+        ]:
+            unsorted = np.empty(len(order), dtype="float64")
+            unsorted[order] = values
+            out[name] = unsorted
+
+        return np.column_stack([out[f] for f in FEATURES]).astype("float32")
+
+    def score(self, X):
+        """Anomaly score of every row of a feature matrix; higher is more anomalous."""
+        return -self.forest.score_samples(X)
+
+
+# -----------------------------
+# TRAINING
+# -----------------------------
+def train(df, fingerprint=None):
+    """Fit and publish a new model unless the current one was trained on ``fingerprint``."""
+    current = model_registry.model_info(MODEL_NAME)
+    if current is not None and fingerprint is not None and current["training_fingerprint"] == fingerprint:
+        return current
+    model = ClaimAnomalyModel().fit(df)
+    return model_registry.publish(MODEL_NAME, model, features=FEATURES, fingerprint=fingerprint, rows=len(df))
+
+
+# -----------------------------
+# SCORING
+# -----------------------------
+def _score_chunk(X, version):
+    # Runs in a worker process: the model is loaded once per worker
+    return model_registry.load_model(MODEL_NAME, version).score(X)
+
+
+def score_claims(df, chunk_rows=CHUNK_ROWS, workers=WORKERS):
+    """ANOMALY_SCORE of every claim in ``df``, scored in chunks across processes."""
+    if model_registry.model_info(MODEL_NAME) is None:
+        train(df)
+    version = model_registry.model_info(MODEL_NAME)["version"]
+    model = model_registry.load_model(MODEL_NAME, version)
+
+    X = model.features(df)
+    chunks = [X[s:s + chunk_rows] for s in range(0, len(X), chunk_rows)]
+    if len(chunks) > 1 and workers > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as pool:
+            parts = list(pool.map(_score_chunk, chunks, [version] * len(chunks)))
+    else:
+        parts = [model.score(chunk) for chunk in chunks]
+    scores = np.concatenate(parts) if parts else np.array([], dtype="float64")
+    return pd.Series(scores, index=df.index, name="ANOMALY_SCORE")
+
+
+def attach_scores(df, claims, scores):
+    """``df`` with the ANOMALY_SCORE of the matching claim in ``claims``.
+
+    Claims are matched on patient and encounter time, so a frame read from
+    another file (e.g. final_merged.csv) reuses the scores stored for the
+    cleaned claims; rows without a match get NaN.
+    """
+    patient = "PATIENT" if "PATIENT" in df.columns else "PATIENT_ID"
+    keys = pd.DataFrame({
+        "_PATIENT": claims["PATIENT"].astype(str).to_numpy(),
+        "_DATE": claims["ENCOUNTER_DATE"].to_numpy(),
+        "ANOMALY_SCORE": np.asarray(scores, dtype="float64"),
+    }).groupby(["_PATIENT", "_DATE"], sort=False)["ANOMALY_SCORE"].max()
+    index = pd.MultiIndex.from_arrays([df[patient].astype(str), pd.to_datetime(df["ENCOUNTER_DATE"])])
+    return df.assign(ANOMALY_SCORE=keys.reindex(index).to_numpy())
+
+
+def flag_threshold(scores, share=ANOMALY_SHARE):
+    """Score above which a claim is among the ``share`` most anomalous."""
+    return float(np.quantile(scores, 1 - share)) if len(scores) else np.inf
+
+
+if __name__ == "__main__":
+    # Go through the importable module, so the published pickle refers to
+    # anomaly_model.ClaimAnomalyModel rather than __main__.ClaimAnomalyModel
+    import anomaly_model
+
+    claims = read_claims(CLAIMS_PATH)
+    entry = anomaly_model.train(claims, dataset_version(CLAIMS_PATH))
+    print(f"🌲 {MODEL_NAME} v{entry['version']} (trained on {entry['training_fingerprint']})")
+    result = anomaly_model.score_claims(claims)
+    print(f"✅ Scored {len(result):,} claims; {int((result > flag_threshold(result)).sum()):,} flagged")
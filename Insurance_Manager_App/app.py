@@ -1,6 +1,8 @@
 import streamlit as st
 import pandas as pd
 import os
+from precompute import read_status
+from snapshot import SNAPSHOT_URL, read_latest
 
 st.set_page_config(
     page_title="Insurance Manager Dashboard",
@@ -56,15 +58,41 @@ st.markdown("""
 - **Predictive Insights:** Claim cost forecasting using Random Forest  
 - **Payer Analytics:** Total cost, acceptance rate, average cost, payer trends  
 
-### **Advanced Analytics Pages (5–10)**
+### **Advanced Analytics Pages (5–11)**
 - **Dialysis Diabetes Analysis:** Chronic condition cost, risk, age groups, city trends  
 - **Fraud Anomaly Detection:** Outliers, duplicates, suspicious payer behavior  
 - **High Risk Patients:** Patient risk scores, age–risk analysis  
 - **PMPM Dashboard:** Per Member Per Month cost and member trends  
 - **Forecasting Dashboard:** Real month-based future claim cost prediction  
+- **Drilldown Explorer:** State → city → organization → patient drill-down of claims and costs  
 """)
 
 st.markdown("---")
 
+# ----------------------------------------------------
+# BACKGROUND PRECOMPUTE STATUS
+# ----------------------------------------------------
+status = read_status()
+if status:
+    st.subheader("⚙️ Background Precompute")
+    jobs = pd.DataFrame(status["jobs"])
+    done = int(jobs["state"].isin(["done", "failed"]).sum())
+    st.progress(done / len(jobs), text=f"{done} of {len(jobs)} jobs finished for dataset version {status['version']}")
+    st.dataframe(jobs, hide_index=True)
+    if status["finished"]:
+        st.caption(f"Last run {status['started']} → {status['finished']}")
+    st.markdown("---")
+
+# ----------------------------------------------------
+# STATIC SNAPSHOTS
+# ----------------------------------------------------
+snapshot = read_latest()
+if snapshot:
+    st.subheader("🗞️ Static Snapshots")
+    st.markdown("Only need yesterday's numbers? The static snapshot loads instantly and does not run any page.")
+    st.link_button("Open static snapshot", SNAPSHOT_URL)
+    st.caption(f"Rendered {snapshot['rendered']} from dataset version {snapshot['version']}.")
+    st.markdown("---")
+
 st.info("Choose a page from the left sidebar to begin analyzing your Synthea dataset.")
 st.warning("This homepage only provides navigation. All analytics appear in the pages under the **pages/** folder.")
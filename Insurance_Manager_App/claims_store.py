@@ -0,0 +1,333 @@
+"""Compact, process-wide claims dataset shared by every dashboard page."""
+import os
+import shutil
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from instrumentation import cache_event, span
+
+# -----------------------------
+# FILE PATHS
+# -----------------------------
+CLAIMS_PATH = "data/cleaned_claims_full.csv"
+
+# Every ETL run writes a new dataset version to <data dir>/versions/<version>/
+# and then points <data dir>/CURRENT at it, so readers never see a half-written
+# dataset. Folders without a CURRENT pointer are read directly.
+VERSIONS_DIR = "versions"
+CURRENT_FILE = "CURRENT"
+KEEP_VERSIONS = 3
+
+# "auto" prefers the Arrow IPC twin written by data_cleaning.py when it is at
+# least as new as the CSV, "arrow" always uses it when present, "csv" never does.
+DATA_MODE = os.environ.get("CLAIMS_DATA_MODE", "auto").lower()
+
+# -----------------------------
+# COMPACT SCHEMA
+# -----------------------------
+# Columns that share one dictionary of categories (PATIENT_ID is the
+# patients.csv Id and holds the same UUIDs as PATIENT).
+SHARED_DICTIONARIES = {
+    "PATIENT": ["PATIENT", "PATIENT_ID"],
+}
+CATEGORY_COLUMNS = [
+    "PAYER", "PAYER_NAME", "ORGANIZATION", "CITY", "STATE", "GENDER", "DESCRIPTION",
+]
+COST_COLUMNS = ["TOTAL_CLAIM_COST", "PAYER_COVERAGE"]
+FLAG_COLUMNS = ["IsDiabetes", "IsDialysis", "IsDialysisProc"]
+DATE_COLUMNS = ["ENCOUNTER_DATE", "BIRTHDATE"]
+
+# Largest rounding error (in dollars) accepted when narrowing costs to float32.
+FLOAT32_TOLERANCE = 0.005
+
+# The claims are kept sorted by this column, so date ranges are binary searches.
+TIME_COLUMN = "ENCOUNTER_DATE"
+
+
+def _to_datetime(series):
+    dates = pd.to_datetime(series, errors="coerce")
+    if getattr(dates.dt, "tz", None) is not None:
+        dates = dates.dt.tz_convert("UTC").dt.tz_localize(None)
+    return dates
+
+
+def compact_claims(df):
+    """Return a copy of ``df`` using categorical, float32, int8 and datetime64 columns."""
+    df = df.copy()
+
+    for columns in SHARED_DICTIONARIES.values():
+        present = [c for c in columns if c in df.columns]
+        if not present:
+            continue
+        values = pd.concat([df[c] for c in present], ignore_index=True).dropna()
+        categories = pd.Index(values.unique()).sort_values()
+        for c in present:
+            df[c] = pd.Categorical(df[c], categories=categories)
+
+    for c in CATEGORY_COLUMNS:
+        if c in df.columns:
+            df[c] = df[c].astype("category")
+
+    for c in COST_COLUMNS:
+        if c in df.columns:
+            values = df[c].astype("float64")
+            narrowed = values.astype("float32")
+            if (narrowed.astype("float64") - values).abs().max() <= FLOAT32_TOLERANCE:
+                df[c] = narrowed
+            else:
+                df[c] = values
+
+    for c in FLAG_COLUMNS:
+        if c in df.columns:
+            df[c] = df[c].fillna(0).astype("int8")
+
+    if "AGE" in df.columns:
+        age = df["AGE"]
+        df["AGE"] = age.astype("int16") if age.notna().all() else age.astype("float32")
+
+    with span("date parsing", rows=len(df)):
+        for c in DATE_COLUMNS:
+            if c in df.columns:
+                df[c] = _to_datetime(df[c])
+
+    return sort_by_time(df)
+
+
+# -----------------------------
+# TIME INDEX
+# -----------------------------
+def sort_by_time(df):
+    """``df`` in ENCOUNTER_DATE order (stable, missing dates last); unchanged if already sorted."""
+    if TIME_COLUMN not in df.columns:
+        return df
+    dates = df[TIME_COLUMN]
+    known = int(dates.notna().sum())
+    if dates.iloc[:known].notna().all() and dates.iloc[:known].is_monotonic_increasing:
+        return df
+    with span("time sort", rows=len(df)):
+        return df.sort_values(TIME_COLUMN, kind="stable", na_position="last", ignore_index=True)
+
+
+def date_range(df, start=None, end=None):
+    """Claims from ``start`` to ``end`` (whole days, both inclusive) of a time-sorted frame.
+
+    Two binary searches on ENCOUNTER_DATE and a positional slice, so the cost
+    does not grow with the number of claims outside the range.
+    """
+    dates = df[TIME_COLUMN].to_numpy()
+    lo = 0 if start is None else np.searchsorted(dates, np.datetime64(pd.Timestamp(start).normalize()), side="left")
+    hi = len(dates) if end is None else np.searchsorted(
+        dates, np.datetime64(pd.Timestamp(end).normalize() + pd.Timedelta(days=1)), side="left"
+    )
+    return df.iloc[lo:hi]
+
+
+def time_bounds(df):
+    """First and last ENCOUNTER_DATE of a time-sorted frame."""
+    dates = df[TIME_COLUMN]
+    known = int(dates.notna().sum())
+    return (dates.iloc[0], dates.iloc[known - 1]) if known else (pd.NaT, pd.NaT)
+
+
+def memory_report(raw, compact):
+    """Per-column memory usage of ``raw`` versus ``compact`` (deep, in bytes)."""
+    raw_bytes = raw.memory_usage(index=False, deep=True)
+    compact_bytes = compact.memory_usage(index=False, deep=True)
+
+    report = pd.DataFrame({
+        "RAW_DTYPE": raw.dtypes.astype(str),
+        "COMPACT_DTYPE": compact.dtypes.astype(str),
+        "RAW_BYTES": raw_bytes,
+        "COMPACT_BYTES": compact_bytes,
+    })
+    report["SAVED_BYTES"] = report["RAW_BYTES"] - report["COMPACT_BYTES"]
+    report["SAVED_PCT"] = 100 * report["SAVED_BYTES"] / report["RAW_BYTES"].replace(0, np.nan)
+    report.loc["TOTAL"] = [
+        "", "",
+        report["RAW_BYTES"].sum(),
+        report["COMPACT_BYTES"].sum(),
+        report["SAVED_BYTES"].sum(),
+        100 * report["SAVED_BYTES"].sum() / max(report["RAW_BYTES"].sum(), 1),
+    ]
+    return report.rename_axis("COLUMN").reset_index()
+
+
+# -----------------------------
+# ARROW IPC
+# -----------------------------
+def arrow_path(path):
+    """Path of the Arrow IPC (Feather v2) twin of a CSV dataset."""
+    return os.path.splitext(path)[0] + ".arrow"
+
+
+def write_arrow(df, path):
+    """Write ``df`` as an uncompressed Arrow IPC file that readers can memory-map.
+
+    The file is written next to ``path`` and renamed into place, so processes
+    that still map the previous file keep reading a consistent copy.
+    """
+    import pyarrow.feather as feather
+
+    tmp_path = path + ".tmp"
+    feather.write_feather(df.reset_index(drop=True), tmp_path, compression="uncompressed")
+    os.replace(tmp_path, path)
+
+
+def read_arrow(path):
+    """Memory-map an Arrow IPC file read-only and expose it as a DataFrame.
+
+    Numeric, flag and date columns without nulls are zero-copy views of the
+    mapping, so every worker process on the host shares the same page-cache
+    copy of them.
+    """
+    import pyarrow as pa
+
+    source = pa.memory_map(path, "r")
+    table = pa.ipc.open_file(source).read_all()
+    return table.to_pandas(split_blocks=True)
+
+
+# -----------------------------
+# DATASET VERSIONS
+# -----------------------------
+def current_version(data_dir):
+    """Dataset version CURRENT points to in ``data_dir``, or None if it is not versioned."""
+    pointer = os.path.join(data_dir, CURRENT_FILE)
+    if not os.path.exists(pointer):
+        return None
+    with open(pointer, encoding="utf-8") as f:
+        return f.read().strip() or None
+
+
+def active_path(path):
+    """``path`` inside the active dataset version when its folder is versioned.
+
+    Files the ETL does not write (e.g. a hand-placed final_merged.csv) stay
+    where they are.
+    """
+    data_dir, name = os.path.split(path)
+    version = current_version(data_dir or ".")
+    if version is None:
+        return path
+    versioned = os.path.join(data_dir, VERSIONS_DIR, version, name)
+    return versioned if os.path.exists(versioned) or not os.path.exists(path) else path
+
+
+def new_version_dir(data_dir):
+    """Create the folder of a new, not yet active, dataset version.
+
+    Names are timestamps down to the microsecond, so they sort by creation
+    time (``publish_version`` relies on it) and ETL runs started in the same
+    second still get folders of their own.
+    """
+    os.makedirs(os.path.join(data_dir, VERSIONS_DIR), exist_ok=True)
+    while True:
+        version = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        path = os.path.join(data_dir, VERSIONS_DIR, version)
+        try:
+            os.mkdir(path)
+            return version, path
+        except FileExistsError:
+            # Another run took this exact timestamp; take the next one
+            continue
+
+
+def publish_version(data_dir, version):
+    """Atomically make ``version`` the active dataset and drop old versions.
+
+    Versions newer than ``version`` are kept, as an ETL run may still be
+    writing them.
+    """
+    pointer = os.path.join(data_dir, CURRENT_FILE)
+    tmp_path = pointer + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(version)
+    os.replace(tmp_path, pointer)
+
+    versions_dir = os.path.join(data_dir, VERSIONS_DIR)
+    older = sorted(v for v in os.listdir(versions_dir) if v <= version)
+    for old in older[:-KEEP_VERSIONS]:
+        # Readers that still map an old Arrow file keep their open handle
+        shutil.rmtree(os.path.join(versions_dir, old), ignore_errors=True)
+
+
+def _resolve_source(path):
+    path = active_path(path)
+    twin = arrow_path(path)
+    if DATA_MODE == "csv" or not os.path.exists(twin):
+        return path
+    if DATA_MODE == "arrow" or not os.path.exists(path):
+        return twin
+    return twin if os.path.getmtime(twin) >= os.path.getmtime(path) else path
+
+
+def claims_available(path=CLAIMS_PATH):
+    return os.path.exists(_resolve_source(path))
+
+
+def dataset_version(path=CLAIMS_PATH):
+    """Short fingerprint (mtime and size) of the dataset ``path`` resolves to."""
+    stat = os.stat(_resolve_source(path))
+    return f"{int(stat.st_mtime)}-{stat.st_size}"
+
+
+def read_claims(path=CLAIMS_PATH):
+    """Read the compact claims frame without the process-wide cache."""
+    source = _resolve_source(path)
+    if source.endswith(".arrow"):
+        with span("arrow map") as s:
+            df = read_arrow(source)
+            s["rows"] = len(df)
+        # Arrow files written by the ETL are already in time order
+        return sort_by_time(df)
+    with span("csv parse") as s:
+        df = pd.read_csv(source)
+        s["rows"] = len(df)
+    return compact_claims(df)
+
+
+# -----------------------------
+# SHARED RESOURCE
+# -----------------------------
+_LOADS = {"count": 0, "versions": {}}
+
+
+@st.cache_resource(show_spinner="Loading claims data...")
+def _shared_claims(path, version):
+    # version is only part of the cache key so a rewritten file is picked up.
+    _LOADS["count"] += 1
+    return read_claims(path)
+
+
+def load_claims(path=CLAIMS_PATH):
+    """Return the process-wide compact claims frame.
+
+    The underlying frame is loaded once per server process and must be treated
+    as read-only; callers get a shallow copy so adding or replacing columns on
+    it never leaks into other sessions.
+    """
+    with span("data load") as s:
+        loads = _LOADS["count"]
+        # Resolve the active version once, so a concurrent switch cannot mix two
+        source = active_path(path)
+        version = dataset_version(source)
+        if _LOADS["versions"].get(path, version) != version:
+            # A new dataset version is active: release the previous frame
+            # (sessions still holding it keep their reference until they rerun)
+            _shared_claims.clear()
+        _LOADS["versions"][path] = version
+        frame = _shared_claims(source, version)
+        cache_event("claims", hit=_LOADS["count"] == loads)
+        s["rows"] = len(frame)
+    return frame.copy(deep=False)
+
+
+if __name__ == "__main__":
+    print("🧩 Building compact claims representation...")
+    raw = pd.read_csv(active_path(CLAIMS_PATH))
+    report = memory_report(raw, compact_claims(raw))
+    pd.set_option("display.width", 160)
+    print(report.to_string(index=False))
@@ -1,57 +1,116 @@
 import pandas as pd
 import os
+from claims_store import new_version_dir, publish_version, sort_by_time
+from enrollment import member_months
+from stage_cache import StageCache
+from validation import reason_counts, validate_claims
 
 # -----------------------------
 # FILE PATHS
 # -----------------------------
-DATA_PATH = "../data/"
-OUTPUT_PATH = "../data/cleaned_claims_full.csv"
+DATA_PATH = os.environ.get("CLAIMS_RAW_DIR", "../data/")
 
-# -----------------------------
-# LOAD DATA
-# -----------------------------
-print("🧩 Loading data files...")
+# Outputs go to a new dataset version under DATA_PATH/versions/; DATA_PATH/CURRENT
+# is switched to it only once every file is written (see claims_store).
+CLAIMS_FILE = "cleaned_claims_full.csv"
+MEMBER_MONTHS_FILE = "member_months.csv"
+QUARANTINE_FILE = "quarantine.csv"
+
+# Also write a memory-mappable Arrow IPC copy for the pages (CLAIMS_DATA_MODE).
+WRITE_ARROW = os.environ.get("CLAIMS_WRITE_ARROW", "1") != "0"
 
-patients = pd.read_csv(os.path.join(DATA_PATH, "patients.csv"))
-encounters = pd.read_csv(os.path.join(DATA_PATH, "encounters.csv"))
-conditions = pd.read_csv(os.path.join(DATA_PATH, "conditions.csv"))
-procedures = pd.read_csv(os.path.join(DATA_PATH, "procedures.csv"))
-payers = pd.read_csv(os.path.join(DATA_PATH, "payers.csv"))
-payer_transitions = pd.read_csv(os.path.join(DATA_PATH, "payer_transitions.csv"))
+# And a star schema (encounter facts + dimension tables, see star_schema).
+WRITE_STAR = os.environ.get("CLAIMS_WRITE_STAR", "1") != "0"
 
-print("✅ Data loaded successfully.")
+# Warm page aggregates, forecasts and risk scores in the background afterwards.
+PRECOMPUTE_AFTER_ETL = os.environ.get("PRECOMPUTE_AFTER_ETL", "1") != "0"
+
+# Then render static HTML snapshots of every page for read-only viewers.
+SNAPSHOT_AFTER_ETL = os.environ.get("SNAPSHOT_AFTER_ETL", "1") != "0"
 
 # -----------------------------
 # CLEAN PATIENTS
 # -----------------------------
-patients = patients[['Id', 'BIRTHDATE', 'GENDER', 'CITY', 'STATE']].drop_duplicates()
-patients['AGE'] = (pd.Timestamp.now().year - pd.to_datetime(patients['BIRTHDATE']).dt.year)
+def clean_patients(patients):
+    patients = patients[['Id', 'BIRTHDATE', 'GENDER', 'CITY', 'STATE']].drop_duplicates()
+    patients['AGE'] = (pd.Timestamp.now().year - pd.to_datetime(patients['BIRTHDATE']).dt.year)
+    return patients
+
 
 # -----------------------------
 # CLEAN ENCOUNTERS
 # -----------------------------
-encounters = encounters[['PATIENT', 'START', 'TOTAL_CLAIM_COST', 'PAYER_COVERAGE', 'DESCRIPTION', 'ORGANIZATION', 'PAYER']].dropna(subset=['PATIENT'])
-encounters.rename(columns={'START': 'ENCOUNTER_DATE'}, inplace=True)
+def clean_encounters(encounters):
+    encounters = encounters[['PATIENT', 'START', 'TOTAL_CLAIM_COST', 'PAYER_COVERAGE', 'DESCRIPTION', 'ORGANIZATION', 'PAYER']].dropna(subset=['PATIENT'])
+    encounters.rename(columns={'START': 'ENCOUNTER_DATE'}, inplace=True)
+    return encounters
+
 
 # -----------------------------
 # CLEAN CONDITIONS
 # -----------------------------
-conditions = conditions[['PATIENT', 'DESCRIPTION']].drop_duplicates()
-conditions['IsDiabetes'] = conditions['DESCRIPTION'].str.contains("diabetes", case=False, na=False).astype(int)
-conditions['IsDialysis'] = conditions['DESCRIPTION'].str.contains("dialysis|renal", case=False, na=False).astype(int)
-conditions = conditions.groupby('PATIENT')[['IsDiabetes', 'IsDialysis']].max().reset_index()
+def clean_conditions(conditions):
+    conditions = conditions[['PATIENT', 'DESCRIPTION']].drop_duplicates()
+    conditions['IsDiabetes'] = conditions['DESCRIPTION'].str.contains("diabetes", case=False, na=False).astype(int)
+    conditions['IsDialysis'] = conditions['DESCRIPTION'].str.contains("dialysis|renal", case=False, na=False).astype(int)
+    return conditions.groupby('PATIENT')[['IsDiabetes', 'IsDialysis']].max().reset_index()
+
 
 # -----------------------------
 # CLEAN PROCEDURES
 # -----------------------------
-procedures = procedures[['PATIENT', 'DESCRIPTION']].drop_duplicates()
-procedures['IsDialysisProc'] = procedures['DESCRIPTION'].str.contains("dialysis", case=False, na=False).astype(int)
-procedures = procedures.groupby('PATIENT')['IsDialysisProc'].max().reset_index()
+def clean_procedures(procedures):
+    procedures = procedures[['PATIENT', 'DESCRIPTION']].drop_duplicates()
+    procedures['IsDialysisProc'] = procedures['DESCRIPTION'].str.contains("dialysis", case=False, na=False).astype(int)
+    return procedures.groupby('PATIENT')['IsDialysisProc'].max().reset_index()
+
+
+# -----------------------------
+# PAYERS
+# -----------------------------
+def clean_payers(payers):
+    return payers
+
+
+# -----------------------------
+# ENROLLMENT (MEMBER-MONTHS)
+# -----------------------------
+# Uses the raw intervals: open-ended (current) coverage has no END_DATE.
+def enrollment(payer_transitions):
+    return member_months(payer_transitions)
+
 
 # -----------------------------
 # CLEAN PAYER TRANSITIONS
 # -----------------------------
-payer_transitions = payer_transitions[['PATIENT', 'PAYER', 'START_DATE', 'END_DATE']].dropna()
+def clean_payer_transitions(payer_transitions):
+    return payer_transitions[['PATIENT', 'PAYER', 'START_DATE', 'END_DATE']].dropna()
+
+
+# -----------------------------
+# RUN STAGES
+# -----------------------------
+# Each stage is skipped when its input files and code are unchanged
+print("🧩 Loading and cleaning data files...")
+
+stages = StageCache(DATA_PATH)
+today = pd.Timestamp.now()
+
+patients = stages.run("patients", clean_patients, ["patients.csv"], extra=[today.year])
+encounters = stages.run("encounters", clean_encounters, ["encounters.csv"])
+conditions = stages.run("conditions", clean_conditions, ["conditions.csv"])
+procedures = stages.run("procedures", clean_procedures, ["procedures.csv"])
+payers = stages.run("payers", clean_payers, ["payers.csv"])
+member_months_df = stages.run(
+    "enrollment", enrollment, ["payer_transitions.csv"], extra=[today.strftime("%Y-%m")], code=[member_months]
+)
+payer_transitions = stages.run("payer_transitions", clean_payer_transitions, ["payer_transitions.csv"])
+stages.save_hashes()
+
+for stage in stages.report:
+    icon = "⏭️" if stage["status"] == "skipped" else "✅"
+    print(f"{icon} {stage['stage']:<18} {stage['status']:<9} {stage['seconds']:.2f}s")
+print(f"✅ Enrollment: {member_months_df['MEMBER_MONTHS'].sum():,} member-months.")
 
 # -----------------------------
 # MERGE ALL TABLES
@@ -105,14 +164,74 @@ df = df.fillna({
     'IsDiabetes': 0,
     'IsDialysis': 0,
     'IsDialysisProc': 0,
-    'TOTAL_CLAIM_COST': 0,
-    'PAYER_COVERAGE': 0,
 })
 
+# -----------------------------
+# VALIDATE & QUARANTINE
+# -----------------------------
+# Missing or bad costs are no longer filled with 0: rows failing any check
+# go to the quarantine file with their reason codes.
+df, quarantine = validate_claims(
+    df,
+    patient_ids=patients['Id'],
+    payer_ids=payers['Id'] if 'Id' in payers.columns else None,
+)
+if len(quarantine):
+    print(f"⚠️ Quarantined {len(quarantine):,} rows:")
+    for reason, rows in reason_counts(quarantine).items():
+        print(f"   {reason:<22} {rows:,}")
+else:
+    print("✅ All rows passed validation.")
+
+# Claims are stored in ENCOUNTER_DATE order so pages slice date ranges by binary search
+df = sort_by_time(df)
+
 print(f"✅ Final dataset shape: {df.shape}")
 
 # -----------------------------
 # SAVE CLEAN DATA
 # -----------------------------
+VERSION, OUTPUT_DIR = new_version_dir(DATA_PATH)
+OUTPUT_PATH = os.path.join(OUTPUT_DIR, CLAIMS_FILE)
+MEMBER_MONTHS_PATH = os.path.join(OUTPUT_DIR, MEMBER_MONTHS_FILE)
+
 df.to_csv(OUTPUT_PATH, index=False)
 print(f"💾 Cleaned data saved to {OUTPUT_PATH}")
+
+if WRITE_ARROW:
+    from claims_store import arrow_path, compact_claims, write_arrow
+
+    write_arrow(compact_claims(df), arrow_path(OUTPUT_PATH))
+    print(f"💾 Arrow IPC copy saved to {arrow_path(OUTPUT_PATH)}")
+
+if WRITE_STAR:
+    from star_schema import STAR_DIR, StarSchema, write_star
+
+    write_star(StarSchema.build(df), os.path.join(OUTPUT_DIR, STAR_DIR))
+    print(f"💾 Star schema saved to {os.path.join(OUTPUT_DIR, STAR_DIR)}")
+
+member_months_df.to_csv(MEMBER_MONTHS_PATH, index=False)
+print(f"💾 Member-months saved to {MEMBER_MONTHS_PATH}")
+
+quarantine.to_csv(os.path.join(OUTPUT_DIR, QUARANTINE_FILE), index=False)
+print(f"💾 Quarantined rows saved to {os.path.join(OUTPUT_DIR, QUARANTINE_FILE)}")
+
+publish_version(DATA_PATH, VERSION)
+print(f"🔁 Active dataset switched to version {VERSION}")
+
+# -----------------------------
+# START BACKGROUND PRECOMPUTE
+# -----------------------------
+# Pages read data/ relative to the folder above DATA_PATH
+APP_ROOT = os.path.dirname(os.path.normpath(DATA_PATH)) or "."
+
+if PRECOMPUTE_AFTER_ETL:
+    from precompute import start_background
+
+    start_background(cwd=APP_ROOT, snapshots=SNAPSHOT_AFTER_ETL)
+    print("🔥 Background precompute started — see the home page for progress.")
+elif SNAPSHOT_AFTER_ETL:
+    from snapshot import start_background as start_snapshots
+
+    start_snapshots(cwd=APP_ROOT)
+    print("📸 Static snapshot rendering started in the background.")
@@ -0,0 +1,123 @@
+"""Watch the raw Synthea exports in ``data/`` and rebuild the dataset when they change.
+
+The ETL (``data_cleaning.py``) runs in a separate process and writes a new
+dataset version, then atomically switches ``data/CURRENT`` to it (see
+``claims_store``). Running sessions keep the version they loaded until their
+next rerun; nothing blocks and no server restart is needed.
+
+A change is only picked up once the raw files have stayed the same for one
+more poll, so a half-copied export never triggers a run.
+
+    python data_watcher.py [--interval 30] [--once]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# -----------------------------
+# FILE PATHS
+# -----------------------------
+RAW_DIR = "data"
+RAW_FILES = [
+    "patients.csv", "encounters.csv", "conditions.csv",
+    "procedures.csv", "payers.csv", "payer_transitions.csv",
+]
+STATE_PATH = os.path.join(RAW_DIR, "watcher_state.json")
+ETL_LOG_DIR = "logs"
+
+POLL_SECONDS = int(os.environ.get("DATA_WATCH_INTERVAL", "30"))
+
+
+def raw_fingerprint(raw_dir=RAW_DIR):
+    """Size and modification time of every raw input file that exists."""
+    fingerprint = {}
+    for name in RAW_FILES:
+        path = os.path.join(raw_dir, name)
+        if os.path.exists(path):
+            stat = os.stat(path)
+            fingerprint[name] = [stat.st_size, stat.st_mtime_ns]
+    return fingerprint
+
+
+def read_state():
+    """Fingerprint of the last processed (and last failed) inputs."""
+    if not os.path.exists(STATE_PATH):
+        return {"processed": None, "failed": None, "last_run": None}
+    with open(STATE_PATH, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write_state(state):
+    tmp_path = STATE_PATH + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, STATE_PATH)
+
+
+def start_etl(raw_dir=RAW_DIR):
+    """Run ``data_cleaning.py`` in the background; its output goes to logs/etl_<time>.log."""
+    os.makedirs(ETL_LOG_DIR, exist_ok=True)
+    log_path = os.path.join(ETL_LOG_DIR, f"etl_{datetime.now():%Y%m%d-%H%M%S}.log")
+    env = dict(os.environ, CLAIMS_RAW_DIR=os.path.abspath(raw_dir) + os.sep)
+    with open(log_path, "w", encoding="utf-8") as log:
+        process = subprocess.Popen(
+            [sys.executable, os.path.join(APP_DIR, "data_cleaning.py")],
+            cwd=APP_DIR,
+            env=env,
+            stdout=log,
+            stderr=subprocess.STDOUT,
+        )
+    return process, log_path
+
+
+def watch(raw_dir=RAW_DIR, interval=POLL_SECONDS, once=False):
+    """Poll ``raw_dir`` and run the ETL whenever its inputs changed and settled."""
+    state = read_state()
+    running, running_inputs, pending, log_path = None, None, None, None
+
+    while True:
+        if running is not None and running.poll() is not None:
+            ok = running.returncode == 0
+            state["processed" if ok else "failed"] = running_inputs
+            state["last_run"] = {
+                "finished": datetime.now().isoformat(timespec="seconds"),
+                "returncode": running.returncode,
+                "log": log_path,
+            }
+            _write_state(state)
+            print(f"{'✅ Dataset rebuilt' if ok else '❌ ETL failed'} — see {log_path}")
+            running = None
+            if once:
+                return state
+
+        inputs = raw_fingerprint(raw_dir)
+        changed = inputs and inputs != state["processed"] and inputs != state["failed"]
+        if running is None and changed:
+            if inputs == pending:
+                print(f"🔄 Raw data changed — running the ETL ({datetime.now():%H:%M:%S})")
+                running, log_path = start_etl(raw_dir)
+                running_inputs, pending = inputs, None
+            else:
+                # Wait one more poll in case the export is still being copied
+                pending = inputs
+        elif running is None and once:
+            print("✅ Dataset is up to date.")
+            return state
+
+        time.sleep(interval)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--interval", type=int, default=POLL_SECONDS, help="seconds between polls")
+    parser.add_argument("--once", action="store_true", help="rebuild if needed, then exit")
+    args = parser.parse_args()
+
+    print(f"👀 Watching {os.path.abspath(RAW_DIR)} every {args.interval}s...")
+    watch(interval=args.interval, once=args.once)
@@ -0,0 +1,122 @@
+import streamlit as st
+import pandas as pd
+from instrumentation import LOG_DIR, read_prometheus, read_runs
+from lazy_imports import lazy_module
+from model_registry import model_table
+
+px = lazy_module("plotly.express")
+
+# ----------------------------------------------------
+# HIDDEN DIAGNOSTICS PAGE
+# Not linked from the sidebar — open with `streamlit run diagnostics.py`
+# ----------------------------------------------------
+st.title("🩻 Diagnostics — Where Does Page Time Go?")
+
+runs = read_runs()
+if not runs:
+    st.info("No page runs recorded yet. Open a few dashboard pages first.")
+    st.stop()
+
+# ----------------------------------------------------
+# PAGE RUNS
+# ----------------------------------------------------
+run_df = pd.DataFrame([
+    {
+        "page": r["page"],
+        "started": r["started"],
+        "seconds": r["seconds"],
+        # Older runs were only logged when the script completed
+        "status": r.get("status", "completed"),
+        # Older runs only logged the process-lifetime peak
+        "rss_delta_mb": r.get("rss_delta_mb"),
+        "process_peak_rss_mb": r.get("process_peak_rss_mb", r.get("peak_rss_mb")),
+    }
+    for r in runs
+])
+
+st.sidebar.header("🔍 Filters")
+pages = sorted(run_df["page"].unique())
+selected_pages = st.sidebar.multiselect("Pages:", pages, default=pages)
+run_df = run_df[run_df["page"].isin(selected_pages)]
+runs = [r for r in runs if r["page"] in selected_pages]
+
+col1, col2, col3, col4 = st.columns(4)
+col1.metric("🧾 Page Runs", f"{len(run_df):,}")
+col2.metric("⏱️ p95 Page Time", f"{run_df['seconds'].quantile(0.95):.2f}s" if len(run_df) else "N/A")
+col3.metric("🧠 p95 RSS Growth per Run",
+            f"{run_df['rss_delta_mb'].quantile(0.95):,.1f} MB" if run_df["rss_delta_mb"].notna().any() else "N/A")
+col4.metric("🏔️ Process Peak RSS",
+            f"{run_df['process_peak_rss_mb'].max():,.0f} MB" if run_df["process_peak_rss_mb"].notna().any() else "N/A",
+            help="High-water mark since the server process started, not per run")
+
+st.header("1️⃣ Page Time")
+page_summary = run_df.groupby("page")["seconds"].describe(percentiles=[0.5, 0.95]).reset_index()
+page_summary["mean RSS growth (MB)"] = page_summary["page"].map(run_df.groupby("page")["rss_delta_mb"].mean())
+st.dataframe(page_summary)
+st.caption("Runs by outcome — stopped runs ended in st.stop() or a rerun.")
+st.dataframe(run_df.groupby(["page", "status"]).size().unstack(fill_value=0))
+
+# ----------------------------------------------------
+# HOT PATH — SPANS
+# ----------------------------------------------------
+st.header("2️⃣ Hot Path by Span")
+
+span_df = pd.DataFrame([
+    {"page": r["page"], "span": s["name"], "seconds": s["seconds"], "rows": s["rows"]}
+    for r in runs
+    for s in r["spans"]
+])
+
+if span_df.empty:
+    st.info("No spans recorded for the selected pages.")
+else:
+    hot = (
+        span_df.groupby(["page", "span"])
+        .agg(calls=("seconds", "size"), total_s=("seconds", "sum"),
+             mean_s=("seconds", "mean"), p95_s=("seconds", lambda x: x.quantile(0.95)),
+             rows=("rows", "max"))
+        .reset_index()
+        .sort_values("total_s", ascending=False)
+    )
+    fig = px.bar(hot.head(25), x="total_s", y="span", color="page", orientation="h",
+                 title="Top 25 Spans by Total Time")
+    st.plotly_chart(fig, use_container_width=True)
+    st.dataframe(hot)
+
+# ----------------------------------------------------
+# CACHE HIT RATIOS
+# ----------------------------------------------------
+st.header("3️⃣ Cache Hit Ratios")
+
+cache_rows = [
+    {"page": r["page"], "cache": name, "hits": c["hits"], "misses": c["misses"]}
+    for r in runs
+    for name, c in r["cache"].items()
+]
+if cache_rows:
+    cache_df = pd.DataFrame(cache_rows).groupby(["page", "cache"])[["hits", "misses"]].sum().reset_index()
+    cache_df["hit_ratio"] = cache_df["hits"] / (cache_df["hits"] + cache_df["misses"])
+    st.dataframe(cache_df)
+else:
+    st.info("No cache lookups recorded for the selected pages.")
+
+st.subheader("Model registry")
+st.dataframe(pd.DataFrame(model_table()))
+
+# ----------------------------------------------------
+# RAW EXPORTS
+# ----------------------------------------------------
+st.header("4️⃣ Exports")
+
+st.subheader("Prometheus metrics of the dashboard processes")
+st.caption(f"Each server process rewrites `{LOG_DIR}/dashboard_<pid>.prom` after every page run.")
+samples = pd.DataFrame(read_prometheus())
+if samples.empty:
+    st.info("No metrics exported yet.")
+else:
+    processes = samples.pivot_table(
+        index=["pid", "updated"], columns="metric", values="value", aggfunc="sum"
+    ).reset_index()
+    st.dataframe(processes)
+    with st.expander("All samples"):
+        st.dataframe(samples)
@@ -0,0 +1,184 @@
+"""Precomputed STATE → CITY → ORGANIZATION → PATIENT rollups for drill-down.
+
+``HierarchyRollup.build`` aggregates the claims once per hierarchy depth
+(claims, cost, condition claims and distinct patients per node). Within a
+depth, siblings are stored next to each other, largest cost first, with the
+row range of every parent indexed, so expanding a node is a slice of its
+children — nothing is computed for nodes nobody opens, and the claims
+themselves are never needed after the build.
+
+Every level shows its top ``k`` children and folds the rest into one
+"Other" row; ``child_names`` pages and searches through all of them, so
+every node stays reachable.
+
+The background precompute stores each depth in its own Arrow file
+(``save_parts``). A stored rollup memory-maps a depth the first time a node
+of the level above is opened, so the large PATIENT level is never read by
+sessions that stop at a city.
+"""
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+LEVELS = ["STATE", "CITY", "ORGANIZATION", "PATIENT"]
+METRICS = ["CLAIMS", "TOTAL_CLAIM_COST", "DIABETES_CLAIMS", "DIALYSIS_CLAIMS", "PATIENTS"]
+TOP_K = 10
+OTHER = "Other"
+UNKNOWN = "Unknown"
+
+# A patient lives in one state and one city, so their patient counts add up
+# across siblings; a patient can visit several organizations, so theirs do not.
+ADDITIVE_PATIENTS = {"STATE", "CITY", "PATIENT"}
+
+
+def _parent_ranges(frame, keys):
+    """(parent path) → (start, stop) rows of its children in ``frame``."""
+    if not keys:
+        return {(): (0, len(frame))}
+    parents = frame[keys].to_numpy()
+    starts = np.flatnonzero(np.r_[True, (parents[1:] != parents[:-1]).any(axis=1)])
+    stops = np.r_[starts[1:], len(frame)]
+    return {tuple(parents[s]): (int(s), int(e)) for s, e in zip(starts, stops)}
+
+
+class HierarchyRollup:
+    """Node metrics of every hierarchy depth, with children indexed by parent."""
+
+    def __init__(self, frames, ranges, totals, folder=None):
+        self.frames = frames
+        self.ranges = ranges
+        self.totals = totals
+        self.folder = folder
+        self._lock = threading.Lock()
+
+    @classmethod
+    def build(cls, df):
+        base = pd.DataFrame({level: df[level].astype(object).fillna(UNKNOWN) for level in LEVELS})
+        base["COST"] = df["TOTAL_CLAIM_COST"].to_numpy(dtype="float64")
+        # int64 so per-node counts cannot overflow the int8 flags
+        base["DIABETES"] = df["IsDiabetes"].to_numpy(dtype="int64")
+        base["DIALYSIS"] = df["IsDialysis"].to_numpy(dtype="int64")
+
+        frames, ranges = [], []
+        for depth in range(1, len(LEVELS) + 1):
+            keys = LEVELS[:depth]
+            nodes = base.groupby(keys, sort=False).agg(
+                CLAIMS=("COST", "size"),
+                TOTAL_CLAIM_COST=("COST", "sum"),
+                DIABETES_CLAIMS=("DIABETES", "sum"),
+                DIALYSIS_CLAIMS=("DIALYSIS", "sum"),
+                PATIENTS=("PATIENT", "nunique"),
+            ).reset_index()
+            # Siblings together, most expensive first
+            nodes = nodes.sort_values(
+                keys[:-1] + ["TOTAL_CLAIM_COST"], ascending=[True] * (depth - 1) + [False], ignore_index=True
+            )
+            frames.append(nodes)
+            ranges.append(_parent_ranges(nodes, keys[:-1]))
+
+        totals = {
+            "CLAIMS": len(base),
+            "TOTAL_CLAIM_COST": float(base["COST"].sum()),
+            "DIABETES_CLAIMS": int(base["DIABETES"].sum()),
+            "DIALYSIS_CLAIMS": int(base["DIALYSIS"].sum()),
+            "PATIENTS": int(base["PATIENT"].nunique()),
+        }
+        return cls(frames, ranges, totals)
+
+    # -----------------------------
+    # STORAGE (one file per depth)
+    # -----------------------------
+    def _level_path(self, depth):
+        return os.path.join(self.folder, f"level_{depth}.arrow")
+
+    def save_parts(self, folder):
+        """Write every depth to its own Arrow file in ``folder``; later pickles only reference them."""
+        from claims_store import write_arrow
+
+        os.makedirs(folder, exist_ok=True)
+        self.folder = folder
+        for depth in range(len(LEVELS)):
+            write_arrow(self._level(depth), self._level_path(depth))
+
+    def __getstate__(self):
+        state = {k: v for k, v in self.__dict__.items() if k != "_lock"}
+        if self.folder is not None:
+            # Stored depths are loaded again on demand
+            state["frames"] = [None] * len(LEVELS)
+            state["ranges"] = [None] * len(LEVELS)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def _level(self, depth):
+        """Node frame of ``depth``, loaded from its file on first use."""
+        if self.frames[depth] is None:
+            from claims_store import read_arrow
+
+            with self._lock:
+                if self.frames[depth] is None:
+                    frame = read_arrow(self._level_path(depth))
+                    self.ranges[depth] = _parent_ranges(frame, LEVELS[:depth])
+                    self.frames[depth] = frame
+        return self.frames[depth]
+
+    # -----------------------------
+    # QUERIES
+    # -----------------------------
+    def node(self, path=()):
+        """Metrics of the node at ``path`` (the whole data set for ``()``)."""
+        if not path:
+            return dict(self.totals)
+        siblings = self._siblings(len(path) - 1, path[:-1])
+        row = siblings[siblings[LEVELS[len(path) - 1]] == path[-1]]
+        return {m: row[m].iloc[0] for m in METRICS} if len(row) else None
+
+    def child_count(self, path=(), query=None):
+        """Number of children of ``path`` (matching ``query``, if given)."""
+        return len(self._children(path, "TOTAL_CLAIM_COST", query))
+
+    def child_names(self, path=(), k=TOP_K, sort="TOTAL_CLAIM_COST", offset=0, query=None):
+        """Names of ``k`` children of ``path`` by ``sort``, from ``offset`` and matching ``query``."""
+        children = self._children(path, sort, query)
+        return children.iloc[offset:offset + k][LEVELS[len(path)]].tolist()
+
+    def _siblings(self, depth, parent):
+        frame = self._level(depth)
+        start, stop = self.ranges[depth].get(tuple(parent), (0, 0))
+        return frame.iloc[start:stop]
+
+    def _children(self, path, sort, query=None):
+        children = self._siblings(len(path), path)
+        if query:
+            names = children[LEVELS[len(path)]].astype(str)
+            children = children[names.str.contains(query, case=False, regex=False).to_numpy()]
+        if sort != "TOTAL_CLAIM_COST":
+            children = children.sort_values(sort, ascending=False, kind="stable")
+        return children
+
+    def children(self, path=(), k=TOP_K, sort="TOTAL_CLAIM_COST"):
+        """Top ``k`` children of ``path`` by ``sort``, plus an "Other" row for the rest."""
+        level = LEVELS[len(path)]
+        children = self._children(path, sort)
+        view = children.head(k)[[level] + METRICS].rename(columns={level: "NAME"})
+
+        rest = children.iloc[k:]
+        if len(rest):
+            other = rest[METRICS].sum()
+            if level not in ADDITIVE_PATIENTS:
+                other["PATIENTS"] = np.nan
+            view = pd.concat(
+                [view, pd.DataFrame([{"NAME": f"{OTHER} ({len(rest):,} more)", **other}])], ignore_index=True
+            )
+
+        view = view.reset_index(drop=True).astype(
+            {"CLAIMS": "int64", "DIABETES_CLAIMS": "int64", "DIALYSIS_CLAIMS": "int64", "PATIENTS": "Int64"}
+        )
+        view["AVG_CLAIM_COST"] = view["TOTAL_CLAIM_COST"] / view["CLAIMS"]
+        total_cost = children["TOTAL_CLAIM_COST"].sum()
+        view["COST_SHARE"] = view["TOTAL_CLAIM_COST"] / total_cost if total_cost else np.nan
+        return view
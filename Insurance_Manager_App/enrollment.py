@@ -0,0 +1,126 @@
+"""Enrolled member-months per month × payer from payer_transitions coverage intervals.
+
+A member counts towards a month when their coverage includes the first day
+of that month, so a member switching payers mid-month is counted once (for
+the payer they had on the 1st). END_DATE is exclusive: an interval ending on
+the 1st does not cover it, so back-to-back intervals sharing that date count
+the member once. Every interval adds +1 at its first counted
+month and -1 after its last one in a ``(payer, month)`` difference array; a
+cumulative sum along the months gives the enrolled members, without ever
+expanding an interval into one row per member-month.
+
+    python enrollment.py
+"""
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from claims_store import active_path
+
+# -----------------------------
+# FILE PATHS
+# -----------------------------
+TRANSITIONS_PATH = "data/payer_transitions.csv"
+MEMBER_MONTHS_PATH = "data/member_months.csv"
+
+
+def _to_datetime(series):
+    return pd.to_datetime(series, errors="coerce", utc=True, format="ISO8601").dt.tz_localize(None)
+
+
+def _month_number(dates):
+    """Months since 1970-01 (the pandas monthly Period ordinal)."""
+    return (dates.dt.year - 1970) * 12 + dates.dt.month - 1
+
+
+def member_months(transitions, through=None):
+    """Enrolled members per (MONTH, PAYER) from START_DATE/END_DATE intervals.
+
+    Open intervals (no END_DATE) and intervals ending after ``through``
+    (default: today) are counted up to ``through``. Returns MONTH (``YYYY-MM``),
+    PAYER and MEMBER_MONTHS, without payer-months that have no members.
+    """
+    through = pd.Timestamp.now() if through is None else pd.Timestamp(through)
+    start = _to_datetime(transitions["START_DATE"])
+    # Last covered instant: END_DATE itself is not covered
+    end = (_to_datetime(transitions["END_DATE"]) - pd.Timedelta(1, "ns")).fillna(through).clip(upper=through)
+
+    # First month whose 1st day is covered, and last month whose 1st day is covered
+    first = (_month_number(start) + (start.dt.day > 1)).to_numpy()
+    last = _month_number(end).to_numpy()
+    codes, payers = pd.factorize(transitions["PAYER"])
+
+    valid = start.notna().to_numpy() & (codes >= 0) & (last >= first)
+    first, last, codes = first[valid].astype("int64"), last[valid].astype("int64"), codes[valid]
+    if not len(first):
+        return pd.DataFrame({"MONTH": [], "PAYER": [], "MEMBER_MONTHS": []})
+
+    base = first.min()
+    width = last.max() - base + 2
+    size = len(payers) * width
+    diff = (
+        np.bincount(codes * width + (first - base), minlength=size)
+        - np.bincount(codes * width + (last - base + 1), minlength=size)
+    )
+    members = diff.reshape(len(payers), width)[:, :-1].cumsum(axis=1)
+
+    months = pd.period_range(pd.Period("1970-01", freq="M") + int(base), periods=width - 1, freq="M")
+    payer_idx, month_idx = np.nonzero(members)
+    return pd.DataFrame({
+        "MONTH": months.astype(str)[month_idx],
+        "PAYER": payers[payer_idx],
+        "MEMBER_MONTHS": members[payer_idx, month_idx],
+    }).sort_values(["MONTH", "PAYER"], ignore_index=True)
+
+
+def load_member_months(path=MEMBER_MONTHS_PATH):
+    """Member-months of the active dataset version, or None if they have not been computed."""
+    path = active_path(path)
+    if not os.path.exists(path):
+        return None
+    return pd.read_csv(path)
+
+
+def monthly_members(enrollment, payers=None):
+    """Enrolled members per MONTH, summed over ``payers`` (all if empty)."""
+    if payers:
+        enrollment = enrollment[enrollment["PAYER"].isin(payers)]
+    return enrollment.groupby("MONTH")["MEMBER_MONTHS"].sum()
+
+
+def period_member_months(enrollment, freq="Q", payers=None, rolling=None, start=None, end=None):
+    """Member-months per period, labelled like ``MemberSketchRollup.by_period``.
+
+    ``freq`` is a pandas period alias; with ``rolling=n`` the periods are
+    trailing ``n``-month windows ending at every month. ``start``/``end``
+    (monthly periods) restrict the months counted, e.g. to the claims range.
+    """
+    members = monthly_members(enrollment, payers)
+    if members.empty:
+        return members
+    members.index = pd.PeriodIndex(members.index, freq="M")
+    start = members.index.min() if start is None else start
+    end = members.index.max() if end is None else end
+    members = members.reindex(pd.period_range(start, end, freq="M"), fill_value=0)
+
+    if rolling:
+        members = members.rolling(rolling).sum().dropna()
+    else:
+        members = members.groupby(members.index.asfreq(freq)).sum()
+    members.index = members.index.astype(str)
+    return members
+
+
+if __name__ == "__main__":
+    print("🧩 Loading payer transitions...")
+    transitions = pd.read_csv(TRANSITIONS_PATH, usecols=["PATIENT", "PAYER", "START_DATE", "END_DATE"])
+
+    start = time.perf_counter()
+    enrollment = member_months(transitions)
+    print(f"✅ {len(transitions):,} intervals → {enrollment['MEMBER_MONTHS'].sum():,} member-months "
+          f"in {time.perf_counter() - start:.2f}s")
+
+    enrollment.to_csv(MEMBER_MONTHS_PATH, index=False)
+    print(f"💾 Member-months saved to {MEMBER_MONTHS_PATH}")
@@ -0,0 +1,125 @@
+"""Per-feature contributions of the forest models, computed in batches.
+
+Tree-path (Saabas) attribution: along a sample's path through a tree, every
+split moves the node value from the parent's to the child's; that change is
+credited to the split feature. Summed over the path and averaged over the
+trees, a prediction becomes::
+
+    prediction = bias + sum(contribution per feature)
+
+where ``bias`` is the forest's mean root value (the training mean).
+
+Instead of walking paths one sample at a time, the summed contributions
+along the path to every node are computed once per model, one tree level at
+a time for all trees together. Explaining a batch is then a single
+``forest.apply`` (leaf of every sample in every tree) followed by a gather
+of those leaves' rows and a mean over the trees. Batches are spread over a
+thread pool (the tree traversal in ``apply`` releases the GIL).
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from model_registry import load_model, model_info
+
+BATCH_ROWS = 2000
+WORKERS = min(8, os.cpu_count() or 1)
+
+_lock = threading.Lock()
+_explainers = {}  # (model name, version, digest) -> ForestExplainer
+
+
+class ForestExplainer:
+    """Contribution engine for a fitted RandomForestRegressor/Classifier.
+
+    For classifiers the contributions explain the probability of
+    ``positive_class``.
+    """
+
+    def __init__(self, forest, positive_class=1):
+        self.forest = forest
+        self.features = [str(f) for f in forest.feature_names_in_]
+        classes = getattr(forest, "classes_", None)
+        class_index = None if classes is None else int(np.flatnonzero(classes == positive_class)[0])
+
+        # All trees' node arrays concatenated, child ids shifted to global ids
+        values, lefts, rights, features, offsets = [], [], [], [], []
+        offset = 0
+        for estimator in forest.estimators_:
+            tree = estimator.tree_
+            value = tree.value[:, 0, :]
+            if class_index is not None:
+                value = value[:, class_index] / value.sum(axis=1)
+            else:
+                value = value[:, 0]
+            values.append(value)
+            lefts.append(np.where(tree.children_left >= 0, tree.children_left + offset, -1))
+            rights.append(np.where(tree.children_right >= 0, tree.children_right + offset, -1))
+            features.append(tree.feature)
+            offsets.append(offset)
+            offset += tree.node_count
+        value, left, right, feature = map(np.concatenate, (values, lefts, rights, features))
+        self._offsets = np.array(offsets)
+
+        # Contributions summed along the path from the root to every node,
+        # filled one level at a time for all trees together
+        path = np.zeros((offset, len(self.features)))
+        level = self._offsets[left[self._offsets] >= 0]
+        while level.size:
+            for children in (left[level], right[level]):
+                path[children] = path[level]
+                path[children, feature[level]] += value[children] - value[level]
+            level = np.concatenate([left[level], right[level]])
+            level = level[left[level] >= 0]
+
+        self.bias = float(value[self._offsets].mean())
+        self._path = path
+
+    def _batch(self, X):
+        leaves = self.forest.apply(X) + self._offsets
+        return self._path[leaves].mean(axis=1)
+
+    def contributions(self, X, batch_size=BATCH_ROWS, workers=WORKERS):
+        """Frame of per-feature contributions plus BIAS and PREDICTION, indexed like ``X``."""
+        X = X[self.features]
+        starts = range(0, len(X), batch_size)
+        batches = [X.iloc[s:s + batch_size] for s in starts]
+        if len(batches) > 1 and workers > 1:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                parts = list(pool.map(self._batch, batches))
+        else:
+            parts = [self._batch(b) for b in batches]
+        values = np.vstack(parts) if parts else np.empty((0, len(self.features)))
+
+        out = pd.DataFrame(values, index=X.index, columns=self.features)
+        out["BIAS"] = self.bias
+        out["PREDICTION"] = self.bias + values.sum(axis=1)
+        return out
+
+
+def explainer(name):
+    """Explainer of the current registry version of ``name``, built once per process."""
+    info = model_info(name)
+    if info is None:
+        return None
+    key = (name, info["version"], info["digest"])
+    with _lock:
+        found = _explainers.get(key)
+    if found is None:
+        found = ForestExplainer(load_model(name))
+        with _lock:
+            for old in [k for k in _explainers if k[0] == name]:
+                del _explainers[old]
+            _explainers[key] = found
+    return found
+
+
+def explain(name, X, batch_size=BATCH_ROWS, workers=WORKERS):
+    """Per-feature contributions of model ``name`` for the rows of ``X``."""
+    engine = explainer(name)
+    if engine is None:
+        raise FileNotFoundError(f"Model {name!r} is not in the registry")
+    return engine.contributions(X, batch_size, workers)
@@ -0,0 +1,143 @@
+"""Batched Fourier-seasonality regression forecaster, a fast alternative to Prophet.
+
+All series share one design matrix (intercept, linear trend and yearly
+Fourier terms on the month index), so fitting hundreds of payer or
+organization series is a single least-squares solve over a
+``(months, series)`` matrix.
+"""
+import time
+
+import numpy as np
+import pandas as pd
+
+# Yearly seasonality harmonics; 3 pairs capture most monthly claim patterns.
+FOURIER_ORDER = 3
+PERIOD = 12
+# Small ridge penalty so short series do not blow up the seasonal terms.
+RIDGE = 1e-3
+
+
+def monthly_matrix(df, key, months=None):
+    """Pivot claims to a ``(month, key)`` matrix of total cost, missing months filled with 0."""
+    if months is None:
+        months = df["ENCOUNTER_DATE"].dt.to_period("M")
+    table = (
+        df.groupby([months.rename("MONTH"), df[key]], observed=True)["TOTAL_CLAIM_COST"]
+        .sum()
+        .unstack(fill_value=0.0)
+        .sort_index()
+    )
+    full_range = pd.period_range(table.index.min(), table.index.max(), freq="M")
+    return table.reindex(full_range, fill_value=0.0)
+
+
+def design_matrix(t):
+    """Intercept, trend and Fourier columns for month indices ``t``."""
+    t = np.asarray(t, dtype="float64")
+    columns = [np.ones_like(t), t]
+    for k in range(1, FOURIER_ORDER + 1):
+        angle = 2 * np.pi * k * t / PERIOD
+        columns += [np.sin(angle), np.cos(angle)]
+    return np.column_stack(columns)
+
+
+def fit(Y):
+    """Fit every column of ``Y`` (months × series) at once; returns the coefficient matrix."""
+    Y = np.asarray(Y, dtype="float64")
+    X = design_matrix(np.arange(Y.shape[0]))
+    gram = X.T @ X + RIDGE * np.eye(X.shape[1])
+    return np.linalg.solve(gram, X.T @ Y)
+
+
+def predict(coef, start, periods):
+    """Predict ``periods`` months for every series starting at month index ``start``."""
+    return design_matrix(np.arange(start, start + periods)) @ coef
+
+
+def forecast_matrix(table, periods=12):
+    """Fit all series in ``table`` and forecast ``periods`` months ahead.
+
+    Returns a ``(future month, series)`` DataFrame of forecast cost, clipped at 0.
+    """
+    coef = fit(table.to_numpy())
+    future = predict(coef, len(table), periods)
+    future_index = pd.period_range(table.index[-1] + 1, periods=periods, freq="M")
+    return pd.DataFrame(np.clip(future, 0, None), index=future_index, columns=table.columns)
+
+
+def forecast_long(table, periods=12):
+    """Fitted history plus forecast for every series in Prophet's layout.
+
+    Returns one row per (SERIES, ds) with ``yhat`` and a ±1.96σ residual band
+    in ``yhat_lower``/``yhat_upper``, all clipped at 0 like ``forecast_matrix``.
+    """
+    Y = table.to_numpy(dtype="float64")
+    n_months, n_series = Y.shape
+    fitted = predict(fit(Y), 0, n_months + periods)
+    sigma = np.sqrt(np.mean((Y - fitted[:n_months]) ** 2, axis=0))
+
+    ds = pd.period_range(table.index[0], periods=n_months + periods, freq="M").to_timestamp()
+    return pd.DataFrame({
+        "SERIES": np.tile(np.asarray(table.columns), n_months + periods),
+        "ds": np.repeat(ds, n_series),
+        "yhat": np.clip(fitted, 0, None).ravel(),
+        "yhat_lower": np.clip(fitted - 1.96 * sigma, 0, None).ravel(),
+        "yhat_upper": np.clip(fitted + 1.96 * sigma, 0, None).ravel(),
+    })
+
+
+def forecast_all(table, periods=12):
+    """Forecast every series of a ``monthly_matrix`` table in one batch.
+
+    Returns the long forecast frame and the seconds spent fitting and predicting.
+    """
+    start = time.perf_counter()
+    forecast = forecast_long(table, periods)
+    return forecast, time.perf_counter() - start
+
+
+# -----------------------------
+# ACCURACY
+# -----------------------------
+def mape(actual, predicted):
+    """Mean absolute percentage error in %, ignoring months with zero actual cost."""
+    actual = np.asarray(actual, dtype="float64")
+    predicted = np.asarray(predicted, dtype="float64")
+    mask = actual != 0
+    if not mask.any():
+        return float("nan")
+    return float(np.mean(np.abs((actual[mask] - predicted[mask]) / actual[mask])) * 100)
+
+
+def mae(actual, predicted):
+    return float(np.mean(np.abs(np.asarray(actual, dtype="float64") - np.asarray(predicted, dtype="float64"))))
+
+
+def holdout_accuracy(series, holdout=6):
+    """Fit on all but the last ``holdout`` months of ``series`` and score the rest.
+
+    Returns MAPE, MAE and fit + predict time of the fast forecaster and Prophet.
+    """
+    values = np.asarray(series, dtype="float64")
+    train, test = values[:-holdout], values[-holdout:]
+
+    start = time.perf_counter()
+    fast_pred = predict(fit(train[:, None]), len(train), holdout)[:, 0]
+    fast_seconds = time.perf_counter() - start
+
+    from prophet import Prophet
+
+    ds = series.index[:-holdout].to_timestamp()
+    start = time.perf_counter()
+    model = Prophet(yearly_seasonality=True, daily_seasonality=False)
+    model.fit(pd.DataFrame({"ds": ds, "y": train}))
+    future = pd.DataFrame({"ds": series.index[-holdout:].to_timestamp()})
+    prophet_pred = model.predict(future)["yhat"].to_numpy()
+    prophet_seconds = time.perf_counter() - start
+
+    return pd.DataFrame([
+        {"Model": "Fast (Fourier regression)", "MAPE %": mape(test, fast_pred),
+         "MAE": mae(test, fast_pred), "Fit + predict (s)": fast_seconds},
+        {"Model": "Prophet", "MAPE %": mape(test, prophet_pred),
+         "MAE": mae(test, prophet_pred), "Fit + predict (s)": prophet_seconds},
+    ])
@@ -0,0 +1,166 @@
+"""Patient–organization–payer graph patterns that hint at collusive fraud.
+
+The claims become sparse bipartite incidence matrices (patient ×
+organization, organization × payer, patient × payer). From them:
+
+- **Shared patients** — ``B.T @ B`` of the binary patient × organization
+  matrix counts, for every pair of organizations, the patients they both
+  billed. A pair is unusual when that overlap is far above what two
+  organizations of their size would share by chance (``LIFT``).
+- **Provider clusters** — organizations linked by unusual overlaps, split
+  into connected components. Tight clusters billing mostly one payer are
+  the classic referral-ring pattern.
+- **Patient hopping** — patients visiting many organizations or switching
+  organization at almost every claim.
+
+Only sparse products and vectorized sorts are used, so millions of claims
+(edges) fit in memory on one machine.
+"""
+import numpy as np
+import pandas as pd
+
+# A pair of organizations needs this many shared patients to be considered,
+# and this many times the overlap expected by chance to be unusual.
+MIN_SHARED_PATIENTS = 3
+MIN_LIFT = 3.0
+# Clusters only follow unusual pairs whose patient lists overlap this much,
+# so one busy hospital does not chain everybody into a single component.
+MIN_JACCARD = 0.2
+# Patients above this quantile of distinct organizations are reported.
+HOPPER_QUANTILE = 0.99
+TOP_ROWS = 50
+
+
+def _incidence(rows, cols, shape):
+    from scipy import sparse
+
+    return sparse.csr_matrix((np.ones(len(rows), dtype="float32"), (rows, cols)), shape=shape)
+
+
+def shared_patient_pairs(binary, n_patients, min_shared=MIN_SHARED_PATIENTS):
+    """Organization pairs with their shared patients, Jaccard overlap and lift over chance."""
+    from scipy import sparse
+
+    shared = sparse.triu(binary.T @ binary, k=1).tocoo()
+    keep = shared.data >= min_shared
+    i, j, count = shared.row[keep], shared.col[keep], shared.data[keep].astype("int64")
+
+    size = np.asarray(binary.sum(axis=0)).ravel()
+    expected = size[i] * size[j] / max(n_patients, 1)
+    return pd.DataFrame({
+        "ORG_A": i,
+        "ORG_B": j,
+        "SHARED_PATIENTS": count,
+        "PATIENTS_A": size[i].astype("int64"),
+        "PATIENTS_B": size[j].astype("int64"),
+        "JACCARD": count / (size[i] + size[j] - count),
+        "LIFT": count / expected,
+    })
+
+
+def _empty_result(n_patients, n_payers):
+    """``analyze`` output for claims without any organization."""
+    return {
+        "summary": {
+            "edges": 0, "patients": n_patients, "organizations": 0, "payers": n_payers,
+            "candidate_pairs": 0, "unusual_pairs": 0, "clusters": 0, "hoppers": 0, "hopper_threshold": 3.0,
+        },
+        "pairs": pd.DataFrame(columns=["ORG_A", "ORG_B", "SHARED_PATIENTS", "PATIENTS_A", "PATIENTS_B", "JACCARD", "LIFT"]),
+        "clusters": pd.DataFrame(columns=[
+            "CLUSTER", "ORGANIZATIONS", "PATIENTS", "CLAIMS", "TOTAL_CLAIM_COST", "TOP_PAYER", "TOP_PAYER_SHARE", "MEMBERS",
+        ]),
+        "hoppers": pd.DataFrame(columns=["PATIENT", "CLAIMS", "ORGANIZATIONS", "PAYERS", "SWITCHES", "SWITCH_RATE"]),
+        "orgs_per_patient": pd.Series(dtype="int64", name="count"),
+    }
+
+
+def analyze(df, min_shared=MIN_SHARED_PATIENTS, min_lift=MIN_LIFT, min_jaccard=MIN_JACCARD,
+            hopper_quantile=HOPPER_QUANTILE):
+    """Shared-patient pairs, provider clusters, patient hoppers and a summary."""
+    from scipy import sparse
+    from scipy.sparse.csgraph import connected_components
+
+    payer_column = "PAYER_NAME" if "PAYER_NAME" in df.columns else "PAYER"
+    patient, patient_names = pd.factorize(df["PATIENT"])
+    org, org_names = pd.factorize(df["ORGANIZATION"])
+    payer, payer_names = pd.factorize(df[payer_column])
+    keep = (patient >= 0) & (org >= 0)
+    patient, org, payer = patient[keep], org[keep], payer[keep]
+    cost = df["TOTAL_CLAIM_COST"].to_numpy(dtype="float64")[keep]
+    n_patients, n_orgs, n_payers = len(patient_names), len(org_names), len(payer_names)
+    if n_orgs == 0:
+        return _empty_result(n_patients, n_payers)
+
+    patient_org = _incidence(patient, org, (n_patients, n_orgs))
+    binary = (patient_org > 0).astype("float32")
+    with_payer = payer >= 0
+    org_payer = _incidence(org[with_payer], payer[with_payer], (n_orgs, n_payers))
+    patient_payer = _incidence(patient[with_payer], payer[with_payer], (n_patients, n_payers))
+
+    # Shared patients between organizations
+    pairs = shared_patient_pairs(binary, n_patients, min_shared)
+    unusual = pairs[pairs["LIFT"] >= min_lift]
+
+    # Clusters: connected components of the strongly overlapping unusual pairs
+    ties = unusual[unusual["JACCARD"] >= min_jaccard]
+    links = sparse.coo_matrix(
+        (np.ones(len(ties)), (ties["ORG_A"], ties["ORG_B"])), shape=(n_orgs, n_orgs)
+    )
+    _, label = connected_components(links, directed=False)
+    size = np.bincount(label, minlength=label.max() + 1)
+    member = _incidence(np.arange(n_orgs), label, (n_orgs, len(size)))
+    cluster_payer = (member.T @ org_payer).toarray()
+    top_payer = cluster_payer.argmax(axis=1)
+    clusters = pd.DataFrame({
+        "CLUSTER": np.arange(len(size)),
+        "ORGANIZATIONS": size,
+        "PATIENTS": ((binary @ member) > 0).getnnz(axis=0),
+        "CLAIMS": np.bincount(label[org], minlength=len(size)),
+        "TOTAL_CLAIM_COST": np.bincount(label[org], weights=cost, minlength=len(size)),
+        "TOP_PAYER": np.asarray(payer_names, dtype=object)[top_payer] if n_payers else None,
+        "TOP_PAYER_SHARE": cluster_payer.max(axis=1) / np.maximum(cluster_payer.sum(axis=1), 1),
+    })
+    clusters = clusters[clusters["ORGANIZATIONS"] > 1].sort_values(
+        ["ORGANIZATIONS", "TOTAL_CLAIM_COST"], ascending=False, ignore_index=True
+    )
+    cluster_members = pd.Series(np.asarray(org_names, dtype=object)).groupby(label).agg(list)
+    clusters["MEMBERS"] = clusters["CLUSTER"].map(cluster_members)
+
+    # Patient hopping: distinct organizations/payers and organization switches in date order
+    order = np.lexsort((df["ENCOUNTER_DATE"].to_numpy()[keep], patient))
+    p, o = patient[order], org[order]
+    switched = (p[1:] == p[:-1]) & (o[1:] != o[:-1])
+    hoppers = pd.DataFrame({
+        "PATIENT": patient_names,
+        "CLAIMS": np.bincount(patient, minlength=n_patients),
+        "ORGANIZATIONS": binary.getnnz(axis=1),
+        "PAYERS": patient_payer.getnnz(axis=1),
+        "SWITCHES": np.bincount(p[1:][switched], minlength=n_patients),
+    })
+    hoppers["SWITCH_RATE"] = hoppers["SWITCHES"] / np.maximum(hoppers["CLAIMS"] - 1, 1)
+    threshold = max(3, hoppers["ORGANIZATIONS"].quantile(hopper_quantile))
+    flagged = hoppers[hoppers["ORGANIZATIONS"] >= threshold].sort_values(
+        ["ORGANIZATIONS", "SWITCH_RATE"], ascending=False, ignore_index=True
+    )
+
+    names = pd.Series(np.asarray(org_names, dtype=object))
+    top_pairs = unusual.sort_values(["LIFT", "SHARED_PATIENTS"], ascending=False).head(TOP_ROWS)
+    top_pairs = top_pairs.assign(ORG_A=names[top_pairs["ORG_A"]].to_numpy(), ORG_B=names[top_pairs["ORG_B"]].to_numpy())
+
+    return {
+        "summary": {
+            "edges": int(patient_org.nnz + org_payer.nnz),
+            "patients": n_patients,
+            "organizations": n_orgs,
+            "payers": n_payers,
+            "candidate_pairs": len(pairs),
+            "unusual_pairs": len(unusual),
+            "clusters": len(clusters),
+            "hoppers": len(flagged),
+            "hopper_threshold": float(threshold),
+        },
+        "pairs": top_pairs.reset_index(drop=True),
+        "clusters": clusters.head(TOP_ROWS),
+        "hoppers": flagged.head(TOP_ROWS),
+        "orgs_per_patient": hoppers["ORGANIZATIONS"].value_counts().sort_index(),
+    }
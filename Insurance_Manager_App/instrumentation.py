@@ -0,0 +1,266 @@
+"""Timing spans, row counts, memory and cache counters for page runs.
+
+Each page calls ``start_run`` at the top and ``finish_run`` in a ``finally``
+around its body (so runs cut short by ``st.stop()`` or an exception are
+logged too) and wraps its hot sections in ``span``. Finished runs are
+appended to ``logs/page_runs.jsonl`` and the process totals are rewritten as
+a Prometheus text file, ``logs/dashboard_<pid>.prom``, after every run.
+"""
+import glob
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# -----------------------------
+# FILE PATHS
+# -----------------------------
+LOG_DIR = "logs"
+RUNS_LOG_PATH = os.path.join(LOG_DIR, "page_runs.jsonl")
+METRICS_PATH = os.path.join(LOG_DIR, f"dashboard_{os.getpid()}.prom")
+
+# Spans recorded outside a page run (background jobs, warm-up) go here.
+BACKGROUND = "background"
+
+_local = threading.local()
+_lock = threading.Lock()
+_span_totals = {}   # (page, span) -> [count, seconds, rows]
+_cache_totals = {}  # cache -> [hits, misses]
+_page_runs = {}     # page -> [count, seconds]
+
+
+def peak_rss_mb():
+    """Process-lifetime peak resident set size in MB, or None if unavailable."""
+    if resource is None:
+        return None
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def current_rss_mb():
+    """Current resident set size of this process in MB, or None without /proc."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class PageRun:
+    """Spans and cache events collected during one execution of a page script.
+
+    ``rss_delta_mb`` is the change of the process RSS over the run; with
+    concurrent sessions it also includes what the others allocated.
+    """
+
+    def __init__(self, page):
+        self.page = page
+        self.started = datetime.now().isoformat(timespec="seconds")
+        self.spans = []
+        self.cache = {}
+        self._start = time.perf_counter()
+        self._start_rss = current_rss_mb()
+
+    def to_dict(self):
+        rss = current_rss_mb()
+        return {
+            "page": self.page,
+            "started": self.started,
+            "seconds": round(time.perf_counter() - self._start, 6),
+            "rss_mb": rss,
+            "rss_delta_mb": None if rss is None or self._start_rss is None else round(rss - self._start_rss, 3),
+            "process_peak_rss_mb": peak_rss_mb(),
+            "status": _run_status(),
+            "spans": self.spans,
+            "cache": self.cache,
+        }
+
+
+def _run_status():
+    """How the script is ending: completed, stopped (st.stop / rerun) or error."""
+    exc = sys.exc_info()[1]
+    if exc is None:
+        return "completed"
+    if type(exc).__name__ in ("StopException", "RerunException"):
+        return "stopped"
+    return "error"
+
+
+def current_run():
+    return getattr(_local, "run", None)
+
+
+def start_run(page):
+    """Begin collecting metrics for ``page`` on the current script thread."""
+    _local.run = PageRun(page)
+    return _local.run
+
+
+@contextmanager
+def span(name, rows=None):
+    """Time a block. The yielded dict accepts a ``rows`` count set inside the block."""
+    record = {"name": name, "rows": rows}
+    start = time.perf_counter()
+    try:
+        yield record
+    finally:
+        record["seconds"] = round(time.perf_counter() - start, 6)
+        run = current_run()
+        page = run.page if run is not None else BACKGROUND
+        if run is not None:
+            run.spans.append(record)
+        with _lock:
+            totals = _span_totals.setdefault((page, name), [0, 0.0, 0])
+            totals[0] += 1
+            totals[1] += record["seconds"]
+            totals[2] += record["rows"] or 0
+
+
+def cache_event(cache, hit):
+    """Count a hit or miss on a named cache."""
+    run = current_run()
+    if run is not None:
+        counts = run.cache.setdefault(cache, {"hits": 0, "misses": 0})
+        counts["hits" if hit else "misses"] += 1
+    with _lock:
+        totals = _cache_totals.setdefault(cache, [0, 0])
+        totals[0 if hit else 1] += 1
+
+
+def finish_run():
+    """Close the current run and export it as a JSON line and Prometheus metrics."""
+    run = current_run()
+    if run is None:
+        return None
+    _local.run = None
+
+    record = run.to_dict()
+    with _lock:
+        totals = _page_runs.setdefault(run.page, [0, 0.0])
+        totals[0] += 1
+        totals[1] += record["seconds"]
+
+    os.makedirs(LOG_DIR, exist_ok=True)
+    with open(RUNS_LOG_PATH, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record) + "\n")
+    write_prometheus()
+    return record
+
+
+# -----------------------------
+# EXPORT
+# -----------------------------
+def _labels(**labels):
+    return ",".join(f'{k}="{v}"' for k, v in labels.items())
+
+
+def prometheus_text():
+    """Process totals in the Prometheus text exposition format."""
+    lines = []
+    with _lock:
+        lines += [
+            "# HELP dashboard_page_runs_total Completed page script runs.",
+            "# TYPE dashboard_page_runs_total counter",
+        ]
+        lines += [f"dashboard_page_runs_total{{{_labels(page=p)}}} {c}" for p, (c, _) in _page_runs.items()]
+        lines += [
+            "# HELP dashboard_page_seconds_total Wall time spent in page script runs.",
+            "# TYPE dashboard_page_seconds_total counter",
+        ]
+        lines += [f"dashboard_page_seconds_total{{{_labels(page=p)}}} {s:.6f}" for p, (_, s) in _page_runs.items()]
+        lines += [
+            "# HELP dashboard_span_seconds_total Time spent in instrumented spans.",
+            "# TYPE dashboard_span_seconds_total counter",
+        ]
+        lines += [
+            f"dashboard_span_seconds_total{{{_labels(page=p, span=n)}}} {s:.6f}"
+            for (p, n), (_, s, _) in _span_totals.items()
+        ]
+        lines += [
+            "# HELP dashboard_span_count_total Number of times each span ran.",
+            "# TYPE dashboard_span_count_total counter",
+        ]
+        lines += [
+            f"dashboard_span_count_total{{{_labels(page=p, span=n)}}} {c}"
+            for (p, n), (c, _, _) in _span_totals.items()
+        ]
+        lines += [
+            "# HELP dashboard_span_rows_total Rows processed by each span.",
+            "# TYPE dashboard_span_rows_total counter",
+        ]
+        lines += [
+            f"dashboard_span_rows_total{{{_labels(page=p, span=n)}}} {r}"
+            for (p, n), (_, _, r) in _span_totals.items()
+        ]
+        lines += [
+            "# HELP dashboard_cache_requests_total Cache lookups by result.",
+            "# TYPE dashboard_cache_requests_total counter",
+        ]
+        for cache, (hits, misses) in _cache_totals.items():
+            lines.append(f"dashboard_cache_requests_total{{{_labels(cache=cache, result='hit')}}} {hits}")
+            lines.append(f"dashboard_cache_requests_total{{{_labels(cache=cache, result='miss')}}} {misses}")
+
+    rss = current_rss_mb()
+    if rss is not None:
+        lines += [
+            "# HELP dashboard_rss_megabytes Current resident memory of this process.",
+            "# TYPE dashboard_rss_megabytes gauge",
+            f"dashboard_rss_megabytes {rss:.1f}",
+        ]
+    peak = peak_rss_mb()
+    if peak is not None:
+        lines += [
+            "# HELP dashboard_peak_rss_megabytes Peak resident memory of this process since it started.",
+            "# TYPE dashboard_peak_rss_megabytes gauge",
+            f"dashboard_peak_rss_megabytes {peak:.1f}",
+        ]
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus():
+    os.makedirs(LOG_DIR, exist_ok=True)
+    # Every session thread writes the metrics file; give each its own temp file
+    tmp_path = f"{METRICS_PATH}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(prometheus_text())
+    os.replace(tmp_path, METRICS_PATH)
+
+
+def read_prometheus(log_dir=LOG_DIR):
+    """Samples of every server process's ``dashboard_<pid>.prom`` export."""
+    samples = []
+    for path in sorted(glob.glob(os.path.join(log_dir, "dashboard_*.prom"))):
+        pid = os.path.basename(path)[len("dashboard_"):-len(".prom")]
+        try:
+            updated = datetime.fromtimestamp(os.path.getmtime(path)).isoformat(timespec="seconds")
+            with open(path, encoding="utf-8") as f:
+                lines = f.readlines()
+        except OSError:  # the process replaced or removed it meanwhile
+            continue
+        for line in lines:
+            if not line.strip() or line.startswith("#"):
+                continue
+            sample, value = line.rsplit(" ", 1)
+            metric, _, labels = sample.partition("{")
+            samples.append({
+                "pid": pid, "updated": updated, "metric": metric,
+                "labels": labels.rstrip("}"), "value": float(value),
+            })
+    return samples
+
+
+def read_runs(limit=500):
+    """The most recent page runs from the JSON log."""
+    if not os.path.exists(RUNS_LOG_PATH):
+        return []
+    with open(RUNS_LOG_PATH, encoding="utf-8") as f:
+        lines = f.readlines()[-limit:]
+    return [json.loads(line) for line in lines if line.strip()]
@@ -0,0 +1,116 @@
+"""Deferred imports for heavy libraries and a per-page import-time report."""
+import ast
+import importlib
+import os
+import subprocess
+import sys
+import time
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# First-import cost (seconds) of every module loaded through a LazyModule.
+IMPORT_TIMES = {}
+
+
+class LazyModule:
+    """Module proxy that imports the real module on first attribute access."""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            start = time.perf_counter()
+            self._module = importlib.import_module(self._name)
+            IMPORT_TIMES.setdefault(self._name, time.perf_counter() - start)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module {self._name!r} ({state})>"
+
+
+def lazy_module(name):
+    """Return a proxy for ``name`` that defers the import until it is used."""
+    return LazyModule(name)
+
+
+# -----------------------------
+# IMPORT-TIME REPORT
+# -----------------------------
+def page_imports(path):
+    """Split the imports of a page into eager (module level) and deferred ones."""
+    tree = ast.parse(open(path, encoding="utf-8").read(), filename=path)
+    top_level = set(id(node) for node in tree.body)
+    eager, deferred = [], []
+
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module:
+            names = [node.module]
+        elif (
+            isinstance(node, ast.Call)
+            and isinstance(node.func, ast.Name)
+            and node.func.id == "lazy_module"
+            and node.args
+            and isinstance(node.args[0], ast.Constant)
+        ):
+            deferred.append(node.args[0].value)
+            continue
+        else:
+            continue
+        (eager if id(node) in top_level else deferred).extend(names)
+
+    eager = list(dict.fromkeys(eager))
+    deferred = [m for m in dict.fromkeys(deferred) if m not in eager]
+    return eager, deferred
+
+
+def _time_imports(modules):
+    # A fresh interpreter per measurement, so nothing is already cached.
+    code = (
+        "import time; start = time.perf_counter()\n"
+        + "".join(f"import {m}\n" for m in modules)
+        + "print(time.perf_counter() - start)"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=APP_DIR, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        return float("nan")
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def import_report():
+    """Cold import time of every page, before and after its deferred sections."""
+    rows = []
+    pages = sorted(
+        (f for f in os.listdir(APP_DIR) if f.split("_", 1)[0].isdigit() and f.endswith(".py")),
+        key=lambda f: int(f.split("_", 1)[0]),
+    )
+    for page in ["app.py"] + pages:
+        eager, deferred = page_imports(os.path.join(APP_DIR, page))
+        rows.append({
+            "PAGE": page,
+            "EAGER_IMPORTS": ", ".join(eager),
+            "DEFERRED_IMPORTS": ", ".join(deferred),
+            "COLD_START_S": _time_imports(eager),
+            "ALL_SECTIONS_S": _time_imports(eager + deferred),
+        })
+    return rows
+
+
+if __name__ == "__main__":
+    print("⏱️ Measuring cold import time per page...")
+    for row in import_report():
+        print(
+            f"{row['PAGE']:<36} cold start {row['COLD_START_S']:6.2f}s"
+            f"   with deferred sections {row['ALL_SECTIONS_S']:6.2f}s"
+        )
+        print(f"    eager:    {row['EAGER_IMPORTS']}")
+        print(f"    deferred: {row['DEFERRED_IMPORTS'] or '-'}")
@@ -0,0 +1,220 @@
+"""Load test: simulated concurrent users clicking through the dashboard.
+
+Every simulated user is a thread with its own Streamlit session per page
+(Streamlit's script runner, so the real page code runs). Each user opens
+the pages of ``CLICK_PATH`` and changes their filters (month, year, payer)
+to random values a few times. All sessions share this one process, like
+sessions of one ``streamlit run`` server, so the process-wide caches and
+memory behave as they would in production.
+
+Concurrency is raised step by step; for each level the run reports the
+p50/p95/p99 latency per page, throughput and the resident memory of the
+process.
+
+    python Insurance_Manager_App/load_test.py --users 1,4,16 --rounds 3
+"""
+import argparse
+import os
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+import instrumentation
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# -----------------------------
+# SCENARIO
+# -----------------------------
+# (page, widget type, widget label) — the filter a user changes on each page
+CLICK_PATH = [
+    ("1_Daily_View.py", "date_input", "Date range:"),
+    ("2_Weekly_Performance.py", "selectbox", "Select Year:"),
+    ("3_Monthly_Overview.py", "selectbox", "Select a Payer to Forecast:"),
+]
+FILTER_CHANGES = 3      # filter changes per page visit
+MAX_RANGE_DAYS = 90     # longest date range picked on a date_input
+THINK_SECONDS = 0.5     # mean pause between two clicks
+PAGE_TIMEOUT = 600
+RSS_SAMPLE_SECONDS = 0.2
+
+RESULTS_DIR = "logs"
+
+# The test script runner keeps some bookkeeping in process-wide state, so under
+# heavy thread concurrency it occasionally loses a session's internal keys
+# (named "$$..."). Those runs say nothing about the pages and are reported
+# apart from real page errors.
+HARNESS_ERROR_MARK = "$$"
+
+
+def current_rss_mb():
+    """Resident set size of this process in MB (peak RSS where /proc is missing)."""
+    rss = instrumentation.current_rss_mb()
+    return instrumentation.peak_rss_mb() if rss is None else rss
+
+
+class RssSampler(threading.Thread):
+    """Tracks the highest RSS seen while a concurrency level runs."""
+
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.peak = current_rss_mb() or 0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(RSS_SAMPLE_SECONDS):
+            self.peak = max(self.peak, current_rss_mb() or 0)
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+        self.peak = max(self.peak, current_rss_mb() or 0)
+        return self.peak
+
+
+# -----------------------------
+# SIMULATED USER
+# -----------------------------
+def _widget(at, kind, label):
+    return next((w for w in getattr(at, kind) if w.label == label), None)
+
+
+def _random_value(widget, rng):
+    """A random new value for a selectbox or date-range input (None if it has none)."""
+    if widget.type == "date_input":
+        span_days = (widget.max - widget.min).days
+        start = widget.min + timedelta(days=rng.randint(0, span_days))
+        end = min(widget.max, start + timedelta(days=rng.randint(0, MAX_RANGE_DAYS)))
+        return start, end
+    return rng.choice(widget.options) if widget.options else None
+
+
+def _timed(samples, user, page, action, run):
+    start = time.perf_counter()
+    try:
+        at = run()
+        errors = [e.value for e in at.exception]
+    except Exception as exc:  # a timed-out or crashed run counts as a failed request
+        at, errors = None, [repr(exc)]
+    samples.append({
+        "user": user,
+        "page": page,
+        "action": action,
+        "seconds": time.perf_counter() - start,
+        "ok": not errors,
+        "harness_error": any(HARNESS_ERROR_MARK in e for e in errors),
+        "error": errors[0][:200] if errors else None,
+    })
+    return at
+
+
+def simulate_user(user, rounds, samples, seed=0, think=THINK_SECONDS):
+    """Walk ``CLICK_PATH`` ``rounds`` times, changing each page's filter at random."""
+    from streamlit.testing.v1 import AppTest
+
+    rng = random.Random(seed * 10_007 + user)
+    for _ in range(rounds):
+        for page, kind, label in CLICK_PATH:
+            at = AppTest.from_file(os.path.join(APP_DIR, page), default_timeout=PAGE_TIMEOUT)
+            at = _timed(samples, user, page, "open", at.run)
+            for _ in range(FILTER_CHANGES):
+                widget = _widget(at, kind, label) if at is not None else None
+                value = _random_value(widget, rng) if widget is not None else None
+                if value is None:
+                    break
+                time.sleep(rng.expovariate(1 / think) if think else 0)
+                widget.set_value(value)
+                at = _timed(samples, user, page, "filter", at.run)
+
+
+# -----------------------------
+# RUN
+# -----------------------------
+def run_level(users, rounds, seed=0, think=THINK_SECONDS):
+    """Run ``users`` simulated users at once; returns their samples and the level totals."""
+    samples = []
+    sampler = RssSampler()
+    sampler.start()
+    start = time.perf_counter()
+    threads = [
+        threading.Thread(target=simulate_user, args=(u, rounds, samples, seed, think), daemon=True)
+        for u in range(users)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - start
+    totals = {
+        "users": users,
+        "requests": len(samples),
+        "errors": sum(not s["ok"] and not s["harness_error"] for s in samples),
+        "harness_errors": sum(s["harness_error"] for s in samples),
+        "wall_s": wall,
+        "throughput_rps": len(samples) / wall if wall else None,
+        "rss_mb": current_rss_mb(),
+        "peak_rss_mb": sampler.stop(),
+    }
+    return samples, totals
+
+
+def summarize(samples):
+    """p50/p95/p99 latency per (users, page) plus an ALL row per level.
+
+    Runs lost to the test harness are left out of the percentiles.
+    """
+    df = pd.DataFrame(samples)
+    df = df[~df["harness_error"]]
+    groups = [*df.groupby(["users", "page"]), *df.assign(page="ALL").groupby(["users", "page"])]
+    rows = []
+    for (users, page), g in groups:
+        p50, p95, p99 = np.percentile(g["seconds"], [50, 95, 99])
+        rows.append({
+            "users": users, "page": page, "requests": len(g), "errors": int((~g["ok"]).sum()),
+            "p50_s": p50, "p95_s": p95, "p99_s": p99, "max_s": g["seconds"].max(),
+        })
+    return pd.DataFrame(rows).round(3)
+
+
+def run(levels, rounds, seed=0, think=THINK_SECONDS):
+    all_samples, level_rows = [], []
+    for users in levels:
+        print(f"🚦 {users} concurrent user(s)...")
+        samples, totals = run_level(users, rounds, seed, think)
+        for s in samples:
+            s["users"] = users
+        all_samples += samples
+        level_rows.append(totals)
+        print(f"   {totals['requests']} requests, {totals['errors']} errors "
+              f"({totals['harness_errors']} harness), "
+              f"{totals['throughput_rps']:.2f} req/s, RSS {totals['rss_mb']:.0f} MB "
+              f"(peak {totals['peak_rss_mb']:.0f} MB)")
+    return pd.DataFrame(all_samples), summarize(all_samples), pd.DataFrame(level_rows).round(3)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", default="1,2,4,8", help="comma-separated concurrency levels")
+    parser.add_argument("--rounds", type=int, default=2, help="click-path repetitions per user")
+    parser.add_argument("--think", type=float, default=THINK_SECONDS, help="mean seconds between clicks")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    levels = [int(u) for u in args.users.split(",")]
+    samples, latency, levels_df = run(levels, args.rounds, args.seed, args.think)
+
+    with pd.option_context("display.width", 200, "display.max_columns", None):
+        print("\n⏱️ Latency per page")
+        print(latency.to_string(index=False))
+        print("\n📈 Throughput and memory per level")
+        print(levels_df.to_string(index=False))
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    stamp = f"{datetime.now():%Y%m%d-%H%M%S}"
+    samples.to_csv(os.path.join(RESULTS_DIR, f"load_test_{stamp}_samples.csv"), index=False)
+    latency.to_csv(os.path.join(RESULTS_DIR, f"load_test_{stamp}.csv"), index=False)
+    print(f"💾 Results saved to {RESULTS_DIR}/load_test_{stamp}.csv")
@@ -0,0 +1,168 @@
+"""HyperLogLog sketches of distinct members per month × payer × condition.
+
+Distinct member counts cannot be summed across months or payers, but
+HyperLogLog registers can be merged with an element-wise max. The rollup
+keeps one sketch per (MONTH, PAYER, CONDITION) cell, so the distinct members
+of any range or slice come from merging a handful of 4 KB register rows
+instead of rescanning the claims.
+
+Error: with ``P = 12`` (4,096 registers) the relative standard error of an
+estimate is 1.04 / sqrt(4096) ≈ 1.6%, i.e. about 95% of estimates fall
+within ±3.3% of the exact count. Small counts (< 2.5 × 4,096) use linear
+counting and are close to exact.
+"""
+import numpy as np
+import pandas as pd
+
+P = 12
+M = 1 << P
+ALPHA = 0.7213 / (1 + 1.079 / M)
+RELATIVE_ERROR = 1.04 / np.sqrt(M)
+
+CONDITIONS = {
+    "All members": None,
+    "Diabetes": "IsDiabetes",
+    "Dialysis": "IsDialysis",
+}
+
+
+def hash_members(values):
+    """64-bit hash of every member id (categoricals hash their categories once)."""
+    return pd.util.hash_pandas_object(pd.Series(values), index=False).to_numpy(dtype="uint64")
+
+
+def register_ranks(hashes):
+    """Register index (top ``P`` bits) and rank (leading zeros + 1 of the rest)."""
+    index = (hashes >> np.uint64(64 - P)).astype("int64")
+    rest = hashes & np.uint64((1 << (64 - P)) - 1)
+    # rest < 2**52 is exact in float64, so frexp gives its bit length.
+    _, bit_length = np.frexp(rest.astype("float64"))
+    rank = (64 - P) - bit_length + 1
+    return index, rank.astype("uint8")
+
+
+def estimate(registers):
+    """Distinct-count estimate of one register row or of each row of a 2-D array."""
+    registers = np.atleast_2d(registers)
+    raw = ALPHA * M * M / np.sum(np.exp2(-registers.astype("float64")), axis=1)
+    zeros = np.count_nonzero(registers == 0, axis=1)
+    with np.errstate(divide="ignore"):
+        linear = M * np.log(M / np.maximum(zeros, 1))
+    result = np.where((raw <= 2.5 * M) & (zeros > 0), linear, raw)
+    return result if result.shape[0] > 1 else float(result[0])
+
+
+class MemberSketchRollup:
+    """Sketches, claim cost and claim counts per (MONTH, PAYER, CONDITION)."""
+
+    def __init__(self, keys, registers, cost, claims):
+        self.keys = keys.reset_index(drop=True)
+        self.registers = registers
+        self.cost = cost
+        self.claims = claims
+
+    @classmethod
+    def build(cls, df):
+        months = df["ENCOUNTER_DATE"].dt.to_period("M")
+        payers = df["PAYER"].astype(object).fillna("Unknown")
+        index, rank = register_ranks(hash_members(df["PATIENT"]))
+        cost = df["TOTAL_CLAIM_COST"].to_numpy(dtype="float64")
+
+        parts = []
+        for condition, flag in CONDITIONS.items():
+            mask = np.ones(len(df), dtype=bool) if flag is None else (df[flag] == 1).to_numpy()
+            parts.append(pd.DataFrame({
+                "MONTH": months[mask].to_numpy(),
+                "PAYER": payers[mask].to_numpy(),
+                "CONDITION": condition,
+                "INDEX": index[mask],
+                "RANK": rank[mask],
+                "COST": cost[mask],
+            }))
+        cells = pd.concat(parts, ignore_index=True).dropna(subset=["MONTH"])
+
+        grouped = cells.groupby(["MONTH", "PAYER", "CONDITION"], sort=True)
+        group = grouped.ngroup().to_numpy()
+        summary = grouped["COST"].agg(["sum", "size"]).reset_index()
+
+        registers = np.zeros((len(summary), M), dtype="uint8")
+        best = pd.Series(cells["RANK"].to_numpy()).groupby(group * M + cells["INDEX"].to_numpy()).max()
+        registers.reshape(-1)[best.index.to_numpy()] = best.to_numpy()
+
+        return cls(
+            summary[["MONTH", "PAYER", "CONDITION"]],
+            registers,
+            summary["sum"].to_numpy(),
+            summary["size"].to_numpy(),
+        )
+
+    # -----------------------------
+    # QUERIES
+    # -----------------------------
+    def months(self):
+        return sorted(self.keys["MONTH"].unique())
+
+    def payers(self):
+        return sorted(self.keys["PAYER"].unique(), key=str)
+
+    def _mask(self, start=None, end=None, payers=None, condition="All members"):
+        mask = (self.keys["CONDITION"] == condition).to_numpy()
+        if start is not None:
+            mask &= (self.keys["MONTH"] >= start).to_numpy()
+        if end is not None:
+            mask &= (self.keys["MONTH"] <= end).to_numpy()
+        if payers:
+            mask &= self.keys["PAYER"].isin(payers).to_numpy()
+        return mask
+
+    def distinct(self, start=None, end=None, payers=None, condition="All members"):
+        """Estimated distinct members over a month range and payer/condition slice."""
+        mask = self._mask(start, end, payers, condition)
+        if not mask.any():
+            return 0.0
+        return estimate(self.registers[mask].max(axis=0))
+
+    def by_period(self, freq="Q", payers=None, condition="All members", rolling=None):
+        """Cost, distinct members and PMPM per period.
+
+        ``freq`` is a pandas period alias ("M", "Q", "Y"). With ``rolling=n`` the
+        periods are trailing windows of ``n`` months ending at every month.
+        PMPM is cost / distinct members in the period / months in the period.
+        """
+        mask = self._mask(payers=payers, condition=condition)
+        keys = self.keys[mask]
+        months = keys["MONTH"].to_numpy()
+        all_months = pd.period_range(min(months), max(months), freq="M") if len(months) else []
+
+        # Merge payers first: one register row and cost per month
+        position = pd.Index(all_months).get_indexer(months)
+        monthly = np.zeros((len(all_months), M), dtype="uint8")
+        np.maximum.at(monthly, position, self.registers[mask])
+        monthly_cost = np.bincount(position, weights=self.cost[mask], minlength=len(all_months))
+
+        if rolling:
+            periods, merged, cost, n_months = [], [], [], []
+            for end in range(rolling - 1, len(all_months)):
+                window = slice(end - rolling + 1, end + 1)
+                periods.append(str(all_months[end]))
+                merged.append(monthly[window].max(axis=0))
+                cost.append(monthly_cost[window].sum())
+                n_months.append(rolling)
+            merged = np.array(merged).reshape(-1, M)
+        else:
+            labels = pd.PeriodIndex(all_months).asfreq(freq)
+            starts = np.flatnonzero(np.r_[True, labels[1:] != labels[:-1]]) if len(labels) else np.array([], int)
+            periods = [str(labels[s]) for s in starts]
+            merged = np.maximum.reduceat(monthly, starts, axis=0) if len(starts) else monthly
+            cost = np.add.reduceat(monthly_cost, starts) if len(starts) else monthly_cost
+            n_months = np.diff(np.r_[starts, len(labels)])
+
+        members = np.atleast_1d(estimate(merged)) if len(periods) else np.array([])
+        result = pd.DataFrame({
+            "PERIOD": periods,
+            "TOTAL_CLAIM_COST": cost,
+            "MEMBERS_EST": np.round(members).astype("int64"),
+            "MONTHS": n_months,
+        })
+        result["PMPM"] = result["TOTAL_CLAIM_COST"] / result["MEMBERS_EST"].replace(0, np.nan) / result["MONTHS"]
+        return result
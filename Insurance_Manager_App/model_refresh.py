@@ -0,0 +1,271 @@
+"""Incremental refresh of the forest models when new claims are appended.
+
+Every model remembers (in ``lineage.jsonl`` of the runtime model store,
+``model_registry.MODELS_DIR``) the last encounter date it was trained
+through; refreshed forests are published to ``model_registry``. A refresh
+only looks at claims after that date:
+
+- the claim-level forests grow ``GROW_TREES`` extra trees with
+  ``warm_start`` instead of retraining all of them (the small monthly
+  forest is always refitted: a new month changes every point's neighbours),
+- per-payer Prophet forecasts are refitted only for payers with new claims.
+
+A full retrain happens only when a model does not exist yet, its forest
+would exceed ``MAX_TREES``, the history before the cut-off changed, or
+``--full`` is passed. ``risk_rf`` is also retrained once from scratch: the
+shipped classifier was trained on a different label, so its trees must not
+be mixed with ones fitted on the heuristic high-risk label.
+
+    python model_refresh.py [--full]
+"""
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import model_registry
+from claims_store import CLAIMS_PATH, dataset_version, read_claims
+from model_registry import MODELS_DIR
+
+LINEAGE_PATH = os.path.join(MODELS_DIR, "lineage.jsonl")
+
+# Trees added per incremental refresh, and the forest size that forces a full retrain.
+GROW_TREES = 20
+MAX_TREES = 400
+
+# Share of claims labelled high risk when (re)training the risk classifier.
+HIGH_RISK_QUANTILE = 0.9
+
+
+# -----------------------------
+# TRAINING DATA
+# -----------------------------
+def monthly_training_data(df):
+    """Month index → total claim cost, as used by the forecasting pages."""
+    months = df["ENCOUNTER_DATE"].dt.to_period("M")
+    monthly = df.groupby(months.rename("MONTH"))["TOTAL_CLAIM_COST"].sum().sort_index()
+    X = pd.DataFrame({"MONTH_IDX": np.arange(len(monthly))})
+    return X, monthly.to_numpy()
+
+
+def cost_training_data(df):
+    """Claim-level AGE and condition flags → TOTAL_CLAIM_COST."""
+    features = ["AGE", "IsDiabetes", "IsDialysis"]
+    rows = df.dropna(subset=features + ["TOTAL_CLAIM_COST"])
+    return rows[features], rows["TOTAL_CLAIM_COST"].to_numpy()
+
+
+def risk_training_data(df):
+    """Claim-level features → high-risk label (top decile of the heuristic risk score)."""
+    from precompute import risk_scores
+
+    features = ["AGE", "IsDiabetes", "IsDialysis", "TOTAL_CLAIM_COST"]
+    rows = df.dropna(subset=features)
+    score = risk_scores(rows)
+    return rows[features], (score >= score.quantile(HIGH_RISK_QUANTILE)).astype(int).to_numpy()
+
+
+# -----------------------------
+# MODEL STORE
+# -----------------------------
+def current_model(name):
+    """Private copy of the current registry version (refreshed, else shipped), or None."""
+    return model_registry.read_model(name)
+
+
+def refreshed_model(name, df):
+    """Shared refreshed model if it was trained through the latest claim in ``df``, else None."""
+    previous = last_refresh(name)
+    latest = str(df["ENCOUNTER_DATE"].max())
+    info = model_registry.model_info(name)
+    if previous is None or previous["trained_through"] != latest or info is None or info["version"] != previous["version"]:
+        return None
+    return model_registry.load_model(name)
+
+
+def read_lineage(name=None):
+    if not os.path.exists(LINEAGE_PATH):
+        return []
+    with open(LINEAGE_PATH, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    return [r for r in records if name is None or r["model"] == name]
+
+
+def last_refresh(name):
+    """Most recent successful lineage record of ``name``, or None."""
+    records = [r for r in read_lineage(name) if r["mode"] != "skipped"]
+    return records[-1] if records else None
+
+
+def _record(entry):
+    os.makedirs(MODELS_DIR, exist_ok=True)
+    with open(LINEAGE_PATH, "a", encoding="utf-8") as f:
+        f.write(json.dumps(entry) + "\n")
+    return entry
+
+
+def _save(name, model, entry, X):
+    model_registry.publish(
+        name, model, version=entry["version"], features=[str(c) for c in X.columns],
+        fingerprint=entry["dataset_version"], trained_through=entry["trained_through"],
+    )
+
+
+# -----------------------------
+# REFRESH
+# -----------------------------
+def _split_new(df, previous):
+    """Rows after the previous cut-off, and whether the older history is unchanged."""
+    dates = df["ENCOUNTER_DATE"]
+    if previous is None:
+        return dates.notna(), False
+    cutoff = pd.Timestamp(previous["trained_through"])
+    history_unchanged = int((dates <= cutoff).sum()) == previous["history_rows"]
+    return dates > cutoff, history_unchanged
+
+
+def refresh_forest(name, df, build_data, new_forest, full=False, incremental=True, grow_shipped=True):
+    """Grow ``name`` with warm-start trees on new claims, or retrain it if required.
+
+    ``build_data(df)`` returns ``(X, y)`` with X indexed like ``df``; the extra
+    trees are fitted on the appended claims alone. Without ``incremental``
+    every refresh is a full retrain. Without ``grow_shipped`` the shipped
+    model is never grown: the first refresh retrains it with ``new_forest``.
+    """
+    start = time.perf_counter()
+    previous = last_refresh(name)
+    new_mask, history_unchanged = _split_new(df, previous)
+    dates = df["ENCOUNTER_DATE"]
+    model = current_model(name)
+
+    entry = {
+        "model": name,
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "dataset_version": dataset_version(),
+        "parent": previous["version"] if previous else None,
+        "version": (previous["version"] + 1) if previous else 1,
+        "trained_through": str(dates.max()),
+        "history_rows": int(dates.notna().sum()),
+        "new_rows": int(new_mask.sum()),
+    }
+
+    if not full and previous is not None and history_unchanged and entry["new_rows"] == 0:
+        entry.update(mode="skipped", version=previous["version"], seconds=round(time.perf_counter() - start, 3))
+        return _record(entry)
+
+    needs_full = (
+        full
+        or not incremental
+        or model is None
+        or not grow_shipped and not any(r["mode"] == "full" for r in read_lineage(name))
+        or previous is not None and not history_unchanged
+        or model.n_estimators + GROW_TREES > MAX_TREES
+    )
+
+    X, y = build_data(df)
+    if needs_full:
+        model = new_forest()
+        model.fit(X, y)
+        entry["mode"] = "full"
+    else:
+        keep = new_mask.loc[X.index].to_numpy()
+        X, y = X[keep], y[keep]
+        if len(np.unique(y)) < 2 and hasattr(model, "classes_"):
+            # A classifier cannot grow trees on a chunk holding only one class.
+            entry.update(mode="skipped", version=previous["version"] if previous else 0,
+                         seconds=round(time.perf_counter() - start, 3))
+            return _record(entry)
+        model.set_params(warm_start=True, n_estimators=model.n_estimators + GROW_TREES)
+        model.fit(X, y)
+        entry["mode"] = "incremental"
+
+    _save(name, model, entry, X)
+    entry.update(
+        n_estimators=int(model.n_estimators),
+        fit_rows=int(len(X)),
+        seconds=round(time.perf_counter() - start, 3),
+    )
+    return _record(entry)
+
+
+def refresh_payer_forecasts(df, full=False):
+    """Refit the per-payer Prophet forecasts only for payers that received new claims."""
+    from precompute import (
+        month_labels, payer_forecast, payer_monthly_costs, result_path,
+    )
+
+    start = time.perf_counter()
+    previous = last_refresh("payer_forecasts")
+    new_mask, history_unchanged = _split_new(df, previous)
+    dates = df["ENCOUNTER_DATE"]
+    version = dataset_version()
+
+    forecasts = {}
+    if not full and previous is not None and history_unchanged:
+        old_path = result_path("payer_forecasts", previous["dataset_version"])
+        if os.path.exists(old_path):
+            forecasts = pd.read_pickle(old_path)
+
+    payers = df["PAYER"].dropna().unique().tolist()
+    affected = payers if not forecasts else df.loc[new_mask, "PAYER"].dropna().unique().tolist()
+
+    months = month_labels(df)
+    for payer in affected:
+        forecast = payer_forecast(payer_monthly_costs(df, payer, months))
+        if forecast is None:
+            forecasts.pop(payer, None)
+        else:
+            forecasts[payer] = forecast
+
+    os.makedirs(os.path.dirname(result_path("payer_forecasts", version)), exist_ok=True)
+    pd.to_pickle(forecasts, result_path("payer_forecasts", version))
+
+    return _record({
+        "model": "payer_forecasts",
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "dataset_version": version,
+        "parent": previous["version"] if previous else None,
+        "version": (previous["version"] + 1) if previous else 1,
+        "trained_through": str(dates.max()),
+        "history_rows": int(dates.notna().sum()),
+        "new_rows": int(new_mask.sum()),
+        "mode": "incremental" if len(affected) < len(payers) else "full",
+        "refitted_series": len(affected),
+        "seconds": round(time.perf_counter() - start, 3),
+    })
+
+
+def refresh_all(df, full=False):
+    """Refresh every model and return their lineage records."""
+    from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+
+    # Same configuration as the shipped models in models/
+    return [
+        refresh_forest(
+            "monthly_rf", df, monthly_training_data,
+            lambda: RandomForestRegressor(n_estimators=200), full, incremental=False,
+        ),
+        refresh_forest(
+            "cost_rf", df, cost_training_data,
+            lambda: RandomForestRegressor(n_estimators=200, random_state=42, n_jobs=-1), full,
+        ),
+        refresh_forest(
+            "risk_rf", df, risk_training_data,
+            lambda: RandomForestClassifier(n_estimators=200, random_state=42, n_jobs=-1), full,
+            grow_shipped=False,
+        ),
+        refresh_payer_forecasts(df, full),
+    ]
+
+
+if __name__ == "__main__":
+    print("🔄 Refreshing models...")
+    for record in refresh_all(read_claims(CLAIMS_PATH), full="--full" in sys.argv):
+        print(
+            f"{record['model']:<16} {record['mode']:<12} v{record['version']}"
+            f"  new rows {record['new_rows']:,}  {record['seconds']}s"
+        )
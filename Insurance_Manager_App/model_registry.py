@@ -0,0 +1,244 @@
+"""Versioned registry of the trained models.
+
+A manifest lists every model with its published versions: the file, feature
+list, fingerprint of the training data, size and digest, and which version
+is current. The models shipped with the app are version 0 and live,
+read-only, in ``models/`` with ``models/manifest.json``. Versions published
+at runtime (``model_refresh``, the precompute) go to ``MODELS_DIR`` — by
+default ``data/models/`` — with a manifest of their own, so deploys and ETL
+runs never write into the source tree.
+
+Pages get models through ``load_model``: each version is loaded once per
+process, on first use, and shared by all its sessions. Only versions written
+by ``joblib.dump`` (everything published at runtime) have their NumPy arrays
+memory-mapped read-only, so server processes on the host share the pages of
+the file. The shipped models are plain pickles: every process holds its own
+copy of them until ``python model_registry.py --migrate`` rewrites them in
+the joblib format.
+
+    python model_registry.py [--migrate]
+"""
+import argparse
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+
+from single_flight import single_flight
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# -----------------------------
+# FILE PATHS
+# -----------------------------
+# Shipped (version 0) models and their manifest; only --migrate rewrites them.
+SHIPPED_DIR = os.path.join(APP_DIR, "models")
+SHIPPED_MANIFEST_PATH = os.path.join(SHIPPED_DIR, "manifest.json")
+
+# Runtime model store: published versions and their manifest.
+MODELS_DIR = os.environ.get("MODELS_DIR", os.path.join(os.path.dirname(APP_DIR), "data", "models"))
+MANIFEST_PATH = os.path.join(MODELS_DIR, "manifest.json")
+
+# Published versions kept on disk per model (the shipped version 0 is always kept).
+KEEP_VERSIONS = 3
+
+_lock = threading.Lock()
+_loaded = {}  # (name, version) -> shared read-only model
+
+
+def _digest(path):
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(8 * 1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+# -----------------------------
+# MANIFEST
+# -----------------------------
+def _read_json(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write_json(manifest, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def read_manifest():
+    """Shipped and runtime manifests merged: every version of every model."""
+    shipped, runtime = _read_json(SHIPPED_MANIFEST_PATH), _read_json(MANIFEST_PATH)
+    manifest = {}
+    for name in {**shipped, **runtime}:
+        base = shipped.get(name, {"current": None, "versions": []})
+        published = runtime.get(name, {"current": None, "versions": []})
+        manifest[name] = {
+            "current": base["current"] if published["current"] is None else published["current"],
+            "versions": base["versions"] + [v for v in published["versions"] if v["version"] > 0],
+        }
+    return manifest
+
+
+def _model_path(entry):
+    # Version 0 is always a shipped model
+    return os.path.join(SHIPPED_DIR if entry["version"] == 0 else MODELS_DIR, entry["file"])
+
+
+def model_info(name, version=None):
+    """Manifest entry of ``name`` (its current version by default), or None."""
+    model = read_manifest().get(name)
+    if model is None:
+        return None
+    version = model["current"] if version is None else version
+    return next((v for v in model["versions"] if v["version"] == version), None)
+
+
+def model_table():
+    """One row per published model version, for display."""
+    return [
+        {"model": name, "current": v["version"] == model["current"],
+         **{k: v[k] for k in ("version", "format", "class", "size_bytes", "training_fingerprint", "created")},
+         "features": ", ".join(v["features"] or [])}
+        for name, model in sorted(read_manifest().items())
+        for v in model["versions"]
+    ]
+
+
+def _entry(model, path, version, features, fingerprint, source, base_dir=None, **extra):
+    if features is None and hasattr(model, "feature_names_in_"):
+        features = [str(f) for f in model.feature_names_in_]
+    return {
+        "version": version,
+        "file": os.path.relpath(path, base_dir or MODELS_DIR),
+        "format": "joblib",
+        "class": type(model).__name__,
+        "features": features,
+        "training_fingerprint": fingerprint,
+        "size_bytes": os.path.getsize(path),
+        "digest": _digest(path),
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "source": source,
+        **extra,
+    }
+
+
+def publish(name, model, version=None, features=None, fingerprint=None, source="model_refresh", **extra):
+    """Write ``model`` as a new version of ``name`` and make it current.
+
+    ``fingerprint`` identifies the training data (e.g. the dataset version);
+    ``extra`` fields are stored in the manifest entry as they are.
+    """
+    import joblib
+
+    if version is not None and version < 1:
+        raise ValueError("Version 0 is reserved for the shipped models")
+    manifest = _read_json(MANIFEST_PATH)
+    record = manifest.setdefault(name, {"current": None, "versions": []})
+    if version is None:
+        version = max((v["version"] for v in record["versions"]), default=0) + 1
+
+    path = os.path.join(MODELS_DIR, name, f"v{version}.joblib")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    # Uncompressed, so the arrays can be memory-mapped when loading
+    joblib.dump(model, tmp_path)
+    os.replace(tmp_path, path)
+
+    entry = _entry(model, path, version, features, fingerprint, source, **extra)
+    record["versions"] = [v for v in record["versions"] if v["version"] != version] + [entry]
+    record["current"] = version
+    _prune(record)
+    _write_json(manifest, MANIFEST_PATH)
+    return entry
+
+
+def _prune(record):
+    published = sorted(v["version"] for v in record["versions"] if v["version"] > 0)
+    for old in published[:-KEEP_VERSIONS]:
+        entry = next(v for v in record["versions"] if v["version"] == old)
+        path = _model_path(entry)
+        if os.path.exists(path):
+            os.remove(path)
+        record["versions"].remove(entry)
+
+
+# -----------------------------
+# LOADING
+# -----------------------------
+def _read(entry, mmap):
+    import joblib
+
+    path = _model_path(entry)
+    # Plain pickles have no separate array blocks; joblib loads them in memory
+    return joblib.load(path, mmap_mode="r" if mmap and entry["format"] == "joblib" else None)
+
+
+def load_model(name, version=None):
+    """Shared read-only model, loaded once per process (memory-mapped if joblib); None if unknown.
+
+    The returned object is shared by every session and must not be refitted
+    or modified; use ``read_model`` for a private copy.
+    """
+    entry = model_info(name, version)
+    if entry is None:
+        return None
+    key = (name, entry["version"], entry["digest"])
+    with _lock:
+        model = _loaded.get(key)
+    if model is None:
+        model = single_flight(("model", *key), _read, entry, True)
+        with _lock:
+            # Only the loaded versions still in the manifest are kept
+            for old in [k for k in _loaded if k[0] == name]:
+                del _loaded[old]
+            _loaded[key] = model
+    return model
+
+
+def read_model(name, version=None):
+    """Private in-memory copy of a model, safe to refit; None if unknown."""
+    entry = model_info(name, version)
+    return None if entry is None else _read(entry, mmap=False)
+
+
+def migrate():
+    """Rewrite the shipped pickles in joblib format so they can be memory-mapped."""
+    import joblib
+
+    manifest = _read_json(SHIPPED_MANIFEST_PATH)
+    for name, record in manifest.items():
+        for i, entry in enumerate(record["versions"]):
+            if entry["format"] == "joblib":
+                continue
+            old_path = _model_path(entry)
+            model = joblib.load(old_path)
+            path = os.path.splitext(old_path)[0] + ".joblib"
+            joblib.dump(model, path + ".tmp")
+            os.replace(path + ".tmp", path)
+            kept = {k: v for k, v in entry.items() if k in ("training_fingerprint", "source", "created")}
+            record["versions"][i] = {
+                **_entry(model, path, entry["version"], entry["features"], None, None, base_dir=SHIPPED_DIR), **kept
+            }
+            os.remove(old_path)
+            print(f"🔁 {name} v{entry['version']}: {entry['file']} → {record['versions'][i]['file']}")
+    _write_json(manifest, SHIPPED_MANIFEST_PATH)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--migrate", action="store_true", help="rewrite pickles in memory-mappable joblib format")
+    args = parser.parse_args()
+
+    if args.migrate:
+        migrate()
+    for row in model_table():
+        print(f"{'✅' if row['current'] else '  '} {row['model']:<18} v{row['version']:<3} {row['format']:<7}"
+              f" {row['class']:<24} {row['size_bytes'] / 2**20:6.1f} MB  [{row['features']}]")
@@ -0,0 +1,399 @@
+"""Background warm-up of page aggregates, forecasts and risk scores after the ETL.
+
+``python precompute.py`` computes every job in ``JOBS`` in priority order and
+stores the results under ``data/precomputed/<dataset version>/r<RESULT_FORMAT>/``.
+Pages read them through ``cached_result`` and only compute themselves on a miss.
+"""
+import json
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from claims_store import CLAIMS_PATH, dataset_version, read_claims
+from enrollment import load_member_months, monthly_members
+from instrumentation import cache_event, span
+
+# -----------------------------
+# FILE PATHS
+# -----------------------------
+PRECOMPUTE_DIR = "data/precomputed"
+STATUS_PATH = os.path.join(PRECOMPUTE_DIR, "status.json")
+
+# Bump when stored results change shape, e.g. the claims' row order that the
+# index-aligned Series (risk_scores, cost_zscores, anomaly_scores) follow, so
+# results written by older code for the same dataset version are not read.
+RESULT_FORMAT = 2
+
+
+# -----------------------------
+# JOBS
+# -----------------------------
+def month_labels(df):
+    """``YYYY-MM`` label of every encounter, named MONTH."""
+    return df["ENCOUNTER_DATE"].dt.to_period("M").astype(str).rename("MONTH")
+
+
+def enrolled_members(months):
+    """Enrolled member-months for each ``YYYY-MM`` label, or None without enrollment data."""
+    enrollment = load_member_months()
+    if enrollment is None:
+        return None
+    return months.map(monthly_members(enrollment))
+
+
+def monthly_summary(df):
+    """Monthly cost, condition counts and PMPM (Monthly Overview)."""
+    months = month_labels(df)
+    monthly = df.groupby(months).agg({
+        "TOTAL_CLAIM_COST": "sum",
+        "IsDiabetes": "sum",
+        "IsDialysis": "sum"
+    }).reset_index()
+
+    if "PATIENT" in df.columns:
+        member_months = df.groupby(months)["PATIENT"].nunique().reset_index(name="UNIQUE_PATIENTS")
+        monthly = monthly.merge(member_months, on="MONTH", how="left")
+
+    # Enrolled members from payer_transitions; patients with a claim as fallback
+    enrolled = enrolled_members(monthly["MONTH"])
+    if enrolled is not None:
+        monthly["MEMBER_MONTHS"] = enrolled
+        monthly["PMPM"] = monthly["TOTAL_CLAIM_COST"] / monthly["MEMBER_MONTHS"]
+    elif "UNIQUE_PATIENTS" in monthly.columns:
+        monthly["PMPM"] = monthly["TOTAL_CLAIM_COST"] / monthly["UNIQUE_PATIENTS"]
+    return monthly
+
+
+def pmpm_summary(df):
+    """Monthly members, cost and PMPM (PMPM Dashboard)."""
+    months = month_labels(df)
+    members = df.groupby(months)["PATIENT"].nunique().reset_index()
+    members.columns = ["MONTH", "Claimants"]
+
+    monthly_cost = df.groupby(months)["TOTAL_CLAIM_COST"].sum().reset_index()
+
+    pmpm = monthly_cost.merge(members, on="MONTH")
+    # Enrolled members when payer_transitions were processed, else claimants
+    enrolled = enrolled_members(pmpm["MONTH"])
+    pmpm["MemberCount"] = pmpm["Claimants"] if enrolled is None else enrolled
+    pmpm["PMPM"] = pmpm["TOTAL_CLAIM_COST"] / pmpm["MemberCount"]
+    return pmpm
+
+
+def monthly_forecast(df, periods=12):
+    """Random Forest forecast of total claim cost on the month index (Forecasting Dashboard)."""
+    from sklearn.ensemble import RandomForestRegressor
+
+    monthly_costs = df.groupby(month_labels(df).rename("YEAR_MONTH"))["TOTAL_CLAIM_COST"].sum().reset_index()
+    monthly_costs["YEAR_MONTH"] = pd.to_datetime(monthly_costs["YEAR_MONTH"], errors="coerce")
+    monthly_costs = monthly_costs.dropna(subset=["YEAR_MONTH"]).sort_values("YEAR_MONTH").reset_index(drop=True)
+    monthly_costs["MONTH_IDX"] = np.arange(len(monthly_costs))
+
+    # Reuse the incrementally refreshed forest when it covers this data set
+    from model_refresh import refreshed_model
+
+    with span("model load: monthly RF"):
+        rf = refreshed_model("monthly_rf", df)
+    if rf is None:
+        rf = RandomForestRegressor(n_estimators=200)
+        with span("model fit: monthly RF", rows=len(monthly_costs)):
+            rf.fit(monthly_costs[["MONTH_IDX"]], monthly_costs["TOTAL_CLAIM_COST"])
+
+    last_date = monthly_costs["YEAR_MONTH"].max()
+    future_dates = pd.date_range(start=last_date + pd.DateOffset(months=1), periods=periods, freq="MS")
+    future_idx = np.arange(len(monthly_costs), len(monthly_costs) + periods)
+
+    with span("model predict: monthly RF", rows=periods):
+        future_pred = rf.predict(pd.DataFrame({"MONTH_IDX": future_idx}))
+
+    forecast_df = pd.DataFrame({
+        "YEAR_MONTH": future_dates,
+        "Forecasted_Cost": future_pred
+    })
+    forecast_df["LABEL"] = forecast_df["YEAR_MONTH"].dt.strftime("%Y-%m (%b %Y)")
+    return forecast_df
+
+
+def risk_scores(df):
+    """Heuristic patient risk score per claim (High Risk Patients)."""
+    return (
+        df["TOTAL_CLAIM_COST"].rank(pct=True) +
+        df["IsDiabetes"] * 0.5 +
+        df["IsDialysis"] * 0.8 +
+        (df["AGE"] / df["AGE"].max())
+    ).rename("RiskScore")
+
+
+def cost_zscores(df):
+    """Z-score of every claim cost (Fraud & Anomaly Detection)."""
+    cost = df["TOTAL_CLAIM_COST"]
+    return ((cost - cost.mean()) / cost.std()).rename("Z_SCORE")
+
+
+def member_sketches(df):
+    """HyperLogLog distinct-member rollup per month × payer × condition (PMPM pages)."""
+    from member_sketch import MemberSketchRollup
+
+    return MemberSketchRollup.build(df)
+
+
+def hierarchy_rollup(df):
+    """STATE → CITY → ORGANIZATION → PATIENT rollups (Drill-Down Explorer)."""
+    from drilldown import HierarchyRollup
+
+    return HierarchyRollup.build(df)
+
+
+def rolling_indexes(df):
+    """Date-sorted cumulative sums per organization and payer (Weekly Performance)."""
+    from rolling import RollingIndex
+
+    return {entity: RollingIndex.build(df, entity) for entity in ["ORGANIZATION", "PAYER_NAME"]}
+
+
+def fraud_graph_patterns(df):
+    """Shared-patient pairs, provider clusters and patient hoppers (Fraud & Anomaly Detection)."""
+    import fraud_graph
+
+    return fraud_graph.analyze(df)
+
+
+def train_anomaly_model(df):
+    """Isolation Forest over claim, category and patient-history features (see anomaly_model)."""
+    import anomaly_model
+
+    return anomaly_model.train(df, dataset_version())
+
+
+def anomaly_scores(df):
+    """Isolation Forest anomaly score of every claim (Fraud & Anomaly Detection, Predictive Insights)."""
+    import anomaly_model
+
+    return anomaly_model.score_claims(df)
+
+
+def payer_monthly_costs(df, payer, months=None):
+    """Monthly claim cost of a single payer."""
+    months = month_labels(df) if months is None else months
+    mask = df["PAYER"] == payer
+    return df[mask].groupby(months[mask])["TOTAL_CLAIM_COST"].sum().reset_index()
+
+
+def payer_forecast(payer_monthly, periods=60):
+    """Prophet forecast of one payer's monthly cost, or None with < 6 months of data."""
+    data = payer_monthly.rename(columns={"MONTH": "ds", "TOTAL_CLAIM_COST": "y"})
+    data["ds"] = pd.to_datetime(data["ds"], errors="coerce")
+    data = data.dropna(subset=["ds"])
+    if data.shape[0] < 6:
+        return None
+
+    # Prophet is heavy, so it is only imported once a forecast is requested
+    from prophet import Prophet
+
+    model = Prophet(yearly_seasonality=True, daily_seasonality=False)
+    with span("model fit: payer Prophet", rows=len(data)):
+        model.fit(data)
+    with span("model predict: payer Prophet", rows=periods):
+        return model.predict(model.make_future_dataframe(periods=periods, freq="M"))
+
+
+def payer_forecasts(df):
+    """Prophet forecast for every payer with enough history (Monthly Overview)."""
+    forecasts = {}
+    months = month_labels(df)
+    for payer in df["PAYER"].dropna().unique().tolist():
+        forecast = payer_forecast(payer_monthly_costs(df, payer, months))
+        if forecast is not None:
+            forecasts[payer] = forecast
+    return forecasts
+
+
+def refresh_models(df):
+    """Incrementally refresh the forest models and payer forecasts (see model_refresh)."""
+    from model_refresh import refresh_all
+
+    return refresh_all(df)
+
+
+# (priority, name, function) — lower priorities run first. Jobs whose result
+# already exists for the dataset version (e.g. payer_forecasts written by the
+# model refresh) are not recomputed.
+JOBS = [
+    (0, "model_refresh", refresh_models),
+    (0, "anomaly_model", train_anomaly_model),
+    (1, "anomaly_scores", anomaly_scores),
+    (1, "monthly_summary", monthly_summary),
+    (1, "pmpm", pmpm_summary),
+    (1, "member_sketches", member_sketches),
+    (2, "monthly_forecast", monthly_forecast),
+    (2, "risk_scores", risk_scores),
+    (2, "hierarchy", hierarchy_rollup),
+    (2, "rolling_indexes", rolling_indexes),
+    (3, "cost_zscores", cost_zscores),
+    (3, "fraud_graph", fraud_graph_patterns),
+    (4, "payer_forecasts", payer_forecasts),
+]
+JOB_FUNCTIONS = {name: fn for _, name, fn in JOBS}
+
+
+# -----------------------------
+# RESULT STORE
+# -----------------------------
+def result_dir(version):
+    return os.path.join(PRECOMPUTE_DIR, version, f"r{RESULT_FORMAT}")
+
+
+def result_path(name, version):
+    return os.path.join(result_dir(version), f"{name}.pkl")
+
+
+_VERSIONS = {}  # claims path -> dataset version whose results are cached
+
+
+@st.cache_resource(show_spinner=False)
+def _load_result(name, version):
+    return pd.read_pickle(result_path(name, version))
+
+
+@st.cache_resource(show_spinner=False)
+def _compute_result(name, version, _df):
+    # Kept until the dataset version changes, so reruns before the background
+    # precompute stores the result do not recompute it
+    with span(f"compute {name}", rows=len(_df)):
+        return JOB_FUNCTIONS[name](_df)
+
+
+def _current_version(path):
+    """Dataset version of ``path``; results cached for an older one are released."""
+    version = dataset_version(path)
+    if _VERSIONS.get(path, version) != version:
+        _load_result.clear()
+        _compute_result.clear()
+    _VERSIONS[path] = version
+    return version
+
+
+def get_result(name, path=CLAIMS_PATH):
+    """Precomputed result for the current dataset version, or None if not ready."""
+    version = _current_version(path)
+    if not os.path.exists(result_path(name, version)):
+        cache_event("precompute", hit=False)
+        return None
+    cache_event("precompute", hit=True)
+    return _load_result(name, version)
+
+
+def cached_result(name, df, path=CLAIMS_PATH):
+    """Precomputed result if available, otherwise compute it from ``df`` now.
+
+    The returned object may be shared with other sessions and must not be
+    modified in place.
+    """
+    result = get_result(name, path)
+    if result is not None:
+        return result
+    # Sessions asking at the same time wait for one computation
+    return _compute_result(name, _current_version(path), df)
+
+
+# -----------------------------
+# STATUS
+# -----------------------------
+def read_status():
+    """Status of the latest precompute run, or None if none has run yet."""
+    if not os.path.exists(STATUS_PATH):
+        return None
+    with open(STATUS_PATH, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write_status(status):
+    tmp_path = STATUS_PATH + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(status, f, indent=2)
+    os.replace(tmp_path, STATUS_PATH)
+
+
+# -----------------------------
+# RUNNER
+# -----------------------------
+def run_jobs(path=CLAIMS_PATH):
+    """Compute every job in priority order and store the results."""
+    version = dataset_version(path)
+    os.makedirs(result_dir(version), exist_ok=True)
+
+    ordered = sorted(JOBS, key=lambda job: job[0])
+    status = {
+        "version": version,
+        "started": datetime.now().isoformat(timespec="seconds"),
+        "finished": None,
+        "jobs": [
+            {"name": name, "priority": priority, "state": "queued", "seconds": None, "error": None}
+            for priority, name, _ in ordered
+        ],
+    }
+    _write_status(status)
+
+    df = read_claims(path)
+    for entry, (_, name, fn) in zip(status["jobs"], ordered):
+        if os.path.exists(result_path(name, version)):
+            entry["state"] = "done"
+            entry["seconds"] = 0.0
+            _write_status(status)
+            continue
+
+        entry["state"] = "running"
+        _write_status(status)
+
+        start = time.perf_counter()
+        try:
+            with span(f"precompute {name}", rows=len(df)):
+                result = fn(df)
+                if hasattr(result, "save_parts"):
+                    # Results split into parts (e.g. one file per drill-down depth)
+                    # are loaded lazily from their own folder
+                    result.save_parts(os.path.join(result_dir(version), name))
+                pd.to_pickle(result, result_path(name, version))
+            entry["state"] = "done"
+        except Exception as exc:
+            entry["state"] = "failed"
+            entry["error"] = f"{type(exc).__name__}: {exc}"
+        entry["seconds"] = round(time.perf_counter() - start, 3)
+        _write_status(status)
+        print(f"{'✅' if entry['state'] == 'done' else '❌'} {name} ({entry['seconds']}s)")
+
+    status["finished"] = datetime.now().isoformat(timespec="seconds")
+    _write_status(status)
+    return status
+
+
+def start_background(cwd, snapshots=False):
+    """Launch ``precompute.py`` as a detached process working in ``cwd``.
+
+    With ``snapshots`` the static page snapshots are rendered once the jobs
+    are done, so they reuse the precomputed results.
+    """
+    return subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__)] + (["--snapshots"] if snapshots else []),
+        cwd=cwd,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+
+
+if __name__ == "__main__":
+    print("🔥 Precomputing page aggregates, forecasts and risk scores...")
+    run_jobs()
+
+    if "--snapshots" in sys.argv:
+        from snapshot import render_all
+
+        print("📸 Rendering static snapshots...")
+        render_all()
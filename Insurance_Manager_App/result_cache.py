@@ -0,0 +1,121 @@
+"""Bounded LRU cache of filter-keyed page results, shared by every session.
+
+Pages cache the aggregates and figures behind each filter value under
+``(dataset version, page, filters)``, so jumping back to a month or payer
+that any user already opened skips the groupbys and figure building. The
+cache holds at most ``RESULT_CACHE_MB`` and evicts the least recently used
+entries beyond that.
+"""
+import os
+import pickle
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+import streamlit as st
+
+from claims_store import CLAIMS_PATH, dataset_version
+from instrumentation import cache_event
+from single_flight import single_flight
+
+# Memory cap of the cache in MB (per server process).
+RESULT_CACHE_MB = float(os.environ.get("RESULT_CACHE_MB", "256"))
+
+
+def sizeof(value):
+    """Approximate memory footprint of a cached result in bytes."""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum() if isinstance(usage, pd.Series) else usage)
+    if isinstance(value, dict):
+        return sum(sizeof(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(sizeof(v) for v in value)
+    try:
+        return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return 0
+
+
+class ResultCache:
+    """Thread-safe LRU mapping with a byte budget and hit/miss counters."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """Cached value and whether it was found; a hit marks it most recently used."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][0], True
+            self.misses += 1
+            return None, False
+
+    def put(self, key, value):
+        size = sizeof(value)
+        with self._lock:
+            if key in self._entries:
+                self.bytes -= self._entries.pop(key)[1]
+            if size > self.max_bytes:
+                # Larger than the whole budget: serve it but never keep it
+                return value
+            self._entries[key] = (value, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.bytes -= evicted
+                self.evictions += 1
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "mb": self.bytes / 1024 ** 2,
+                "max_mb": self.max_bytes / 1024 ** 2,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": self.hits / lookups if lookups else None,
+            }
+
+    def keys(self):
+        """Keys from least to most recently used."""
+        with self._lock:
+            return list(self._entries)
+
+
+@st.cache_resource(show_spinner=False)
+def shared_cache():
+    """The process-wide result cache."""
+    return ResultCache(int(RESULT_CACHE_MB * 1024 ** 2))
+
+
+def cached_page_result(page, filters, compute, *args, path=CLAIMS_PATH):
+    """Result of ``compute(*args)`` for ``page`` and ``filters``, from the cache when possible.
+
+    ``filters`` is a tuple of every widget value the result depends on. The
+    result is shared with other sessions and must not be modified in place.
+    """
+    cache = shared_cache()
+    key = (dataset_version(path), page, tuple(filters))
+    value, hit = cache.get(key)
+    cache_event("results", hit=hit)
+    if hit:
+        return value
+    # Concurrent misses on the same key wait for the first one's result
+    return single_flight(("results",) + key, lambda: cache.put(key, compute(*args)))
@@ -0,0 +1,132 @@
+"""Single-flight coordination of expensive computations across sessions.
+
+Streamlit runs every session in its own thread of one server process. When
+several sessions ask for the same key at once (the same model fit, dataset
+load or aggregate), only the first one — the leader — computes it; the
+others wait for the leader and get its result, or its error. A leader
+interrupted by its own session (``st.stop()``, a rerun) shares nothing: a
+waiting session becomes the new leader instead. Once the leader finishes,
+the key is released, so later calls go through whatever cache sits in front
+of the computation.
+"""
+import os
+import threading
+import time
+
+import streamlit as st
+
+from instrumentation import cache_event
+
+# Seconds a waiting session gives the leader before giving up.
+FLIGHT_TIMEOUT = float(os.environ.get("SINGLE_FLIGHT_TIMEOUT", "600"))
+
+
+class FlightTimeout(TimeoutError):
+    """Raised in a waiting session when the leader does not finish in time."""
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.owner = threading.get_ident()
+        self.started = time.perf_counter()
+        self.result = None
+        self.error = None
+        self.interrupted = False
+
+
+class SingleFlight:
+    """Runs at most one computation per key at a time and shares its outcome."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights = {}
+        self.leaders = 0
+        self.followers = 0
+        self.timeouts = 0
+        self.errors = 0
+
+    def do(self, key, fn, *args, timeout=FLIGHT_TIMEOUT):
+        """Result of ``fn(*args)``, computed once for all concurrent callers of ``key``.
+
+        Returns ``(result, shared)`` where ``shared`` is True when another
+        session computed it.
+        """
+        deadline = time.perf_counter() + timeout
+        while True:
+            with self._lock:
+                flight = self._flights.get(key)
+                nested = flight is not None and flight.owner == threading.get_ident()
+                leader = flight is None
+                if leader:
+                    flight = self._flights[key] = _Flight()
+                if leader or nested:
+                    self.leaders += 1
+                else:
+                    self.followers += 1
+
+            if nested:
+                # A leader asking for its own key again would wait for itself:
+                # compute directly and leave the flight to the outer call
+                return fn(*args), False
+            if leader:
+                return self._lead(key, flight, fn, args), False
+
+            if not flight.done.wait(max(deadline - time.perf_counter(), 0)):
+                with self._lock:
+                    self.timeouts += 1
+                raise FlightTimeout(f"Gave up waiting {timeout:.0f}s for {key!r}")
+            if flight.interrupted:
+                # The leader's session stopped; elect a new leader
+                continue
+            if flight.error is not None:
+                raise flight.error
+            return flight.result, True
+
+    def _lead(self, key, flight, fn, args):
+        try:
+            flight.result = fn(*args)
+            return flight.result
+        except Exception as exc:
+            flight.error = exc
+            with self._lock:
+                self.errors += 1
+            raise
+        except BaseException:
+            # StopException, RerunException, KeyboardInterrupt: only for the leader's session
+            flight.interrupted = True
+            raise
+        finally:
+            with self._lock:
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+            flight.done.set()
+
+    def stats(self):
+        with self._lock:
+            now = time.perf_counter()
+            return {
+                "leaders": self.leaders,
+                "followers": self.followers,
+                "timeouts": self.timeouts,
+                "errors": self.errors,
+                "in_flight": len(self._flights),
+                "oldest_flight_s": max((now - f.started for f in self._flights.values()), default=None),
+            }
+
+
+@st.cache_resource(show_spinner=False)
+def coordinator():
+    """The process-wide single-flight coordinator."""
+    return SingleFlight()
+
+
+def single_flight(key, fn, *args, timeout=FLIGHT_TIMEOUT):
+    """Compute ``fn(*args)`` once for every session asking for ``key`` at the same time.
+
+    Waiting sessions share the leader's result object, so it must be treated
+    as read-only. ``FlightTimeout`` is raised after ``timeout`` seconds.
+    """
+    result, shared = coordinator().do(key, fn, *args, timeout=timeout)
+    cache_event("single_flight", hit=shared)
+    return result
@@ -0,0 +1,292 @@
+"""Static HTML snapshots of every dashboard page for read-only viewers.
+
+``python snapshot.py`` runs every page once with its default filters, one
+page per worker process, through Streamlit's script runner (so the real page
+code is executed). Titles, KPIs, tables and Plotly figures are written to a
+self-contained bundle under ``snapshots/<dataset version>/`` with its own
+copy of plotly.js. ``snapshots/index.html`` only switches to the new bundle
+once every page has been written.
+
+    python snapshot.py            # render all pages
+    python snapshot.py --serve    # serve snapshots/ on SNAPSHOT_PORT
+"""
+import argparse
+import glob
+import html
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from claims_store import dataset_version
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# -----------------------------
+# FILE PATHS
+# -----------------------------
+SNAPSHOT_DIR = "snapshots"
+LATEST_PATH = os.path.join(SNAPSHOT_DIR, "latest.json")
+
+SNAPSHOT_PORT = int(os.environ.get("SNAPSHOT_PORT", "8600"))
+# Where app.py links to; point it at nginx/S3 when snapshots/ is served from there.
+SNAPSHOT_URL = os.environ.get("SNAPSHOT_URL", f"http://localhost:{SNAPSHOT_PORT}/")
+
+# Seconds one page may run, rows shown per table and bundles kept on disk.
+PAGE_TIMEOUT = 900
+MAX_TABLE_ROWS = 200
+KEEP_VERSIONS = 3
+
+PAGE_STYLE = """
+body { font-family: "Source Sans Pro", Arial, sans-serif; margin: 2rem auto; max-width: 1200px; color: #262730; }
+nav a { margin-right: 1rem; }
+.row { display: flex; gap: 1rem; }
+.row > div { flex: 1; }
+.metric { border: 1px solid #e6e9ef; border-radius: 0.5rem; padding: 0.75rem; }
+.metric .label { font-size: 0.9rem; color: #555; }
+.metric .value { font-size: 1.8rem; }
+.alert { padding: 0.75rem; border-radius: 0.5rem; margin: 0.5rem 0; }
+.error { background: #fde8e8; } .warning { background: #fff6db; }
+.info { background: #e8f0fe; } .success { background: #e6f6ea; }
+.caption { color: #6c757d; font-size: 0.9rem; }
+table.dataframe { border-collapse: collapse; font-size: 0.85rem; margin: 0.5rem 0; }
+table.dataframe td, table.dataframe th { border: 1px solid #e6e9ef; padding: 0.25rem 0.5rem; }
+"""
+
+
+def page_files():
+    """Numbered dashboard pages in sidebar order."""
+    pages = glob.glob("[0-9]*_*.py", root_dir=APP_DIR)
+    return sorted(pages, key=lambda p: int(p.split("_")[0]))
+
+
+def page_label(page):
+    return page[:-3].split("_", 1)[1].replace("_", " ")
+
+
+# -----------------------------
+# RENDERING
+# -----------------------------
+def _markdown_html(text):
+    """Small markdown subset used by the pages: headings, bullets, bold, rules."""
+    lines, in_list = [], False
+    for line in html.escape(text).splitlines():
+        line = re.sub(r"\*\*(.+?)\*\*", r"<b>\1</b>", line.strip())
+        if line.startswith("- "):
+            if not in_list:
+                lines.append("<ul>")
+                in_list = True
+            lines.append(f"<li>{line[2:]}</li>")
+            continue
+        if in_list:
+            lines.append("</ul>")
+            in_list = False
+        heading = re.match(r"(#{1,6}) (.*)", line)
+        if heading:
+            level = len(heading.group(1))
+            lines.append(f"<h{level}>{heading.group(2)}</h{level}>")
+        elif line == "---":
+            lines.append("<hr>")
+        elif line:
+            lines.append(f"<p>{line}</p>")
+    if in_list:
+        lines.append("</ul>")
+    return "\n".join(lines)
+
+
+def _render(node, figures):
+    """HTML of one AppTest element-tree node; Plotly specs are appended to ``figures``."""
+    kind = type(node).__name__
+    children = getattr(node, "children", None)
+    if children is not None:
+        inner = "\n".join(_render(child, figures) for child in children.values())
+        if kind in ("Tab", "Expander"):
+            return f"<details open><summary>{html.escape(node.label)}</summary>\n{inner}\n</details>"
+        if any(type(child).__name__ == "Column" for child in children.values()):
+            return f'<div class="row">\n{inner}\n</div>'
+        return f"<div>\n{inner}\n</div>"
+
+    if kind == "Title":
+        return f"<h1>{html.escape(node.value)}</h1>"
+    if kind == "Header":
+        return f"<h2>{html.escape(node.value)}</h2>"
+    if kind == "Subheader":
+        return f"<h3>{html.escape(node.value)}</h3>"
+    if kind == "Markdown":
+        return _markdown_html(node.value)
+    if kind == "Caption":
+        return f'<p class="caption">{html.escape(node.value)}</p>'
+    if kind == "Divider":
+        return "<hr>"
+    if kind in ("Error", "Warning", "Info", "Success"):
+        return f'<div class="alert {kind.lower()}">{html.escape(node.value)}</div>'
+    if kind == "Metric":
+        delta = f'<div class="caption">{html.escape(node.delta)}</div>' if node.delta else ""
+        return (
+            f'<div class="metric"><div class="label">{html.escape(node.label)}</div>'
+            f'<div class="value">{html.escape(node.value)}</div>{delta}</div>'
+        )
+    if kind in ("Dataframe", "Table"):
+        table = node.value
+        note = f'<p class="caption">First {MAX_TABLE_ROWS} of {len(table):,} rows.</p>' if len(table) > MAX_TABLE_ROWS else ""
+        return table.head(MAX_TABLE_ROWS).to_html(border=0) + note
+    if kind == "Code":
+        return f"<pre>{html.escape(node.value)}</pre>"
+    if kind == "UnknownElement" and node.type == "plotly_chart":
+        figures.append(node.proto.spec)
+        return f'<div id="figure-{len(figures) - 1}"></div>'
+    # Widgets, progress bars and exceptions are not part of a snapshot
+    return ""
+
+
+def _figure_script(figures):
+    calls = []
+    for i, spec in enumerate(figures):
+        # "</" would close the <script> tag early
+        spec = spec.replace("</", "<\\/")
+        calls.append(
+            f'(function () {{ var f = {spec}; '
+            f'Plotly.newPlot("figure-{i}", f.data, f.layout, {{responsive: true}}); }})();'
+        )
+    return "\n".join(calls)
+
+
+def _write(path, text):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def _document(title, body, rendered, version):
+    return f"""<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{html.escape(title)}</title>
+<style>{PAGE_STYLE}</style>
+<script src="plotly.min.js"></script>
+</head>
+<body>
+<nav><a href="index.html">🏥 All snapshots</a></nav>
+<p class="caption">Static snapshot rendered {rendered} from dataset version {version} with default filters.</p>
+{body}
+</body>
+</html>
+"""
+
+
+def render_page(page, out_dir, version):
+    """Run one page and write its snapshot; executed in a worker process."""
+    from streamlit.testing.v1 import AppTest
+
+    start = time.perf_counter()
+    at = AppTest.from_file(os.path.join(APP_DIR, page), default_timeout=PAGE_TIMEOUT).run()
+
+    figures = []
+    body = _render(at.main, figures)
+    body += f"\n<script>\n{_figure_script(figures)}\n</script>"
+    rendered = datetime.now().isoformat(timespec="seconds")
+    _write(os.path.join(out_dir, page[:-3] + ".html"), _document(page_label(page), body, rendered, version))
+    return {
+        "page": page,
+        "seconds": round(time.perf_counter() - start, 3),
+        "figures": len(figures),
+        "errors": [e.value for e in at.exception],
+    }
+
+
+def render_all(workers=None):
+    """Render every page in a process pool and switch ``snapshots/`` to the new bundle."""
+    version = dataset_version()
+    out_dir = os.path.join(SNAPSHOT_DIR, version)
+    os.makedirs(out_dir, exist_ok=True)
+
+    import plotly.offline
+
+    _write(os.path.join(out_dir, "plotly.min.js"), plotly.offline.get_plotlyjs())
+
+    pages = page_files()
+    # One fresh process per page: the script runner takes over __main__ and
+    # every page fills its own caches.
+    with ProcessPoolExecutor(max_workers=workers, max_tasks_per_child=1) as pool:
+        results = list(pool.map(render_page, pages, [out_dir] * len(pages), [version] * len(pages)))
+
+    rendered = datetime.now().isoformat(timespec="seconds")
+    links = "\n".join(
+        f'<li><a href="{r["page"][:-3]}.html">{html.escape(page_label(r["page"]))}</a>'
+        f'{" ⚠️ rendered with errors" if r["errors"] else ""}</li>'
+        for r in results
+    )
+    _write(os.path.join(out_dir, "index.html"),
+           _document("Insurance Manager Snapshots", f"<h1>🏥 Insurance Manager Dashboard</h1>\n<ul>\n{links}\n</ul>",
+                     rendered, version))
+
+    # Switch the entry point only once the whole bundle exists
+    _write(os.path.join(SNAPSHOT_DIR, "index.html"),
+           f'<!DOCTYPE html><meta http-equiv="refresh" content="0; url={version}/index.html">')
+    latest = {"version": version, "rendered": rendered, "pages": results}
+    _write(LATEST_PATH, json.dumps(latest, indent=2))
+    _prune(keep=version)
+    return latest
+
+
+def _prune(keep):
+    versions = sorted(
+        (d for d in os.listdir(SNAPSHOT_DIR) if os.path.isdir(os.path.join(SNAPSHOT_DIR, d))),
+        key=lambda d: os.path.getmtime(os.path.join(SNAPSHOT_DIR, d)),
+    )
+    for old in versions[:-KEEP_VERSIONS]:
+        if old != keep:
+            shutil.rmtree(os.path.join(SNAPSHOT_DIR, old), ignore_errors=True)
+
+
+def read_latest():
+    """Metadata of the current snapshot bundle, or None if none was rendered yet."""
+    if not os.path.exists(LATEST_PATH):
+        return None
+    with open(LATEST_PATH, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def start_background(cwd):
+    """Launch ``snapshot.py`` as a detached process working in ``cwd``."""
+    return subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__)],
+        cwd=cwd,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+
+
+def serve(port=SNAPSHOT_PORT):
+    from functools import partial
+    from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+    handler = partial(SimpleHTTPRequestHandler, directory=SNAPSHOT_DIR)
+    print(f"🌐 Serving {os.path.abspath(SNAPSHOT_DIR)} on http://localhost:{port}/")
+    ThreadingHTTPServer(("", port), handler).serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--serve", action="store_true", help="serve snapshots/ instead of rendering")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    args = parser.parse_args()
+
+    if args.serve:
+        serve()
+    else:
+        print("📸 Rendering static snapshots...")
+        start = time.perf_counter()
+        latest = render_all(args.workers)
+        for r in latest["pages"]:
+            print(f"{'✅' if not r['errors'] else '⚠️'} {r['page']} ({r['seconds']}s, {r['figures']} figures)")
+        print(f"💾 Snapshots saved to {os.path.join(SNAPSHOT_DIR, latest['version'])} "
+              f"in {time.perf_counter() - start:.1f}s")
@@ -0,0 +1,123 @@
+"""Content-hash memoization of the ETL stages in ``data_cleaning.py``.
+
+A stage's output is stored as an Arrow IPC file named after a blake2b key of
+the stage name, the source code of its function, the full source of the
+modules it delegates to (``code``), the content of its input files and any
+extra key parts (e.g. the current year for ages). A rerun
+reuses the stored output when the key matches, so only the stages whose
+inputs or code changed are recomputed.
+
+File digests are remembered per (path, size, mtime), so unchanged inputs are
+not re-read just to be hashed.
+"""
+import glob
+import hashlib
+import inspect
+import json
+import os
+import time
+
+import pandas as pd
+
+# Set CLAIMS_STAGE_CACHE=0 to always recompute every stage.
+ENABLED = os.environ.get("CLAIMS_STAGE_CACHE", "1") != "0"
+
+CACHE_DIR_NAME = "stage_cache"
+HASHES_FILE = "file_hashes.json"
+CHUNK_BYTES = 8 * 1024 * 1024
+
+
+def _digest_file(path):
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_BYTES), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class StageCache:
+    """Stage outputs of one raw data folder, stored under ``<data_dir>/stage_cache``."""
+
+    def __init__(self, data_dir, enabled=ENABLED):
+        self.data_dir = data_dir
+        self.cache_dir = os.path.join(data_dir, CACHE_DIR_NAME)
+        self.enabled = enabled
+        self.report = []
+        self._hashes_path = os.path.join(self.cache_dir, HASHES_FILE)
+        self._hashes = {}
+        if enabled and os.path.exists(self._hashes_path):
+            with open(self._hashes_path, encoding="utf-8") as f:
+                self._hashes = json.load(f)
+
+    def file_hash(self, path):
+        """blake2b digest of a file, reused while its size and mtime are unchanged."""
+        stat = os.stat(path)
+        stamp = [stat.st_size, stat.st_mtime_ns]
+        known = self._hashes.get(os.path.abspath(path))
+        if known and known["stamp"] == stamp:
+            return known["digest"]
+        digest = _digest_file(path)
+        self._hashes[os.path.abspath(path)] = {"stamp": stamp, "digest": digest}
+        return digest
+
+    def stage_key(self, name, fn, paths, extra=(), code=()):
+        h = hashlib.blake2b(digest_size=16)
+        h.update(name.encode())
+        h.update(inspect.getsource(fn).encode())
+        for dependency in code:
+            # The whole defining module, so edits to its helpers count too
+            module = dependency if inspect.ismodule(dependency) else inspect.getmodule(dependency)
+            h.update(inspect.getsource(module).encode())
+        for path in paths:
+            h.update(self.file_hash(path).encode())
+        for part in extra:
+            h.update(repr(part).encode())
+        return h.hexdigest()
+
+    def run(self, name, fn, inputs, extra=(), code=()):
+        """Output of ``fn(*frames)`` for the CSV files ``inputs`` (names inside ``data_dir``).
+
+        ``extra`` holds anything else the output depends on, such as the
+        current year for stages computing ages; ``code`` lists the functions
+        or modules defined elsewhere that ``fn`` calls.
+        """
+        paths = [os.path.join(self.data_dir, i) for i in inputs]
+        start = time.perf_counter()
+        if not self.enabled:
+            output = fn(*[pd.read_csv(p) for p in paths])
+            self.report.append({"stage": name, "status": "computed", "seconds": time.perf_counter() - start})
+            return output
+
+        key = self.stage_key(name, fn, paths, extra, code)
+        path = os.path.join(self.cache_dir, f"{name}-{key}.arrow")
+        if os.path.exists(path):
+            output = pd.read_feather(path)
+            status = "skipped"
+        else:
+            output = fn(*[pd.read_csv(p) for p in paths])
+            self._store(name, output, path)
+            status = "computed"
+        self.report.append({"stage": name, "status": status, "seconds": time.perf_counter() - start})
+        return output
+
+    def _store(self, name, output, path):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = path + ".tmp"
+        output.reset_index(drop=True).to_feather(tmp_path, compression="uncompressed")
+        os.replace(tmp_path, path)
+        # Only the latest output of each stage is kept
+        for old in glob.glob(os.path.join(self.cache_dir, f"{name}-*.arrow")):
+            if old != path:
+                os.remove(old)
+
+    def save_hashes(self):
+        if not self.enabled:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = self._hashes_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._hashes, f)
+        os.replace(tmp_path, self._hashes_path)
+
+    def skipped(self):
+        return [r["stage"] for r in self.report if r["status"] == "skipped"]
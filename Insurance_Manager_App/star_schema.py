@@ -0,0 +1,201 @@
+"""Star-schema copy of the claims: an encounter fact table plus dimensions.
+
+The wide claims table repeats every patient's demographics, condition flags
+and payer name on each of their encounters. The star schema stores them once:
+
+- ``fact_encounters`` — one row per claim: date, costs, encounter type and
+  integer keys (PATIENT_KEY, PAYER_KEY, ORGANIZATION_KEY, CONDITION_KEY),
+  in ENCOUNTER_DATE order like the wide table.
+- ``dim_patient`` — PATIENT, PATIENT_ID, BIRTHDATE, GENDER, CITY, STATE, AGE.
+- ``dim_payer`` — PAYER, PAYER_NAME.
+- ``dim_organization`` — ORGANIZATION.
+- ``dim_condition`` — every combination of IsDiabetes, IsDialysis and
+  IsDialysisProc (a handful of rows).
+
+A key is the row number of its dimension (-1 when missing), so joining a
+column is one array lookup. Every page loads the star schema instead of the
+wide table, so a server process keeps only these tables resident. Pages join
+the dimension columns they work with, and every remaining column only onto
+the rows they display, e.g.::
+
+    star = load_star()
+    claims = star.claims(["PATIENT", "PAYER_NAME"])
+    st.dataframe(star.rows(claims.head(20)))
+
+The ETL writes the tables as Arrow IPC files to ``star/`` in the dataset
+version. When they are missing, the schema is built from the wide claims.
+
+    python star_schema.py     # memory of the wide table vs the star schema
+"""
+import os
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from claims_store import (
+    CLAIMS_PATH, active_path, compact_claims, dataset_version, read_arrow, read_claims, write_arrow,
+)
+from instrumentation import cache_event, span
+
+STAR_DIR = "star"
+FACT_TABLE = "fact_encounters"
+FACT_COLUMNS = ["ENCOUNTER_DATE", "TOTAL_CLAIM_COST", "PAYER_COVERAGE", "DESCRIPTION"]
+
+# dimension → (key column in the fact table, natural key, attribute columns)
+DIMENSIONS = {
+    "dim_patient": ("PATIENT_KEY", ["PATIENT"], ["PATIENT_ID", "BIRTHDATE", "GENDER", "CITY", "STATE", "AGE"]),
+    "dim_payer": ("PAYER_KEY", ["PAYER"], ["PAYER_NAME"]),
+    "dim_organization": ("ORGANIZATION_KEY", ["ORGANIZATION"], []),
+    "dim_condition": ("CONDITION_KEY", ["IsDiabetes", "IsDialysis", "IsDialysisProc"], []),
+}
+
+
+def _key_dtype(size):
+    if size < 2**7:
+        return "int8"
+    return "int16" if size < 2**15 else "int32"
+
+
+class StarSchema:
+    """Encounter fact table and its dimensions, joined on demand."""
+
+    def __init__(self, fact, dimensions):
+        self.fact = fact
+        self.dimensions = dimensions
+        # column → dimension that holds it
+        self.column_dimension = {
+            column: name for name, table in dimensions.items() for column in table.columns
+        }
+
+    @classmethod
+    def build(cls, df):
+        """Split a wide claims frame into the fact table and dimensions."""
+        fact = df[[c for c in FACT_COLUMNS if c in df.columns]].copy()
+        dimensions = {}
+        for name, (key, natural, attributes) in DIMENSIONS.items():
+            natural = [c for c in natural if c in df.columns]
+            if not natural:
+                continue
+            columns = natural + [c for c in attributes if c in df.columns]
+            codes, uniques = pd.factorize(
+                pd.MultiIndex.from_frame(df[natural]) if len(natural) > 1 else df[natural[0]]
+            )
+            # Attributes depend on the natural key only: take each key's first row
+            _, first = np.unique(codes, return_index=True)
+            first = first[-len(uniques):] if len(uniques) else first[:0]
+            dimensions[name] = df[columns].iloc[first].reset_index(drop=True)
+            fact[key] = codes.astype(_key_dtype(len(uniques)))
+
+        dimensions = {name: compact_claims(table) for name, table in dimensions.items()}
+        return cls(compact_claims(fact), dimensions)
+
+    # -----------------------------
+    # JOINS
+    # -----------------------------
+    def join(self, fact, columns):
+        """``fact`` (or any slice of it) with the dimension ``columns`` added."""
+        out = fact.copy(deep=False)
+        for column in columns:
+            if column in out.columns:
+                continue
+            name = self.column_dimension[column]
+            keys = out[DIMENSIONS[name][0]].to_numpy()
+            values = self.dimensions[name][column]
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                codes = np.append(values.cat.codes.to_numpy(), -1)[keys]
+                out[column] = pd.Categorical.from_codes(codes, dtype=values.dtype)
+            else:
+                out[column] = pd.api.extensions.take(values.to_numpy(), keys, allow_fill=True)
+        return out
+
+    def claims(self, columns):
+        """The fact table with those dimension ``columns`` this dataset has joined."""
+        return self.join(self.fact, [c for c in columns if c in self.column_dimension])
+
+    def rows(self, fact):
+        """``fact`` rows as wide claims: every dimension column joined, keys dropped."""
+        keys = [key for key, _, _ in DIMENSIONS.values()]
+        return self.join(fact, list(self.column_dimension)).drop(columns=keys, errors="ignore")
+
+    def wide(self):
+        """The full wide claims frame (every dimension column joined)."""
+        return self.rows(self.fact)
+
+    def memory_bytes(self):
+        """Deep memory of every table."""
+        tables = {FACT_TABLE: self.fact, **self.dimensions}
+        return {name: int(table.memory_usage(index=False, deep=True).sum()) for name, table in tables.items()}
+
+
+# -----------------------------
+# STORAGE
+# -----------------------------
+def star_dir(path=CLAIMS_PATH):
+    """Folder of the star schema next to the claims dataset ``path`` resolves to."""
+    return os.path.join(os.path.dirname(active_path(path)), STAR_DIR)
+
+
+def write_star(schema, out_dir):
+    """Write every table as an Arrow IPC file to ``out_dir``."""
+    os.makedirs(out_dir, exist_ok=True)
+    for name, table in {FACT_TABLE: schema.fact, **schema.dimensions}.items():
+        write_arrow(table, os.path.join(out_dir, f"{name}.arrow"))
+
+
+def read_star(path=CLAIMS_PATH):
+    """Memory-map the star schema of ``path``, or build it from the wide claims."""
+    folder = star_dir(path)
+    fact_path = os.path.join(folder, f"{FACT_TABLE}.arrow")
+    if not os.path.exists(fact_path):
+        with span("star build"):
+            return StarSchema.build(read_claims(path))
+    with span("star map") as s:
+        fact = read_arrow(fact_path)
+        dimensions = {
+            name: read_arrow(os.path.join(folder, f"{name}.arrow"))
+            for name in DIMENSIONS
+            if os.path.exists(os.path.join(folder, f"{name}.arrow"))
+        }
+        s["rows"] = len(fact)
+    return StarSchema(fact, dimensions)
+
+
+_LOADS = {"count": 0, "versions": {}}
+
+
+@st.cache_resource(show_spinner="Loading claims data...")
+def _shared_star(path, version):
+    # version is only part of the cache key so a new dataset is picked up.
+    _LOADS["count"] += 1
+    return read_star(path)
+
+
+def load_star(path=CLAIMS_PATH):
+    """Process-wide star schema of the active dataset; treat its tables as read-only."""
+    with span("data load") as s:
+        loads = _LOADS["count"]
+        source = active_path(path)
+        version = dataset_version(source)
+        if _LOADS["versions"].get(path, version) != version:
+            # A new dataset version is active: release the previous tables
+            # (sessions still holding them keep their reference until they rerun)
+            _shared_star.clear()
+        _LOADS["versions"][path] = version
+        schema = _shared_star(source, version)
+        cache_event("star", hit=_LOADS["count"] == loads)
+        s["rows"] = len(schema.fact)
+    return schema
+
+
+if __name__ == "__main__":
+    wide = read_claims(active_path(CLAIMS_PATH))
+    schema = StarSchema.build(wide)
+    rebuilt = schema.wide()[wide.columns]
+    print("✅ Round trip matches the wide table" if rebuilt.equals(wide) else "⚠️ Round trip differs from the wide table")
+    sizes = schema.memory_bytes()
+    wide_bytes = int(wide.memory_usage(index=False, deep=True).sum())
+    for name, size in sizes.items():
+        rows = len(schema.fact) if name == FACT_TABLE else len(schema.dimensions[name])
+        print(f"   {name:<18} {rows:>10,} rows  {size / 2**20:8.2f} MB")
+    print(f"⭐ Star schema {sum(sizes.values()) / 2**20:.2f} MB vs wide table {wide_bytes / 2**20:.2f} MB")
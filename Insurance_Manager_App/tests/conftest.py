@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The app modules are imported by name, as the pages do
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+
+from enrollment import member_months
+
+
+def test_interval_ending_on_the_first_is_not_counted_twice():
+    transitions = pd.DataFrame({
+        "PATIENT": ["p1", "p1"],
+        "PAYER": ["A", "B"],
+        "START_DATE": ["2020-01-15", "2020-03-01"],
+        "END_DATE": ["2020-03-01", "2020-05-20"],
+    })
+    enrollment = member_months(transitions, through="2020-12-31")
+    members = enrollment.groupby("MONTH")["MEMBER_MONTHS"].sum()
+    assert members.to_dict() == {"2020-02": 1, "2020-03": 1, "2020-04": 1, "2020-05": 1}
+    assert enrollment.query("MONTH == '2020-03'")["PAYER"].tolist() == ["B"]
+
+
+def test_difference_array_matches_expanded_member_months():
+    rng = np.random.default_rng(0)
+    n = 300
+    start = pd.Timestamp("2019-01-01") + pd.to_timedelta(rng.integers(0, 900, n), unit="D")
+    end = start + pd.to_timedelta(rng.integers(1, 400, n), unit="D")
+    transitions = pd.DataFrame({
+        "PATIENT": rng.integers(0, 80, n).astype(str),
+        "PAYER": rng.choice(["A", "B", "C"], n),
+        "START_DATE": start.strftime("%Y-%m-%d"),
+        # Some intervals are still open
+        "END_DATE": end.strftime("%Y-%m-%d").where(rng.random(n) > 0.1, None),
+    })
+    through = pd.Timestamp("2021-06-30")
+
+    expected = {}
+    for row in transitions.itertuples():
+        last = through if row.END_DATE is None else min(pd.Timestamp(row.END_DATE) - pd.Timedelta(1, "ns"), through)
+        for first_of_month in pd.date_range(row.START_DATE, last, freq="MS"):
+            key = (first_of_month.strftime("%Y-%m"), row.PAYER)
+            expected[key] = expected.get(key, 0) + 1
+
+    enrollment = member_months(transitions, through=through)
+    assert dict(zip(zip(enrollment["MONTH"], enrollment["PAYER"]), enrollment["MEMBER_MONTHS"])) == expected
@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+
+from member_sketch import M, RELATIVE_ERROR, MemberSketchRollup, estimate, hash_members, register_ranks
+
+
+def _registers(ids):
+    index, rank = register_ranks(hash_members(ids))
+    registers = np.zeros(M, dtype="uint8")
+    np.maximum.at(registers, index, rank)
+    return registers
+
+
+def test_small_counts_are_close_to_exact():
+    for n in [1, 10, 500, 5000]:
+        assert abs(estimate(_registers([f"p{i}" for i in range(n)])) - n) <= max(1, 0.01 * n)
+
+
+def test_large_counts_stay_within_the_error_bound():
+    for n in [50_000, 200_000]:
+        ids = [f"patient-{i}" for i in range(n)]
+        # Four standard errors: a failure here is a bug, not bad luck
+        assert abs(estimate(_registers(ids)) - n) <= 4 * RELATIVE_ERROR * n
+
+
+def test_merged_months_count_each_member_once():
+    rng = np.random.default_rng(1)
+    n = 20_000
+    claims = pd.DataFrame({
+        "PATIENT": pd.Categorical(rng.integers(0, 12_000, n).astype(str)),
+        "ENCOUNTER_DATE": pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 90, n), unit="D"),
+        "PAYER": rng.choice(["A", "B"], n),
+        "TOTAL_CLAIM_COST": rng.random(n) * 100,
+        "IsDiabetes": (rng.random(n) < 0.2).astype("int8"),
+        "IsDialysis": (rng.random(n) < 0.05).astype("int8"),
+    })
+    rollup = MemberSketchRollup.build(claims)
+
+    exact = claims["PATIENT"].nunique()
+    assert abs(rollup.distinct() - exact) <= 4 * RELATIVE_ERROR * exact
+    quarter = rollup.by_period("Q")
+    assert quarter["PERIOD"].tolist() == ["2024Q1"]
+    assert abs(quarter["MEMBERS_EST"].iloc[0] - exact) <= 4 * RELATIVE_ERROR * exact
+    diabetic = claims.loc[claims["IsDiabetes"] == 1, "PATIENT"].nunique()
+    assert abs(rollup.distinct(condition="Diabetes") - diabetic) <= 4 * RELATIVE_ERROR * diabetic
@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+
+from rolling import RollingIndex
+
+
+def _claims(n=2_000, seed=2):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "ORGANIZATION": rng.choice(["org1", "org2", "org3"], n),
+        "ENCOUNTER_DATE": pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 200 * 24, n), unit="h"),
+        "TOTAL_CLAIM_COST": rng.random(n) * 100,
+        "IsDiabetes": rng.integers(0, 2, n),
+        "IsDialysis": rng.integers(0, 2, n),
+    })
+
+
+def test_window_matches_a_filter_per_entity_and_end_date():
+    claims = _claims()
+    index = RollingIndex.build(claims, "ORGANIZATION")
+    # Windows starting before the first claim and ending after the last one included
+    ends = pd.to_datetime(["2024-01-03", "2024-02-15", "2024-07-18", "2024-09-01"])
+    result = index.window(28, ends).set_index(["ORGANIZATION", "DATE"])
+
+    days = claims["ENCOUNTER_DATE"].dt.normalize()
+    for org in ["org1", "org2", "org3"]:
+        for end in ends:
+            rows = claims[(claims["ORGANIZATION"] == org) & (days > end - pd.Timedelta(days=28)) & (days <= end)]
+            got = result.loc[(org, end)]
+            assert got["CLAIMS"] == len(rows)
+            assert np.isclose(got["TOTAL_CLAIM_COST"], rows["TOTAL_CLAIM_COST"].sum())
+            assert got["IsDiabetes"] == rows["IsDiabetes"].sum()
+
+
+def test_latest_reports_change_against_the_previous_window():
+    claims = _claims()
+    index = RollingIndex.build(claims, "ORGANIZATION")
+    end = pd.Timestamp("2024-05-01")
+    latest = index.latest(7, end, entities=["org2", "unknown"]).set_index("ORGANIZATION")
+
+    assert latest.index.tolist() == ["org2"]
+    current = index.window(7, [end], ["org2"])["CLAIMS"].iloc[0]
+    previous = index.window(7, [end - pd.Timedelta(days=7)], ["org2"])["CLAIMS"].iloc[0]
+    assert latest.loc["org2", "CLAIMS_CHANGE"] == current - previous
@@ -0,0 +1,93 @@
+import threading
+
+import pytest
+
+from single_flight import FlightTimeout, SingleFlight
+
+
+def _with_follower(flights, leader_fn, follower_fn):
+    """Run ``leader_fn`` as leader of "key" while another thread asks for "key" too.
+
+    ``leader_fn`` gets an event to wait on until the follower is waiting.
+    Returns the follower's outcome: ``{"result": ...}`` or ``{"error": ...}``.
+    """
+    outcome = {}
+    leading = threading.Event()
+    following = threading.Event()
+
+    def follow():
+        leading.wait()
+        try:
+            # Counted as a follower once do() holds the lock; leave it a moment
+            threading.Timer(0.05, following.set).start()
+            outcome["result"] = flights.do("key", follower_fn)
+        except Exception as exc:
+            outcome["error"] = exc
+
+    def lead():
+        leading.set()
+        following.wait(5)
+        return leader_fn()
+
+    follower = threading.Thread(target=follow)
+    follower.start()
+    try:
+        flights.do("key", lead)
+    except BaseException:
+        pass
+    follower.join(5)
+    return outcome
+
+
+def _fail():
+    raise ValueError("bad data")
+
+
+def _interrupt():
+    raise KeyboardInterrupt
+
+
+def test_followers_receive_the_leaders_error():
+    flights = SingleFlight()
+    outcome = _with_follower(flights, _fail, lambda: "never computed")
+    assert isinstance(outcome["error"], ValueError)
+    assert flights.errors == 1
+
+
+def test_followers_elect_a_new_leader_when_the_leader_is_interrupted():
+    flights = SingleFlight()
+    outcome = _with_follower(flights, _interrupt, lambda: 42)
+    # The follower computed it itself instead of re-raising the interruption
+    assert outcome == {"result": (42, False)}
+    assert flights.stats()["in_flight"] == 0
+
+
+def test_nested_call_for_the_same_key_keeps_the_flight():
+    flights = SingleFlight()
+
+    def outer():
+        inner, _ = flights.do("key", lambda: "inner")
+        return inner, flights.stats()["in_flight"]
+
+    assert flights.do("key", outer) == (("inner", 1), False)
+    assert flights.stats()["in_flight"] == 0
+
+
+def test_follower_gives_up_after_the_timeout():
+    flights = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow():
+        started.set()
+        release.wait(5)
+        return "late"
+
+    leader = threading.Thread(target=flights.do, args=("key", slow))
+    leader.start()
+    started.wait(5)
+    with pytest.raises(FlightTimeout):
+        flights.do("key", lambda: "never computed", timeout=0.1)
+    release.set()
+    leader.join(5)
+    assert flights.timeouts == 1
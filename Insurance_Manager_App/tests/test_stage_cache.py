@@ -0,0 +1,45 @@
+import importlib
+import linecache
+import sys
+
+import pandas as pd
+
+from stage_cache import StageCache
+
+HELPER = "def helper(df):\n    return df.assign(B=df['A'] * {factor})\n"
+
+
+def _write_helper(folder, factor):
+    path = folder / "stage_helper.py"
+    path.write_text(HELPER.format(factor=factor))
+    linecache.checkcache(str(path))
+    return path
+
+
+def test_editing_delegated_helper_invalidates_stage(tmp_path, monkeypatch):
+    data_dir = tmp_path / "raw"
+    data_dir.mkdir()
+    pd.DataFrame({"A": [1, 2, 3]}).to_csv(data_dir / "input.csv", index=False)
+    monkeypatch.setattr(sys, "dont_write_bytecode", True)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    _write_helper(tmp_path, 2)
+    helper_module = importlib.import_module("stage_helper")
+
+    def stage(df):
+        return helper_module.helper(df)
+
+    cache = StageCache(str(data_dir), enabled=True)
+    first = cache.run("double", stage, ["input.csv"], code=[helper_module.helper])
+    cache.run("double", stage, ["input.csv"], code=[helper_module.helper])
+    assert [r["status"] for r in cache.report] == ["computed", "skipped"]
+
+    # Only the helper changes, not the stage function itself
+    _write_helper(tmp_path, 30)
+    helper_module = importlib.reload(helper_module)
+    cache = StageCache(str(data_dir), enabled=True)
+    second = cache.run("double", stage, ["input.csv"], code=[helper_module.helper])
+
+    assert cache.report[0]["status"] == "computed"
+    assert first["B"].tolist() == [2, 4, 6]
+    assert second["B"].tolist() == [30, 60, 90]
+    sys.modules.pop("stage_helper", None)
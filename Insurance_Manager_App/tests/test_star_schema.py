@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+
+from claims_store import compact_claims
+from star_schema import StarSchema, read_star, write_star
+
+
+def _claims():
+    return compact_claims(pd.DataFrame({
+        "PATIENT": ["p1", "p2", "p1", "p3", "p2"],
+        "ENCOUNTER_DATE": pd.to_datetime(["2024-01-01", "2024-01-02", "2024-01-05", "2024-02-01", "2024-02-03"]),
+        "TOTAL_CLAIM_COST": [100.0, 20.5, 75.0, 3.25, 0.0],
+        "PAYER_COVERAGE": [80.0, 0.0, 75.0, 3.25, 0.0],
+        "DESCRIPTION": ["Checkup", "Dialysis", "Checkup", "Emergency", "Dialysis"],
+        "ORGANIZATION": ["o1", "o2", "o1", None, "o2"],
+        "PAYER": ["A", None, "A", "B", None],
+        "PAYER_NAME": ["Aetna", None, "Aetna", "Blue", None],
+        "PATIENT_ID": ["p1", "p2", "p1", "p3", "p2"],
+        "CITY": ["Boston", "Salem", "Boston", "Lynn", "Salem"],
+        "AGE": [40, 71, 40, 12, 71],
+        "IsDiabetes": [1, 0, 1, 0, 0],
+        "IsDialysis": [0, 1, 0, 0, 1],
+        "IsDialysisProc": [0, 1, 0, 0, 1],
+    }))
+
+
+def test_joining_every_dimension_reproduces_the_wide_table():
+    wide = _claims()
+    schema = StarSchema.build(wide)
+    assert len(schema.dimensions["dim_patient"]) == 3
+    assert schema.fact["PAYER_KEY"].tolist() == [0, -1, 0, 1, -1]
+    assert schema.wide()[wide.columns].equals(wide)
+
+
+def test_rows_joins_only_the_given_fact_rows():
+    wide = _claims()
+    schema = StarSchema.build(wide)
+    claims = schema.claims(["PATIENT", "NOT_A_COLUMN"])
+    assert "CITY" not in claims.columns
+    shown = schema.rows(claims[claims["PATIENT"] == "p2"])
+    assert shown[wide.columns].equals(wide[wide["PATIENT"] == "p2"])
+
+
+def test_written_tables_read_back_identically(tmp_path):
+    wide = _claims()
+    write_star(StarSchema.build(wide), str(tmp_path / "star"))
+    schema = read_star(str(tmp_path / "claims.csv"))
+    assert schema.wide()[wide.columns].equals(wide)
+    assert np.array_equal(schema.fact["ENCOUNTER_DATE"], wide["ENCOUNTER_DATE"])
@@ -0,0 +1,36 @@
+import pandas as pd
+
+from validation import MAX_CLAIM_COST, reason_counts, validate_claims
+
+
+def _claims():
+    return pd.DataFrame({
+        "PATIENT": ["p1", "p1", "p2", "ghost", "p2", "p1"],
+        "PAYER": ["A", "A", "B", "A", "zzz", "B"],
+        "ENCOUNTER_DATE": ["2024-01-05T10:00:00Z", "not a date", "2024-02-01", "2024-02-03", "2030-01-01", "2024-03-01"],
+        "TOTAL_CLAIM_COST": ["120.5", "80", "-5", "abc", MAX_CLAIM_COST + 1, "50"],
+        "PAYER_COVERAGE": [100, 10, 0, 0, 0, 60],
+        "AGE": [40, 40, 130, 30, 30, 40],
+    })
+
+
+def test_every_failed_check_is_listed_in_the_reason():
+    clean, quarantine = validate_claims(
+        _claims(), patient_ids=["p1", "p2"], payer_ids=["A", "B"], now=pd.Timestamp("2025-01-01"),
+    )
+    assert quarantine["REASON"].tolist() == [
+        "BAD_DATE",
+        "NEGATIVE_COST;COVERAGE_EXCEEDS_COST;BAD_AGE",
+        "BAD_COST;ORPHAN_PATIENT",
+        "FUTURE_DATE;ABSURD_COST;ORPHAN_PAYER",
+        "COVERAGE_EXCEEDS_COST",
+    ]
+    assert reason_counts(quarantine)["BAD_AGE"] == 1
+    assert len(clean) + len(quarantine) == len(_claims())
+
+
+def test_clean_rows_are_typed():
+    clean, _ = validate_claims(_claims(), now=pd.Timestamp("2025-01-01"))
+    assert clean["ENCOUNTER_DATE"].tolist() == [pd.Timestamp("2024-01-05 10:00:00")]
+    assert clean["TOTAL_CLAIM_COST"].dtype == "float64"
+    assert clean["TOTAL_CLAIM_COST"].tolist() == [120.5]
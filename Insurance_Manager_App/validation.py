@@ -0,0 +1,84 @@
+"""Vectorized validation of the merged claims, with a quarantine of rejected rows.
+
+Every check is a boolean column computed over the whole frame at once; a row
+failing any check is moved to the quarantine with the codes of every check
+it failed (e.g. ``BAD_DATE;ORPHAN_PAYER``). The rows that pass have a parsed
+ENCOUNTER_DATE (naive UTC) and numeric costs, so pages never re-parse them.
+"""
+import pandas as pd
+
+# Single claims above this are treated as data errors, not as high-cost cases.
+MAX_CLAIM_COST = 1_000_000
+# Coverage may exceed the claim cost by rounding only.
+COVERAGE_TOLERANCE = 0.01
+MAX_AGE = 120
+
+REASONS = {
+    "BAD_DATE": "ENCOUNTER_DATE missing or not a date",
+    "FUTURE_DATE": "ENCOUNTER_DATE after the ETL run",
+    "BAD_COST": "TOTAL_CLAIM_COST missing or not a number",
+    "NEGATIVE_COST": "TOTAL_CLAIM_COST below 0",
+    "ABSURD_COST": f"TOTAL_CLAIM_COST above {MAX_CLAIM_COST:,}",
+    "BAD_COVERAGE": "PAYER_COVERAGE not a number or below 0",
+    "COVERAGE_EXCEEDS_COST": "PAYER_COVERAGE above TOTAL_CLAIM_COST",
+    "ORPHAN_PATIENT": "PATIENT not in patients.csv",
+    "ORPHAN_PAYER": "PAYER missing or not in payers.csv",
+    "BAD_AGE": f"AGE missing or outside 0–{MAX_AGE}",
+}
+
+
+def _to_number(series):
+    return pd.to_numeric(series, errors="coerce")
+
+
+def validate_claims(df, patient_ids=None, payer_ids=None, now=None):
+    """Split ``df`` into typed clean rows and quarantined rows.
+
+    Returns ``(clean, quarantine)``; the quarantine keeps the original values
+    plus a REASON column of ``;``-separated codes from ``REASONS``.
+    """
+    now = pd.Timestamp.now() if now is None else now
+
+    dates = pd.to_datetime(df["ENCOUNTER_DATE"], errors="coerce", utc=True, format="ISO8601").dt.tz_localize(None)
+    cost = _to_number(df["TOTAL_CLAIM_COST"])
+    coverage = _to_number(df["PAYER_COVERAGE"]) if "PAYER_COVERAGE" in df.columns else pd.Series(0.0, index=df.index)
+    coverage_given = df["PAYER_COVERAGE"].notna() if "PAYER_COVERAGE" in df.columns else coverage.notna()
+
+    checks = {
+        "BAD_DATE": dates.isna(),
+        "FUTURE_DATE": dates > now,
+        "BAD_COST": cost.isna(),
+        "NEGATIVE_COST": cost < 0,
+        "ABSURD_COST": cost > MAX_CLAIM_COST,
+        "BAD_COVERAGE": (coverage_given & coverage.isna()) | (coverage < 0),
+        "COVERAGE_EXCEEDS_COST": coverage > cost + COVERAGE_TOLERANCE,
+    }
+    if patient_ids is not None:
+        checks["ORPHAN_PATIENT"] = ~df["PATIENT"].isin(patient_ids)
+    if payer_ids is not None and "PAYER" in df.columns:
+        checks["ORPHAN_PAYER"] = ~df["PAYER"].isin(payer_ids)
+    if "AGE" in df.columns:
+        age = _to_number(df["AGE"])
+        checks["BAD_AGE"] = age.isna() | (age < 0) | (age > MAX_AGE)
+
+    failed = pd.DataFrame(checks, index=df.index)
+    bad = failed.any(axis=1).to_numpy()
+
+    # Boolean × code string concatenates the codes of every failed check
+    codes = pd.Series([f"{code};" for code in failed.columns], index=failed.columns)
+    quarantine = df[bad].copy()
+    quarantine["REASON"] = failed[bad].dot(codes).str.rstrip(";")
+
+    clean = df[~bad].copy()
+    clean["ENCOUNTER_DATE"] = dates[~bad]
+    clean["TOTAL_CLAIM_COST"] = cost[~bad]
+    if "PAYER_COVERAGE" in clean.columns:
+        clean["PAYER_COVERAGE"] = coverage[~bad].fillna(0)
+    return clean, quarantine
+
+
+def reason_counts(quarantine):
+    """Number of quarantined rows per reason code (a row can have several)."""
+    if quarantine.empty:
+        return pd.Series(dtype="int64", name="ROWS")
+    return quarantine["REASON"].str.split(";").explode().value_counts().rename("ROWS")